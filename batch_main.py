@@ -0,0 +1,268 @@
+"""
+批量任务入口文件
+
+从JSONL文件读取多个任务，在同一个asyncio事件循环中并发运行多个编排器。
+所有任务共享同一个LLM模型客户端、MCP工作台会话和Memory系统，
+每个任务拥有独立的Agent实例、输出目录和Agent通信上下文。
+
+JSONL每行格式：
+{"id": "task_1", "task": "任务描述", "chain": "minimal"}
+其中 id 和 chain 可选；id 不能重复，输出目录名由 id 中的字母、数字、"_"、"-"、"." 组成，其他字符替换为 "_"。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from autogen_ext.tools.mcp import McpWorkbench
+
+from src.config import create_mcp_servers, create_model_client, get_chain_config
+from src.agents.chain_factory import create_agents_by_chain
+from src.core import GraphFlowOrchestrator
+from src.core.data_structures import DEFAULT_OUTPUT_DIR
+from src.memory import (
+    memory_config,
+    initialize_memory_system,
+    cleanup_memory_system,
+    agent_communication_memory,
+    unit_test_memory_manager
+)
+from src.utils.llm_cache import SQLiteLLMCache
+from src.utils.dashboard import DEFAULT_WEB_PORT, start_dashboard, stop_dashboard
+
+
+# 配置日志 - 隐藏详细的技术日志
+logging.basicConfig(
+    level=logging.WARNING,  # 只显示警告和错误
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('autogen_core').setLevel(logging.WARNING)
+logging.getLogger('autogen_agentchat').setLevel(logging.WARNING)
+logging.getLogger('autogen_ext').setLevel(logging.WARNING)
+
+logger = logging.getLogger(__name__)
+
+
+def task_dir_name(task_id: str) -> str:
+    """把任务ID转换为安全的目录名（不含路径分隔符，不会是 "." / ".." 或以 "." 开头的隐藏目录）"""
+    name = re.sub(r"[^\w.-]", "_", task_id).lstrip(".")
+    return name or "_"
+
+
+def load_tasks(tasks_file: str, default_chain: str) -> List[Dict[str, str]]:
+    """读取JSONL任务文件，任务ID或其输出目录名重复时抛出 ValueError"""
+    tasks = []
+    seen_dirs: Dict[str, str] = {}
+    with open(tasks_file, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            task_id = str(item.get("id", f"task_{line_no}"))
+            dir_name = task_dir_name(task_id)
+            if dir_name in seen_dirs:
+                raise ValueError(
+                    f"任务文件第 {line_no} 行: 任务ID {task_id!r} 与 {seen_dirs[dir_name]!r} 重复"
+                    f"（输出目录均为 {dir_name}）"
+                )
+            seen_dirs[dir_name] = task_id
+            tasks.append({
+                "id": task_id,
+                "dir": dir_name,
+                "task": item["task"],
+                "chain": item.get("chain", default_chain)
+            })
+    return tasks
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def run_single_task(task_item: Dict[str, str],
+                          fs_workbench,
+                          code_workbench,
+                          model_client,
+                          llm_cache,
+                          output_root: Path,
+                          semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """在共享资源上运行单个任务"""
+    async with semaphore:
+        task_id = task_item["id"]
+        chain_name = task_item["chain"]
+        output_dir = output_root / task_item["dir"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        start_time = time.time()
+        result = {"id": task_id, "chain": chain_name, "success": False}
+
+        try:
+            chain_config = get_chain_config(chain_name)
+
+            # 每个任务独立的Agent实例，共享模型客户端和MCP会话
+            agents = create_agents_by_chain(
+                chain_name=chain_name,
+                fs_workbench=fs_workbench,
+                code_workbench=code_workbench,
+                model_client=model_client,
+                output_dir=str(output_dir)
+            )
+
+            orchestrator = GraphFlowOrchestrator(
+                graph=None,
+                participants=agents,
+                model_client=model_client,
+                max_stalls=chain_config.max_stalls,
+                max_retries=chain_config.max_retries,
+                chain_name=chain_name,
+                llm_cache=llm_cache,
+                output_dir=str(output_dir),
+                communication_memory=agent_communication_memory.fork(),
+                unit_test_memory=unit_test_memory_manager.fork(),
+                owns_memory_system=False,
+                task_id=task_id
+            )
+
+            async for event in orchestrator.run_stream(task_item["task"]):
+                pass
+
+            completed = orchestrator.workflow_logger.workflow_data.get("success", False)
+            result.update({
+                "success": bool(completed),
+                "log_file": orchestrator.workflow_logger.get_log_file_path()
+            })
+
+        except Exception as e:
+            logger.error(f"任务 {task_id} 执行失败: {e}")
+            result["error"] = str(e)
+
+        result["duration"] = time.time() - start_time
+        status_icon = "✅" if result["success"] else "❌"
+        print(f"{status_icon} [{task_id}] {chain_name} 链路完成，耗时 {result['duration']:.1f} 秒")
+        return result
+
+
+def build_throughput_report(results: List[Dict[str, Any]], wall_time: float, concurrency: int) -> Dict[str, Any]:
+    """生成批量运行的吞吐量报告"""
+    durations = [r["duration"] for r in results]
+    success_count = len([r for r in results if r["success"]])
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "total_tasks": len(results),
+        "success_count": success_count,
+        "failure_count": len(results) - success_count,
+        "concurrency": concurrency,
+        "wall_time_seconds": wall_time,
+        "tasks_per_hour": (len(results) / wall_time * 3600) if wall_time > 0 else 0,
+        "latency_seconds": {
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "max": max(durations) if durations else 0
+        },
+        "tasks": results
+    }
+
+
+async def run_batch(tasks: List[Dict[str, str]],
+                    concurrency: int,
+                    output_root: Path,
+                    web_port: int = None,
+                    use_llm_cache: bool = True) -> Dict[str, Any]:
+    """并发运行所有任务（指定 web_port 时在同一进程中启动Memory Web管理界面，use_llm_cache 控制是否启用LLM响应缓存）"""
+    model_client = create_model_client()
+    llm_cache = SQLiteLLMCache() if use_llm_cache else None
+    filesystem_mcp_server, code_runner_mcp_server = create_mcp_servers()
+
+    # Memory系统只初始化和清理一次，由所有任务共享；嵌入模型在启动时预加载
+    memory_config.preload_embedding_model = True
+    await initialize_memory_system()
+    await unit_test_memory_manager.initialize()
+    dashboard = await start_dashboard(web_port)
+
+    try:
+        async with McpWorkbench(server_params=filesystem_mcp_server) as fs_workbench:
+            async with McpWorkbench(server_params=code_runner_mcp_server) as code_workbench:
+                semaphore = asyncio.Semaphore(concurrency)
+                start_time = time.time()
+
+                results = await asyncio.gather(*[
+                    run_single_task(task_item, fs_workbench, code_workbench, model_client,
+                                    llm_cache, output_root, semaphore)
+                    for task_item in tasks
+                ])
+
+                wall_time = time.time() - start_time
+    finally:
+        await stop_dashboard(dashboard)
+        await cleanup_memory_system()
+        await model_client.close()
+        if llm_cache is not None:
+            llm_cache.close()
+
+    return build_throughput_report(list(results), wall_time, concurrency)
+
+
+async def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量并发运行多个工作流任务")
+    parser.add_argument("tasks_file", help="JSONL任务文件")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时运行的任务数")
+    parser.add_argument("--chain", default="minimal", help="未指定chain的任务使用的默认链路")
+    parser.add_argument("--output-root", default=str(Path(DEFAULT_OUTPUT_DIR) / "batch"), help="各任务输出目录的根目录")
+    parser.add_argument("--web", nargs="?", type=int, const=DEFAULT_WEB_PORT, default=None, metavar="PORT",
+                        help="同时启动Memory Web管理界面，实时查看各任务的执行记录、消息和事件")
+    parser.add_argument("--no-llm-cache", action="store_true", help="不使用LLM响应缓存，每次都重新请求模型")
+    args = parser.parse_args()
+
+    try:
+        tasks = load_tasks(args.tasks_file, args.chain)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if not tasks:
+        print("📭 任务文件中没有任务")
+        return
+
+    output_root = Path(args.output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+
+    print(f"📋 共 {len(tasks)} 个任务，并发数 {args.concurrency}")
+    report = await run_batch(tasks, max(1, args.concurrency), output_root, web_port=args.web,
+                             use_llm_cache=not args.no_llm_cache)
+
+    report_file = output_root / f"batch_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 80)
+    print("📊 批量运行报告")
+    print("=" * 80)
+    print(f"任务总数: {report['total_tasks']} (成功 {report['success_count']}, 失败 {report['failure_count']})")
+    print(f"总耗时: {report['wall_time_seconds']:.1f} 秒")
+    print(f"吞吐量: {report['tasks_per_hour']:.1f} 任务/小时")
+    print(f"延迟: p50 {report['latency_seconds']['p50']:.1f} 秒, p95 {report['latency_seconds']['p95']:.1f} 秒")
+    print(f"📁 报告已保存: {report_file}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+嵌入后端/向量精度基准测试
+
+以 torch + float32 为基线，在现有 agent_execution_logs 集合上比较候选配置的 recall@k 和编码吞吐，
+用于决定是否切换 memory_config.embedding_backend / embedding_cache_precision。
+缓存精度的影响按 量化 → 反量化 模拟（命中磁盘缓存的向量即为该结果）。
+
+使用方法:
+python embedding_benchmark.py                                   # 比较所有后端和精度组合
+python embedding_benchmark.py --backend onnx --precision int8   # 只比较指定组合
+python embedding_benchmark.py --sample 500 --top-k 10           # 调整样本数和k
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from src.memory.memory_config import memory_config
+from src.memory.embedding_service import (
+    EmbeddingService, EMBEDDING_BACKENDS, EMBEDDING_PRECISIONS, quantize_vector, dequantize_vector
+)
+
+
+def load_documents(sample_size: int, seed: int) -> list:
+    """从执行日志集合读取文档并随机抽样"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(memory_config.execution_logs_path))
+    collection = client.get_collection("agent_execution_logs")
+    documents = [doc for doc in collection.get(include=["documents"])["documents"] if doc]
+
+    random.Random(seed).shuffle(documents)
+    return documents[:sample_size]
+
+
+def encode(service: EmbeddingService, documents: list, cache_precision: str = "float32") -> tuple:
+    """编码全部文档（按缓存精度量化再反量化），返回 (归一化向量矩阵, 每秒文档数)"""
+    service.preload()
+    start = time.perf_counter()
+    vectors = service.embed(documents)
+    elapsed = time.perf_counter() - start
+    vectors = np.vstack([
+        dequantize_vector(quantize_vector(vector, cache_precision), cache_precision) for vector in vectors
+    ])
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms, len(documents) / elapsed if elapsed > 0 else float("inf")
+
+
+def top_k_neighbors(vectors: np.ndarray, k: int) -> np.ndarray:
+    """暴力余弦相似度近邻（每个文档作为查询，排除自身）"""
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, -np.inf)
+    return np.argsort(-similarity, axis=1)[:, :k]
+
+
+def recall_at_k(baseline: np.ndarray, candidate: np.ndarray) -> float:
+    """候选近邻与基线近邻的平均重合比例"""
+    k = baseline.shape[1]
+    hits = [len(set(b) & set(c)) for b, c in zip(baseline, candidate)]
+    return sum(hits) / (len(hits) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="嵌入后端/向量精度基准测试")
+    parser.add_argument("--backend", choices=EMBEDDING_BACKENDS, help="只测试该后端")
+    parser.add_argument("--precision", choices=EMBEDDING_PRECISIONS, help="只测试该磁盘缓存精度")
+    parser.add_argument("--onnx-file", default=memory_config.embedding_onnx_file, help="onnx后端使用的模型文件")
+    parser.add_argument("--sample", type=int, default=1000, help="抽样文档数")
+    parser.add_argument("--top-k", type=int, default=5, help="recall@k 的k")
+    parser.add_argument("--seed", type=int, default=42, help="抽样随机种子")
+    args = parser.parse_args()
+
+    documents = load_documents(args.sample, args.seed)
+    if len(documents) <= args.top_k:
+        print(f"❌ 执行日志文档数不足（{len(documents)} 条），无法计算 recall@{args.top_k}")
+        return
+
+    print(f"📊 样本文档: {len(documents)} 条，模型: {memory_config.embedding_model_name}")
+
+    # 基线和候选都不使用磁盘缓存，保证测量的是真实编码耗时
+    baseline_service = EmbeddingService(memory_config.embedding_model_name, cache_size=0)
+    baseline_vectors, baseline_rate = encode(baseline_service, documents)
+    baseline_neighbors = top_k_neighbors(baseline_vectors, args.top_k)
+
+    backends = [args.backend] if args.backend else list(EMBEDDING_BACKENDS)
+    precisions = [args.precision] if args.precision else list(EMBEDDING_PRECISIONS)
+
+    print("-" * 72)
+    print(f"{'后端':<12} {'精度':<10} {'recall@' + str(args.top_k):<12} {'文档/秒':<12} {'相对基线':<10}")
+    print("-" * 72)
+    print(f"{'torch':<12} {'float32':<10} {1.0:<12.4f} {baseline_rate:<12.1f} {'1.00x':<10}")
+
+    for backend in backends:
+        for precision in precisions:
+            if backend == "torch" and precision == "float32":
+                continue
+            try:
+                service = EmbeddingService(
+                    memory_config.embedding_model_name,
+                    cache_size=0,
+                    backend=backend,
+                    onnx_file=args.onnx_file if backend == "onnx" else None
+                )
+                vectors, rate = encode(service, documents, precision)
+            except Exception as e:
+                print(f"{backend:<12} {precision:<10} ⚠️ 无法测试: {e}")
+                continue
+
+            recall = recall_at_k(baseline_neighbors, top_k_neighbors(vectors, args.top_k))
+            print(f"{backend:<12} {precision:<10} {recall:<12.4f} {rate:<12.1f} {rate / baseline_rate:<.2f}x")
+
+    print("-" * 72)
+
+
+if __name__ == "__main__":
+    main()
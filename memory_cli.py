@@ -7,8 +7,9 @@ python memory_cli.py list                    # 列出所有记忆
 python memory_cli.py search "测试"            # 搜索记忆
 python memory_cli.py stats                   # 显示统计信息
 python memory_cli.py export memories.json    # 导出记忆
-python memory_cli.py backup ./backup         # 备份所有数据
-python memory_cli.py clean --days 30         # 清理30天前的记忆
+python memory_cli.py backup ./backup         # 增量备份（首次为全量）
+python memory_cli.py clean --days 30         # 清理30天前的记忆并压缩存储
+python memory_cli.py compact                 # 压缩存储
 """
 
 import asyncio
@@ -78,7 +79,8 @@ async def cmd_search(args):
         agent_name=args.agent,
         success_only=args.success_only,
         date_from=date_from,
-        date_to=date_to
+        date_to=date_to,
+        limit=args.limit
     )
     
     if not results:
@@ -138,6 +140,12 @@ async def cmd_stats(args):
     for task_type, type_stats in stats['task_type_statistics'].items():
         success_rate = (type_stats['success'] / type_stats['total'] * 100) if type_stats['total'] > 0 else 0
         print(f"{task_type:<15} 总计:{type_stats['total']:<3} 成功:{type_stats['success']:<3} 失败:{type_stats['failure']:<3} 成功率:{success_rate:.1f}%")
+    
+    print("\n" + "="*60)
+    print("⏱️ 执行耗时分布")
+    print("="*60)
+    for bucket, count in stats.get('duration_histogram', {}).items():
+        print(f"{bucket:<10} {count}")
 
 
 async def cmd_export(args):
@@ -150,7 +158,8 @@ async def cmd_export(args):
         output_file=args.output_file,
         format=args.format,
         filter_agent=args.agent,
-        filter_success=args.success_only
+        filter_success=args.success_only,
+        compression=args.compress
     )
     
     if success:
@@ -165,7 +174,11 @@ async def cmd_backup(args):
     
     await memory_manager.initialize()
     
-    success = await memory_manager.backup_all_data(args.backup_dir)
+    success = await memory_manager.backup_all_data(
+        args.backup_dir,
+        incremental=not args.full,
+        compression=None if args.compress == "none" else args.compress
+    )
     
     if success:
         print("✅ 备份完成")
@@ -174,25 +187,32 @@ async def cmd_backup(args):
 
 
 async def cmd_clean(args):
-    """清理旧记忆"""
-    print(f"🧹 清理 {args.days} 天前的记忆...")
+    """按保留策略清理旧记忆并压缩存储"""
+    success = True if args.success_only else (False if args.failed_only else None)
+    scope = f"{args.days} 天前" + (f"、Agent {args.agent}" if args.agent else "") + \
+        ("、成功" if success is True else "、失败" if success is False else "")
+    print(f"🧹 清理 {scope} 的记忆...")
     
     await memory_manager.initialize()
     
-    # 计算截止日期
-    cutoff_date = datetime.now() - timedelta(days=args.days)
-    cutoff_str = cutoff_date.isoformat()
-    
-    # 搜索要删除的记忆
-    old_memories = await memory_manager.search_memories(
-        date_to=cutoff_str
+    # 先统计要删除的记忆
+    preview = await memory_manager.apply_retention(
+        older_than_days=args.days,
+        agent_name=args.agent,
+        success=success,
+        dry_run=True
     )
+    total = preview["deleted_executions"] + preview["deleted_workflow_records"]
     
-    if not old_memories:
+    if total == 0:
         print("📭 没有找到需要清理的旧记忆")
         return
     
-    print(f"⚠️  找到 {len(old_memories)} 条旧记忆")
+    print(f"⚠️  找到 {preview['deleted_executions']} 条执行记录、"
+          f"{preview['deleted_workflow_records']} 条工作流记录")
+    
+    if args.dry_run:
+        return
     
     if not args.force:
         confirm = input("确认删除这些记忆吗? (y/N): ")
@@ -200,10 +220,26 @@ async def cmd_clean(args):
             print("❌ 取消清理操作")
             return
     
-    # 注意：ChromaDB不支持直接删除，这里只是演示
-    # 实际实现需要重建数据库或使用其他方法
-    print("⚠️  注意：当前版本不支持直接删除记忆")
-    print("💡 建议：使用备份功能保存需要的记忆，然后重新初始化数据库")
+    report = await memory_manager.apply_retention(
+        older_than_days=args.days,
+        agent_name=args.agent,
+        success=success,
+        compact=not args.no_compact
+    )
+    
+    print(f"✅ 已删除 {report['deleted_executions'] + report['deleted_workflow_records']} 条记忆")
+    print(f"💾 存储大小: {report['bytes_before'] / 1024 / 1024:.2f} MB → "
+          f"{report['bytes_after'] / 1024 / 1024:.2f} MB（回收 {report['bytes_reclaimed'] / 1024 / 1024:.2f} MB）")
+
+
+async def cmd_compact(args):
+    """压缩存储"""
+    print("🗜️ 压缩Memory存储...")
+    
+    await memory_manager.initialize()
+    reclaimed = await memory_manager.compact_storage()
+    
+    print(f"✅ 压缩完成，回收 {reclaimed / 1024 / 1024:.2f} MB")
 
 
 async def main():
@@ -230,19 +266,31 @@ async def main():
     # export命令
     export_parser = subparsers.add_parser("export", help="导出记忆")
     export_parser.add_argument("output_file", help="输出文件路径")
-    export_parser.add_argument("--format", choices=["json", "csv"], default="json", help="导出格式")
+    export_parser.add_argument("--format", choices=["json", "ndjson", "csv"], default="json", help="导出格式")
+    export_parser.add_argument("--compress", choices=["gzip", "zstd"], help="压缩格式（默认按文件后缀 .gz/.zst 判断）")
     export_parser.add_argument("--agent", help="过滤Agent")
     export_parser.add_argument("--success-only", action="store_true", help="只导出成功的记忆")
     
     # backup命令
     backup_parser = subparsers.add_parser("backup", help="备份所有数据")
     backup_parser.add_argument("backup_dir", help="备份目录")
+    backup_parser.add_argument("--full", action="store_true", help="全量备份（默认只备份上次备份之后的新记录）")
+    backup_parser.add_argument("--compress", choices=["none", "gzip", "zstd"], default="gzip", help="执行记录备份的压缩格式")
     
     # clean命令
     clean_parser = subparsers.add_parser("clean", help="清理旧记忆")
     clean_parser.add_argument("--days", type=int, default=30, help="清理多少天前的记忆")
+    clean_parser.add_argument("--agent", help="只清理该Agent的记忆")
+    clean_status = clean_parser.add_mutually_exclusive_group()
+    clean_status.add_argument("--success-only", action="store_true", help="只清理成功的执行记录")
+    clean_status.add_argument("--failed-only", action="store_true", help="只清理失败的执行记录")
+    clean_parser.add_argument("--dry-run", action="store_true", help="只统计要删除的记忆，不实际删除")
+    clean_parser.add_argument("--no-compact", action="store_true", help="删除后不压缩存储")
     clean_parser.add_argument("--force", action="store_true", help="强制删除，不询问确认")
     
+    # compact命令
+    subparsers.add_parser("compact", help="压缩存储，回收已删除记录占用的空间")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -266,6 +314,8 @@ async def main():
             await cmd_backup(args)
         elif args.command == "clean":
             await cmd_clean(args)
+        elif args.command == "compact":
+            await cmd_compact(args)
         
     except Exception as e:
         print(f"❌ 执行命令时出错: {e}")
@@ -9,7 +9,11 @@ python memory_web.py
 """
 
 import asyncio
+import gzip
+import hashlib
 import json
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 import sys
@@ -21,8 +25,171 @@ from aiohttp import web, web_request
 from aiohttp.web_response import Response
 import aiohttp_cors
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 from src.memory import initialize_memory_system, cleanup_memory_system
 from src.memory.memory_manager import memory_manager
+from src.utils.event_bus import event_bus
+
+# 列表接口的默认/最大每页条数
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# 响应缓存的有效期（秒）和最大条目数
+RESPONSE_CACHE_TTL = 5.0
+RESPONSE_CACHE_SIZE = 256
+# 小于该大小的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+# SSE 心跳间隔（秒）和客户端重连间隔（毫秒）
+SSE_HEARTBEAT_INTERVAL = 15.0
+SSE_RETRY_MS = 3000
+# 独立运行时检查其他进程写入的间隔（秒），以及为写入延迟回看的时间窗口（秒）
+FEED_POLL_INTERVAL = 2.0
+FEED_LOOKBACK = 30.0
+
+
+class ResponseCache:
+    """
+    进程内JSON响应缓存
+
+    按 请求路径+查询参数 缓存序列化后的响应体及其压缩结果，数据版本变化或超过TTL后失效，
+    同一数据版本下的重复请求不再访问Chroma，也不重复序列化和压缩。
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str, version: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["version"] != version or time.monotonic() - entry["created"] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, version: str, body: bytes):
+        entry = {"version": version, "created": time.monotonic(), "bodies": {"identity": body}}
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def encoded(entry, encoding: str) -> bytes:
+        """按编码返回响应体，压缩结果随缓存条目保存"""
+        bodies = entry["bodies"]
+        if encoding not in bodies:
+            if encoding == "br":
+                bodies[encoding] = brotli.compress(bodies["identity"], quality=5)
+            else:
+                bodies[encoding] = gzip.compress(bodies["identity"], compresslevel=6)
+        return bodies[encoding]
+
+    def clear(self):
+        self._entries.clear()
+
+
+def negotiate_encoding(accept_encoding: str, size: int) -> str:
+    """根据 Accept-Encoding 选择压缩方式（br 需要安装 brotli）"""
+    if size < MIN_COMPRESS_SIZE:
+        return "identity"
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if part.strip() and not part.replace(" ", "").endswith(";q=0")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+class ExecutionFeed:
+    """
+    跨进程执行记录推送（独立运行Web界面时使用）
+
+    事件总线是进程内的，工作流在其他进程中写入的执行记录不会直接发布到这里。
+    按间隔检查数据版本（只读取文件元数据），变化时读取高水位之后的新记录发布为 execution 事件，
+    记录数减少时发布 executions_deleted。Agent消息和工作流事件只有嵌入工作流进程运行（--web）时才会推送。
+    """
+
+    def __init__(self, interval: float = FEED_POLL_INTERVAL, lookback: float = FEED_LOOKBACK):
+        self.interval = interval
+        self.lookback = lookback
+        self._task = None
+        self._version = None
+        self._high_water = None
+        self._count = 0
+        # 回看窗口内已发布的记录ID，避免重复推送
+        self._published: OrderedDict = OrderedDict()
+
+    async def start(self, app=None):
+        manager = memory_manager.execution_log_manager
+        self._version = manager.get_data_version()
+        self._count = await manager.count_executions()
+        latest = await manager.scan_executions(limit=1, newest_first=True, include_content=False)
+        self._high_water = latest[0].metadata.get("timestamp_unix") if latest else None
+        if self._high_water is not None:
+            # 启动前已存在的记录不推送
+            async for page in manager.iter_executions(include_content=False, since=self._high_water - self.lookback):
+                self._published.update((record.metadata.get("id"), True) for record in page)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, app=None):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"⚠️ 检查新的执行记录失败: {e}")
+
+    async def poll(self):
+        """数据版本变化时发布新的执行记录"""
+        manager = memory_manager.execution_log_manager
+        version = manager.get_data_version()
+        if version == self._version:
+            return
+        self._version = version
+
+        # 记录带的是写入方的时间戳，批量入库有延迟，按回看窗口查询后去重
+        filters = {"since": self._high_water - self.lookback} if self._high_water is not None else {}
+        records = []
+        async for page in manager.iter_executions(**filters):
+            records.extend(record for record in page if record.metadata.get("id") not in self._published)
+        records.sort(key=lambda record: record.metadata.get("timestamp_unix") or 0)
+
+        for record in records:
+            doc_id = record.metadata.get("id")
+            event_bus.publish("execution", manager.execution_event(doc_id, record.metadata, record.content))
+            self._published[doc_id] = True
+            unix_time = record.metadata.get("timestamp_unix")
+            if unix_time is not None and (self._high_water is None or unix_time > self._high_water):
+                self._high_water = unix_time
+        while len(self._published) > 1000:
+            self._published.popitem(last=False)
+
+        count = await manager.count_executions()
+        expected = self._count + len(records)
+        if count < expected:
+            event_bus.publish("executions_deleted", {"count": expected - count})
+        self._count = count
 
 
 class MemoryWebServer:
@@ -30,6 +197,7 @@ class MemoryWebServer:
     
     def __init__(self):
         self.app = web.Application()
+        self.response_cache = ResponseCache()
         self.setup_routes()
         self.setup_cors()
     
@@ -58,6 +226,7 @@ class MemoryWebServer:
         self.app.router.add_get('/api/search', self.api_search_memories)
         self.app.router.add_get('/api/stats', self.api_get_stats)
         self.app.router.add_get('/api/memory/{memory_id}', self.api_get_memory)
+        self.app.router.add_get('/api/events', self.api_events)
         self.app.router.add_post('/api/export', self.api_export_memories)
         self.app.router.add_post('/api/backup', self.api_backup_data)
     
@@ -121,6 +290,11 @@ class MemoryWebServer:
             </div>
         </div>
         
+        <div class="section">
+            <h2>📡 实时事件 <span id="liveStatus" style="font-size: 14px; color: #999;">未连接</span></h2>
+            <div id="liveEvents" class="loading">等待新的执行记录、Agent消息和工作流事件...</div>
+        </div>
+        
         <div class="section">
             <h2>🔍 搜索记忆</h2>
             <div>
@@ -142,6 +316,9 @@ class MemoryWebServer:
             <div id="memories">
                 <div class="loading">加载记忆中...</div>
             </div>
+            <div id="loadMore" style="display:none; text-align:center;">
+                <button class="btn btn-primary" onclick="loadAllMemories(true)">加载更多</button>
+            </div>
         </div>
     </div>
 
@@ -176,7 +353,8 @@ class MemoryWebServer:
                 
                 // 填充Agent过滤器
                 const agentFilter = document.getElementById('agentFilter');
-                Object.keys(stats.agent_statistics).forEach(agent => {
+                const existing = new Set(Array.from(agentFilter.options).map(option => option.value));
+                Object.keys(stats.agent_statistics).filter(agent => !existing.has(agent)).forEach(agent => {
                     const option = document.createElement('option');
                     option.value = agent;
                     option.textContent = agent;
@@ -188,12 +366,22 @@ class MemoryWebServer:
             }
         }
         
-        // 加载所有记忆
-        async function loadAllMemories() {
+        // 下一页游标和已显示的记忆数
+        let nextCursor = null;
+        let renderedCount = 0;
+        // 当前显示的是完整列表（而不是搜索结果）时，实时插入新记录
+        let listMode = true;
+        
+        // 按页加载记忆（append 为 true 时加载下一页）
+        async function loadAllMemories(append = false) {
             try {
-                const response = await fetch('/api/memories?limit=1000');  // 增加限制
-                const memories = await response.json();
-                displayMemories(memories);
+                let url = '/api/memories?limit=50';
+                if (append && nextCursor) url += `&cursor=${encodeURIComponent(nextCursor)}`;
+                const response = await fetch(url);
+                const page = await response.json();
+                nextCursor = page.next_cursor;
+                listMode = true;
+                displayMemories(page.items, append);
             } catch (error) {
                 document.getElementById('memories').innerHTML = '<div class="loading">加载记忆失败</div>';
             }
@@ -212,49 +400,118 @@ class MemoryWebServer:
                 
                 const response = await fetch(url);
                 const memories = await response.json();
+                nextCursor = null;
+                listMode = false;
                 displayMemories(memories);
             } catch (error) {
                 document.getElementById('memories').innerHTML = '<div class="loading">搜索失败</div>';
             }
         }
         
+        // 渲染单条记忆
+        function renderMemory(memory, index) {
+            const shortContent = memory.content_preview || memory.content.substring(0, 200);
+            const fullContent = memory.content || shortContent;
+            const needsExpansion = fullContent.length > 200;
+
+            return `
+            <div class="memory-item ${memory.success ? 'success' : 'failure'}">
+                <h4>${memory.agent_name} ${memory.success ? '✅' : '❌'}</h4>
+                <p><strong>时间:</strong> ${memory.timestamp.substring(0, 19)}</p>
+                <p><strong>耗时:</strong> ${memory.duration}秒</p>
+                <div class="content-container">
+                    <p><strong>内容:</strong></p>
+                    <div class="content-short" id="short-${index}" ${needsExpansion ? '' : 'style="display:none"'}>
+                        ${shortContent}${needsExpansion ? '...' : ''}
+                        ${needsExpansion ? `<button onclick="toggleContent(${index})" class="expand-btn">展开完整内容</button>` : ''}
+                    </div>
+                    <div class="content-full" id="full-${index}" style="display:none">
+                        <pre style="white-space: pre-wrap; word-wrap: break-word;">${fullContent}</pre>
+                        ${needsExpansion ? `<button onclick="toggleContent(${index})" class="collapse-btn">收起内容</button>` : ''}
+                    </div>
+                    ${!needsExpansion ? `<div><pre style="white-space: pre-wrap; word-wrap: break-word;">${fullContent}</pre></div>` : ''}
+                </div>
+                ${memory.score ? `<p><strong>相似度:</strong> ${memory.score.toFixed(3)}</p>` : ''}
+            </div>
+            `;
+        }
+        
         // 显示记忆列表
-        function displayMemories(memories) {
-            if (memories.length === 0) {
+        function displayMemories(memories, append = false) {
+            document.getElementById('loadMore').style.display = nextCursor ? 'block' : 'none';
+            if (!append) renderedCount = 0;
+            if (memories.length === 0 && !append) {
                 document.getElementById('memories').innerHTML = '<div class="loading">没有找到记忆</div>';
                 return;
             }
             
-            const memoriesHtml = memories.map((memory, index) => {
-                const shortContent = memory.content_preview || memory.content.substring(0, 200);
-                const fullContent = memory.content;
-                const needsExpansion = fullContent.length > 200;
-
-                return `
-                <div class="memory-item ${memory.success ? 'success' : 'failure'}">
-                    <h4>${memory.agent_name} ${memory.success ? '✅' : '❌'}</h4>
-                    <p><strong>时间:</strong> ${memory.timestamp.substring(0, 19)}</p>
-                    <p><strong>耗时:</strong> ${memory.duration}秒</p>
-                    <div class="content-container">
-                        <p><strong>内容:</strong></p>
-                        <div class="content-short" id="short-${index}" ${needsExpansion ? '' : 'style="display:none"'}>
-                            ${shortContent}${needsExpansion ? '...' : ''}
-                            ${needsExpansion ? `<button onclick="toggleContent(${index})" class="expand-btn">展开完整内容</button>` : ''}
-                        </div>
-                        <div class="content-full" id="full-${index}" style="display:none">
-                            <pre style="white-space: pre-wrap; word-wrap: break-word;">${fullContent}</pre>
-                            ${needsExpansion ? `<button onclick="toggleContent(${index})" class="collapse-btn">收起内容</button>` : ''}
-                        </div>
-                        ${!needsExpansion ? `<div><pre style="white-space: pre-wrap; word-wrap: break-word;">${fullContent}</pre></div>` : ''}
-                    </div>
-                    ${memory.score ? `<p><strong>相似度:</strong> ${memory.score.toFixed(3)}</p>` : ''}
-                </div>
-                `;
-            }).join('');
+            const memoriesHtml = memories.map((memory, i) => renderMemory(memory, renderedCount + i)).join('');
 
-            document.getElementById('memories').innerHTML = memoriesHtml;
+            renderedCount += memories.length;
+            if (append) {
+                document.getElementById('memories').insertAdjacentHTML('beforeend', memoriesHtml);
+            } else {
+                document.getElementById('memories').innerHTML = memoriesHtml;
+            }
         }
 
+        // 在列表顶部插入一条新记忆
+        function prependMemory(memory) {
+            const container = document.getElementById('memories');
+            if (container.querySelector('.loading')) container.innerHTML = '';
+            container.insertAdjacentHTML('afterbegin', renderMemory(memory, renderedCount++));
+        }
+        
+        // 合并短时间内的多次统计刷新
+        let statsTimer = null;
+        function scheduleStatsRefresh() {
+            if (statsTimer) return;
+            statsTimer = setTimeout(() => { statsTimer = null; loadStats(); }, 2000);
+        }
+        
+        // 显示实时事件（保留最近20条）
+        function addLiveEvent(text, timestamp) {
+            const container = document.getElementById('liveEvents');
+            if (container.classList.contains('loading')) {
+                container.classList.remove('loading');
+                container.innerHTML = '';
+            }
+            const time = (timestamp || new Date().toISOString()).substring(11, 19);
+            container.insertAdjacentHTML('afterbegin', `<p>${time} ${text}</p>`);
+            while (container.children.length > 20) container.removeChild(container.lastChild);
+        }
+        
+        // 订阅服务端推送的增量事件（断线后浏览器自动重连并携带 Last-Event-ID）
+        function connectEvents() {
+            if (!window.EventSource) return;
+            const status = document.getElementById('liveStatus');
+            const source = new EventSource('/api/events');
+            source.onopen = () => { status.textContent = '已连接'; };
+            source.onerror = () => { status.textContent = '重连中...'; };
+            
+            source.addEventListener('execution', event => {
+                const memory = JSON.parse(event.data);
+                if (listMode) prependMemory(memory);
+                scheduleStatsRefresh();
+                addLiveEvent(`${memory.success ? '✅' : '❌'} ${memory.agent_name} 新增执行记录`, memory.timestamp);
+            });
+            source.addEventListener('message', event => {
+                const message = JSON.parse(event.data);
+                addLiveEvent(`📨 ${message.from_agent} → ${message.to_agent} (${message.message_type})`, message.timestamp);
+            });
+            source.addEventListener('workflow', event => {
+                const workflowEvent = JSON.parse(event.data);
+                addLiveEvent(`📝 [${workflowEvent.type}] ${workflowEvent.message}`, workflowEvent.timestamp);
+            });
+            // 记录被删除或事件积压丢失时重新加载
+            const reload = () => {
+                if (listMode) loadAllMemories();
+                scheduleStatsRefresh();
+            };
+            source.addEventListener('executions_deleted', reload);
+            source.addEventListener('resync', reload);
+        }
+        
         // 切换内容显示
         function toggleContent(index) {
             const shortDiv = document.getElementById(`short-${index}`);
@@ -311,6 +568,7 @@ class MemoryWebServer:
         window.onload = function() {
             loadStats();
             loadAllMemories();
+            connectEvents();
         };
     </script>
 </body>
@@ -318,12 +576,56 @@ class MemoryWebServer:
         """
         return web.Response(text=html, content_type='text/html')
     
+    async def cached_json_response(self, request, producer):
+        """
+        返回带缓存校验的JSON响应
+
+        ETag 由数据版本和请求路径/参数计算，客户端携带相同的 If-None-Match 时直接返回304，不执行查询；
+        同一版本的响应在TTL内复用缓存，并按 Accept-Encoding 返回 gzip/br 压缩结果。
+        """
+        version = memory_manager.execution_log_manager.get_data_version()
+        key = request.path_qs
+        etag = '"' + hashlib.sha1(f"{version}|{key}".encode()).hexdigest()[:20] + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+
+        entry = self.response_cache.get(key, version)
+        if entry is None:
+            data = await producer()
+            body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+            entry = self.response_cache.put(key, version, body)
+
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""), len(entry["bodies"]["identity"]))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return web.Response(
+            body=self.response_cache.encoded(entry, encoding) if encoding != "identity" else entry["bodies"]["identity"],
+            content_type="application/json",
+            charset="utf-8",
+            headers=headers
+        )
+
+    @staticmethod
+    def page_size(request, default: int = DEFAULT_PAGE_SIZE) -> int:
+        """读取每页条数并限制在 1..MAX_PAGE_SIZE"""
+        return max(1, min(int(request.query.get('limit', default)), MAX_PAGE_SIZE))
+
     async def api_list_memories(self, request):
-        """API: 列出记忆"""
+        """API: 按游标分页列出记忆（最新的在前）"""
         try:
-            limit = int(request.query.get('limit', 1000))  # 增加默认限制
-            memories = await memory_manager.list_all_memories(limit=limit)
-            return web.json_response(memories)
+            limit = self.page_size(request)
+            cursor = request.query.get('cursor') or None
+            if cursor:
+                memory_manager.decode_cursor(cursor)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        try:
+            return await self.cached_json_response(
+                request, lambda: memory_manager.list_memories_page(limit=limit, cursor=cursor)
+            )
         except Exception as e:
             return web.json_response({'error': str(e)}, status=500)
     
@@ -332,22 +634,28 @@ class MemoryWebServer:
         try:
             query = request.query.get('query', '')
             agent = request.query.get('agent', None)
-            limit = int(request.query.get('limit', 100))  # 增加默认限制
+            limit = self.page_size(request)
+            offset = max(0, int(request.query.get('offset', 0)))
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
 
-            memories = await memory_manager.search_memories(
-                query=query,
-                agent_name=agent if agent else None
+        try:
+            return await self.cached_json_response(
+                request,
+                lambda: memory_manager.search_memories(
+                    query=query,
+                    agent_name=agent if agent else None,
+                    limit=limit,
+                    offset=offset
+                )
             )
-
-            return web.json_response(memories[:limit])
         except Exception as e:
             return web.json_response({'error': str(e)}, status=500)
     
     async def api_get_stats(self, request):
         """API: 获取统计信息"""
         try:
-            stats = await memory_manager.get_memory_statistics()
-            return web.json_response(stats)
+            return await self.cached_json_response(request, memory_manager.get_memory_statistics)
         except Exception as e:
             return web.json_response({'error': str(e)}, status=500)
     
@@ -364,6 +672,44 @@ class MemoryWebServer:
         except Exception as e:
             return web.json_response({'error': str(e)}, status=500)
     
+    async def api_events(self, request):
+        """
+        API: 服务端推送事件流（SSE）
+
+        推送执行记录写入、记录删除、Agent间消息和工作流事件的增量数据；
+        可用 topics 参数过滤主题（逗号分隔），重连时按 Last-Event-ID 补发错过的事件。
+        """
+        topics = [topic for topic in request.query.get('topics', '').split(',') if topic] or None
+        try:
+            last_event_id = request.headers.get('Last-Event-ID') or request.query.get('last_event_id')
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+
+        subscription = event_bus.subscribe(topics=topics, last_event_id=last_event_id)
+        try:
+            await response.write(f"retry: {SSE_RETRY_MS}\n\n".encode())
+            while True:
+                event = await subscription.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                if event is None:
+                    # 心跳注释，保持连接并及时发现已断开的客户端
+                    await response.write(b": keep-alive\n\n")
+                    continue
+                payload = json.dumps(event["data"], ensure_ascii=False, default=str)
+                await response.write(f"id: {event['id']}\nevent: {event['topic']}\ndata: {payload}\n\n".encode())
+        except ConnectionResetError:
+            pass
+        finally:
+            subscription.close()
+        return response
+    
     async def api_export_memories(self, request):
         """API: 导出记忆"""
         try:
@@ -407,6 +753,10 @@ async def init_app():
     await memory_manager.initialize()
     
     server = MemoryWebServer()
+    # 独立运行时推送其他进程写入的执行记录
+    feed = ExecutionFeed()
+    server.app.on_startup.append(feed.start)
+    server.app.on_cleanup.append(feed.stop)
     return server.app
 
 
@@ -415,6 +765,21 @@ async def cleanup_app(app):
     await cleanup_memory_system()
 
 
+async def start_embedded_server(host: str = 'localhost', port: int = 8080) -> web.AppRunner:
+    """
+    在当前事件循环中启动Web管理界面（与工作流运行在同一进程）
+
+    事件总线是进程内的，嵌入启动后实时事件面板可以收到工作流写入的执行记录、消息和事件。
+    工作流入口通过 --web 参数调用（见 src/utils/dashboard.py）；调用方负责在结束时执行 await runner.cleanup()。
+    """
+    server = MemoryWebServer()
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"🌐 Memory Web管理界面已启动: http://{host}:{port}")
+    return runner
+
+
 def main():
     """主函数"""
     print("🌐 启动Memory Web管理界面...")
@@ -21,6 +21,8 @@ from autogen_ext.tools.mcp import McpWorkbench
 from src.config import create_mcp_servers, create_model_client, get_chain_config
 from src.agents.chain_factory import create_agents_by_chain, get_chain_orchestrator_config
 from src.core import GraphFlowOrchestrator
+from src.utils.llm_cache import SQLiteLLMCache
+from src.utils.dashboard import parse_web_option, start_dashboard, stop_dashboard
 
 
 # 配置日志 - 隐藏详细的技术日志
@@ -53,7 +55,7 @@ def create_mcp_server_params():
         raise
 
 
-async def create_minimal_graph_and_orchestrator(agents, model_client, chain_name="minimal"):
+async def create_minimal_graph_and_orchestrator(agents, model_client, chain_name="minimal", llm_cache=None):
     """创建最小链路的执行图和编排器"""
     try:
         # 获取链路配置
@@ -88,7 +90,9 @@ async def create_minimal_graph_and_orchestrator(agents, model_client, chain_name
             model_client=model_client,
             max_stalls=orchestrator_config["max_stalls"],
             max_retries=orchestrator_config["max_retries"],
-            chain_name=chain_name  # 传递链路名称
+            max_concurrency=orchestrator_config["max_concurrency"],
+            chain_name=chain_name,  # 传递链路名称
+            llm_cache=llm_cache
         )
         
         logger.info(f"最小链路执行图和编排器创建成功")
@@ -99,8 +103,10 @@ async def create_minimal_graph_and_orchestrator(agents, model_client, chain_name
         raise
 
 
-async def run_minimal_workflow(task: str, chain_name: str = "minimal"):
-    """运行最小链路工作流"""
+async def run_minimal_workflow(task: str, chain_name: str = "minimal", resume: bool = False, web_port: int = None,
+                               use_llm_cache: bool = True):
+    """运行最小链路工作流（指定 web_port 时在同一进程中启动Memory Web管理界面，use_llm_cache 控制是否启用LLM响应缓存）"""
+    dashboard = await start_dashboard(web_port)
     try:
         logger.info(f"开始初始化最小链路Agent协作系统...")
 
@@ -108,6 +114,9 @@ async def run_minimal_workflow(task: str, chain_name: str = "minimal"):
         model_client = create_model_client()
         logger.info("LLM模型客户端创建成功")
 
+        # 编排器规划/指令提示的LLM响应缓存，重复运行相同任务时复用；--no-llm-cache 时关闭
+        llm_cache = SQLiteLLMCache() if use_llm_cache else None
+
         # 2. 创建MCP服务器参数
         filesystem_mcp_server, code_runner_mcp_server = create_mcp_server_params()
 
@@ -127,7 +136,7 @@ async def run_minimal_workflow(task: str, chain_name: str = "minimal"):
 
                 # 5. 创建执行图和编排器
                 graph, orchestrator = await create_minimal_graph_and_orchestrator(
-                    agents, model_client, chain_name
+                    agents, model_client, chain_name, llm_cache
                 )
 
                 # 6. 运行工作流
@@ -136,7 +145,7 @@ async def run_minimal_workflow(task: str, chain_name: str = "minimal"):
                 print("="*80)
 
                 # 使用编排器运行任务
-                async for event in orchestrator.run_stream(task):
+                async for event in orchestrator.run_stream(task, resume=resume):
                     # 事件已经通过WorkflowLogger处理，这里不需要额外打印
                     pass
 
@@ -148,9 +157,16 @@ async def run_minimal_workflow(task: str, chain_name: str = "minimal"):
         # 关闭模型客户端
         await model_client.close()
 
+        if llm_cache is not None:
+            cache_stats = llm_cache.get_statistics()
+            print(f"💾 LLM缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次, 命中率 {cache_stats['hit_rate']:.1f}%")
+            llm_cache.close()
+
     except Exception as e:
         print(f"\n❌ 执行失败: {e}")
         raise
+    finally:
+        await stop_dashboard(dashboard)
 
 
 async def main():
@@ -169,19 +185,23 @@ async def main():
     """
     
     try:
-        # 可以从命令行参数获取任务和链路类型
+        # 可以从命令行参数获取任务和链路类型；--resume 表示从检查点继续，--web[=端口] 同时启动Web管理界面，
+        # --no-llm-cache 关闭LLM响应缓存
         chain_name = "minimal"  # 默认使用最小链路
         task = default_task
+        resume = "--resume" in sys.argv
+        use_llm_cache = "--no-llm-cache" not in sys.argv
+        web_port, args = parse_web_option([arg for arg in sys.argv[1:] if arg not in ("--resume", "--no-llm-cache")])
         
-        if len(sys.argv) > 1:
+        if args:
             # 第一个参数是链路类型
-            if sys.argv[1] in ["minimal", "prototype", "quality"]:
-                chain_name = sys.argv[1]
-                if len(sys.argv) > 2:
-                    task = " ".join(sys.argv[2:])
+            if args[0] in ["minimal", "prototype", "quality"]:
+                chain_name = args[0]
+                if len(args) > 1:
+                    task = " ".join(args[1:])
             else:
                 # 第一个参数是任务描述
-                task = " ".join(sys.argv[1:])
+                task = " ".join(args)
         
         # 显示链路信息
         chain_config = get_chain_config(chain_name)
@@ -191,7 +211,7 @@ async def main():
         print(f"📁 日志将保存到: /Users/jabez/output/logs/")
 
         # 运行工作流
-        await run_minimal_workflow(task, chain_name)
+        await run_minimal_workflow(task, chain_name, resume=resume, web_port=web_port, use_llm_cache=use_llm_cache)
 
     except KeyboardInterrupt:
         print("\n⚠️ 用户中断执行")
@@ -208,6 +228,9 @@ if __name__ == "__main__":
     print("  python minimal_main.py minimal '任务描述'  # 指定链路和任务")
     print("  python minimal_main.py prototype '任务'   # 使用快速原型链路")
     print("  python minimal_main.py quality '任务'     # 使用质量保证链路")
+    print("  python minimal_main.py --resume ...       # 从上次中断的检查点继续")
+    print("  python minimal_main.py --web ...          # 同时启动Memory Web管理界面（实时事件）")
+    print("  python minimal_main.py --no-llm-cache ... # 不使用LLM响应缓存，每次都重新请求模型")
     print()
     
     # 运行主程序
@@ -9,6 +9,7 @@ from .unit_test_agent import create_unit_test_agent
 from .refactoring_agent import create_refactoring_agent
 from .scanning_agent import create_scanning_agent
 from .structure_agent import create_structure_agent
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
 __all__ = [
     "create_planning_agent",
@@ -21,14 +22,14 @@ __all__ = [
 ]
 
 
-def create_all_agents(fs_workbench, code_workbench, model_client):
+def create_all_agents(fs_workbench, code_workbench, model_client, output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建所有Agent并返回列表 - 基于test.py的流程，不包含ReflectionAgent"""
     agents = [
-        create_planning_agent(model_client, fs_workbench),
-        create_coding_agent(model_client, fs_workbench),
-        create_test_agent(model_client, fs_workbench),
-        create_unit_test_agent(model_client, code_workbench),
-        create_refactoring_agent(model_client, fs_workbench),
+        create_planning_agent(model_client, fs_workbench, output_dir=output_dir),
+        create_coding_agent(model_client, fs_workbench, output_dir=output_dir),
+        create_test_agent(model_client, fs_workbench, output_dir=output_dir),
+        create_unit_test_agent(model_client, code_workbench, output_dir=output_dir),
+        create_refactoring_agent(model_client, fs_workbench, output_dir=output_dir),
         create_scanning_agent(model_client, fs_workbench),
         create_structure_agent(model_client, fs_workbench)
     ]
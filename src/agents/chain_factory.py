@@ -15,6 +15,7 @@ from .refactoring_agent import create_refactoring_agent
 from .scanning_agent import create_scanning_agent
 from .structure_agent import create_structure_agent
 from ..config.chain_config import ChainConfig, get_chain_config
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
 
 class ChainFactory:
@@ -37,7 +38,8 @@ class ChainFactory:
                                fs_workbench,
                                code_workbench, 
                                model_client,
-                               project_config: Dict[str, str] = None) -> List[AssistantAgent]:
+                               project_config: Dict[str, str] = None,
+                               output_dir: str = DEFAULT_OUTPUT_DIR) -> List[AssistantAgent]:
         """
         根据链路配置创建Agent列表
         
@@ -47,6 +49,7 @@ class ChainFactory:
             code_workbench: 代码运行工作台
             model_client: 模型客户端
             project_config: 项目配置（可选）
+            output_dir: 生成文件和测试报告所在目录（并发运行多个任务时每个任务独立）
             
         Returns:
             Agent列表
@@ -70,7 +73,8 @@ class ChainFactory:
                 fs_workbench, 
                 code_workbench, 
                 model_client,
-                project_config
+                project_config,
+                output_dir
             )
             
             agents.append(agent)
@@ -84,17 +88,21 @@ class ChainFactory:
                            fs_workbench,
                            code_workbench,
                            model_client,
-                           project_config: Dict[str, str] = None) -> AssistantAgent:
+                           project_config: Dict[str, str] = None,
+                           output_dir: str = DEFAULT_OUTPUT_DIR) -> AssistantAgent:
         """创建单个Agent"""
         creator_func = self._agent_creators[agent_name]
         
         # 根据Agent类型传递不同的参数
         if agent_name == "CodePlanningAgent":
             # 规划Agent需要项目配置
-            return creator_func(model_client, fs_workbench, project_config)
+            return creator_func(model_client, fs_workbench, project_config, output_dir=output_dir)
         elif agent_name == "UnitTestAgent":
             # 单元测试Agent使用代码工作台
-            return creator_func(model_client, code_workbench)
+            return creator_func(model_client, code_workbench, output_dir=output_dir)
+        elif agent_name in ("FunctionWritingAgent", "TestGenerationAgent", "RefactoringAgent"):
+            # 提示词中包含输出目录的Agent
+            return creator_func(model_client, fs_workbench, output_dir=output_dir)
         else:
             # 其他Agent使用文件系统工作台
             return creator_func(model_client, fs_workbench)
@@ -110,6 +118,7 @@ class ChainFactory:
         return {
             "max_stalls": config.max_stalls,
             "max_retries": config.max_retries,
+            "max_concurrency": config.max_concurrency,
             "dependencies": config.dependencies
         }
     
@@ -151,7 +160,8 @@ def create_agents_by_chain(chain_name: str,
                           fs_workbench,
                           code_workbench,
                           model_client,
-                          project_config: Dict[str, str] = None) -> List[AssistantAgent]:
+                          project_config: Dict[str, str] = None,
+                          output_dir: str = DEFAULT_OUTPUT_DIR) -> List[AssistantAgent]:
     """
     根据链路名称创建Agent的便捷函数
     
@@ -161,12 +171,13 @@ def create_agents_by_chain(chain_name: str,
         code_workbench: 代码运行工作台
         model_client: 模型客户端
         project_config: 项目配置
+        output_dir: 生成文件和测试报告所在目录
         
     Returns:
         Agent列表
     """
     return chain_factory.create_agents_for_chain(
-        chain_name, fs_workbench, code_workbench, model_client, project_config
+        chain_name, fs_workbench, code_workbench, model_client, project_config, output_dir
     )
 
 
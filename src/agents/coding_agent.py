@@ -6,8 +6,10 @@
 
 from autogen_agentchat.agents import AssistantAgent
 
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
-def create_coding_agent(model_client, fs_workbench):
+
+def create_coding_agent(model_client, fs_workbench, output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建函数编写Agent"""
     return AssistantAgent(
         name="FunctionWritingAgent",
@@ -20,18 +22,18 @@ def create_coding_agent(model_client, fs_workbench):
         1. 根据规划Agent的指导编写Python函数
         2. 确保代码简洁、可读、有注释
         3. 包含必要的错误处理
-        4. **重要**：将代码保存到 /Users/jabez/output/文件夹中
+        4. **重要**：将代码保存到 {output_dir}/文件夹中
         5. 你只负责编写业务逻辑代码，绝对不要编写测试代码(重要限制，如test_*.py，测试代码由TestGenerationAgent实现并保存)
         6. 绝对不要编写测试代码(如test_*.py文件)
         7. 如果规划中要求你写测试代码，请忽略该部分
-        8. **文件路径**：必须使用完整路径 /Users/jabez/output/
+        8. **文件路径**：必须使用完整路径 {output_dir}/
         9. 测试代码由TestGenerationAgent负责
 
         **文件保存要求**：
         - 使用write_file工具
-        - 文件路径：/Users/jabez/output/
+        - 文件路径：{output_dir}/
         - 确保文件成功保存，以便后续Agent能够读取
 
         你可以使用文件系统工具来创建和保存代码文件。
-        请用中文回复，并在完成编写后说"CODING_COMPLETE"。"""
+        请用中文回复，并在完成编写后说"CODING_COMPLETE"。""".replace("{output_dir}", output_dir)
     )
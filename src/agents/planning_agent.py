@@ -7,8 +7,11 @@
 from autogen_agentchat.agents import AssistantAgent
 from typing import Dict
 
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
-def create_planning_agent(model_client, fs_workbench, project_config: Dict[str, str] = None):
+
+def create_planning_agent(model_client, fs_workbench, project_config: Dict[str, str] = None,
+                          output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建代码规划Agent"""
     # 如果没有提供配置，使用占位符
     if not project_config:
@@ -24,14 +27,14 @@ def create_planning_agent(model_client, fs_workbench, project_config: Dict[str,
         2. 制定详细的实现计划
         3. 将任务分解为具体的函数需求
         4. 为FunctionWritingAgent提供清晰的指导
-        5. **重要**：所有文件都应保存在 /Users/jabez/output 目录下
+        5. **重要**：所有文件都应保存在 {output_dir} 目录下
         6. 明确指定文件名和保存路径，确保后续Agent能找到文件
 
         **动态文件命名**：
         - 系统会根据任务内容自动生成合适的文件名
         - 你需要在规划中明确指出具体的文件路径
-        - 主要代码文件路径：{project_config.get('main_file_path', '/Users/jabez/output/main.py')}
-        - 测试文件路径：{project_config.get('test_file_path', '/Users/jabez/output/test_main.py')}
+        - 主要代码文件路径：{project_config.get('main_file_path', f'{output_dir}/main.py')}
+        - 测试文件路径：{project_config.get('test_file_path', f'{output_dir}/test_main.py')}
         - 项目名称：{project_config.get('project_name', 'custom_project')}
 
         在制定计划时，请明确指出上述文件路径，确保后续Agent使用正确的文件名。
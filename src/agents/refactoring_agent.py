@@ -6,8 +6,10 @@
 
 from autogen_agentchat.agents import AssistantAgent
 
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
-def create_refactoring_agent(model_client, fs_workbench):
+
+def create_refactoring_agent(model_client, fs_workbench, output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建代码重构Agent"""
     return AssistantAgent(
         name="RefactoringAgent",
@@ -25,7 +27,7 @@ def create_refactoring_agent(model_client, fs_workbench):
 ## 🔍 **错误诊断协议**
 ### 第一阶段：错误信息收集
 1. **读取测试报告**：
-   - 检查是否存在 `/Users/jabez/output/test_report.json`
+   - 检查是否存在 `{output_dir}/test_report.json`
    - 解析失败测试的详细错误信息
    - 提取错误类型、位置和堆栈跟踪
 
@@ -110,5 +112,5 @@ def create_refactoring_agent(model_client, fs_workbench):
 2. **修复后代码**：保存到原文件位置
 3. **完成标记**：在所有修复完成后输出 "REFACTORING_COMPLETE"
 
-请用中文回复，采用结构化的分析和报告格式。"""
+请用中文回复，采用结构化的分析和报告格式。""".replace("{output_dir}", output_dir)
     )
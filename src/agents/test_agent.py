@@ -6,8 +6,10 @@
 
 from autogen_agentchat.agents import AssistantAgent
 
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
-def create_test_agent(model_client, fs_workbench):
+
+def create_test_agent(model_client, fs_workbench, output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建测试用例生成Agent"""
     return AssistantAgent(
         name="TestGenerationAgent",
@@ -24,7 +26,7 @@ def create_test_agent(model_client, fs_workbench):
         - 如果发现业务代码有问题，只能在测试文件中注释说明，不能修改业务代码
 
         你的任务是：
-        1. **读取源代码**：使用read_file工具读取 /Users/jabez/output/ 目录下的业务逻辑代码文件
+        1. **读取源代码**：使用read_file工具读取 {output_dir}/ 目录下的业务逻辑代码文件
         2. 分析函数的功能和参数
         3. 生成全面的测试用例，包括：
            - 正常情况测试
@@ -32,16 +34,16 @@ def create_test_agent(model_client, fs_workbench):
            - 异常情况测试
            - 输入验证测试
         4. 使用unittest框架编写测试代码
-        5. **保存测试文件**：使用write_file工具将测试代码保存到 /Users/jabez/output/test_*.py 文件中
+        5. **保存测试文件**：使用write_file工具将测试代码保存到 {output_dir}/test_*.py 文件中
         6. 确保测试代码可以直接运行
         7. 测试代码中要根据实际的业务代码异常类型编写正确的断言
 
         **文件路径要求**：
-        - 读取源代码：/Users/jabez/output/
-        - 保存测试文件：/Users/jabez/output/test_*.py
+        - 读取源代码：{output_dir}/
+        - 保存测试文件：{output_dir}/test_*.py
 
         ⚠️ 重要提醒：你必须生成并保存测试文件，不能只分析代码而不保存！
 
         你可以使用文件系统工具来读取代码文件和保存测试文件。
-        请用中文回复，并在完成测试生成后说"TESTING_COMPLETE"。"""
+        请用中文回复，并在完成测试生成后说"TESTING_COMPLETE"。""".replace("{output_dir}", output_dir)
     )
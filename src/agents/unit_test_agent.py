@@ -6,8 +6,10 @@
 
 from autogen_agentchat.agents import AssistantAgent
 
+from ..core.data_structures import DEFAULT_OUTPUT_DIR
 
-def create_unit_test_agent(model_client, code_workbench):
+
+def create_unit_test_agent(model_client, code_workbench, output_dir: str = DEFAULT_OUTPUT_DIR):
     """创建单元测试执行Agent - 支持运行时智能路径解析"""
 
     return AssistantAgent(
@@ -37,7 +39,7 @@ def create_unit_test_agent(model_client, code_workbench):
         print("🔍 开始智能路径解析...")
 
         # 1. 发现可能的项目根目录
-        base_dirs = ['/Users/jabez/output']
+        base_dirs = ['{output_dir}']
         possible_roots = []
 
         for base_dir in base_dirs:
@@ -111,8 +113,8 @@ def create_unit_test_agent(model_client, code_workbench):
 
         # 4. 配置Python路径
         project_paths = [
-            best_working_dir or '/Users/jabez/output',
-            '/Users/jabez/output',
+            best_working_dir or '{output_dir}',
+            '{output_dir}',
             os.getcwd()
         ]
 
@@ -134,7 +136,7 @@ def create_unit_test_agent(model_client, code_workbench):
         if not test_files:
             print("🔍 项目结构中未发现测试文件，进行深度搜索...")
             # 深度搜索策略
-            search_dirs = [os.getcwd(), '/Users/jabez/output']
+            search_dirs = ['{output_dir}', os.getcwd()]
 
             for search_dir in search_dirs:
                 if os.path.exists(search_dir):
@@ -151,7 +153,7 @@ def create_unit_test_agent(model_client, code_workbench):
             print("❌ 未找到任何测试文件！")
             print("📋 请检查以下位置是否存在测试文件:")
             print("   - 当前目录下的 test_*.py 文件")
-            print("   - /Users/jabez/output/ 目录下的测试文件")
+            print("   - {output_dir}/ 目录下的测试文件")
             print("   - 项目子目录中的测试文件")
         ```
 
@@ -243,7 +245,7 @@ def create_unit_test_agent(model_client, code_workbench):
                 })
 
         # 保存报告到文件 - 确保使用正确的目录
-        report_dir = best_working_dir if best_working_dir else '/Users/jabez/output'
+        report_dir = best_working_dir if best_working_dir else '{output_dir}'
         report_path = os.path.join(report_dir, "test_report.json")
         os.makedirs(os.path.dirname(report_path), exist_ok=True)
 
@@ -297,5 +299,5 @@ def create_unit_test_agent(model_client, code_workbench):
         2. 必须在Python代码中保存测试报告到JSON和Markdown文件
         3. 必须在最后输出"UNIT_TESTING_COMPLETE"标记表示完成
 
-        请用中文回复，严格按照上述步骤执行，并在完成所有步骤后说"UNIT_TESTING_COMPLETE"。"""
+        请用中文回复，严格按照上述步骤执行，并在完成所有步骤后说"UNIT_TESTING_COMPLETE"。""".replace("{output_dir}", output_dir)
     )
@@ -5,7 +5,21 @@
 """
 
 from typing import List, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+
+# 提示词默认token预算；测试输出和错误信息较多的Agent单独配置
+DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+DEFAULT_AGENT_PROMPT_BUDGETS = {
+    "UnitTestAgent": 4000,
+    "RefactoringAgent": 8000
+}
+
+# Agent执行默认超时（秒，0表示不限制）。超时默认关闭，需要时按链路开启，
+# 例如 agent_timeout_seconds=600、agent_timeouts={"UnitTestAgent": 900}、llm_call_timeout_seconds=120
+DEFAULT_AGENT_TIMEOUT_SECONDS = 0
+DEFAULT_AGENT_TIMEOUTS: Dict[str, float] = {}
+DEFAULT_LLM_CALL_TIMEOUT_SECONDS = 0
 
 
 @dataclass
@@ -17,6 +31,27 @@ class ChainConfig:
     dependencies: Dict[str, List[str]]
     max_stalls: int = 3
     max_retries: int = 2
+    max_concurrency: int = 1  # 同一轮内可并行执行的就绪Agent上限，1表示严格串行
+    # 指令生成模式："llm" 每个节点都调用LLM生成指令；
+    # "template" 按模板确定性生成，仅在重试或多候选分支时调用LLM
+    instruction_mode: str = "llm"
+    history_retention: int = 200  # 进度账本全局执行历史保留的最近记录条数
+    speculative_prefetch: bool = False  # 串行执行时是否在当前Agent运行期间预取下一个Agent的指令
+    # 超时（秒，0表示不限制）：单个Agent执行的墙钟超时、个别Agent的覆盖值、编排器单次LLM调用超时
+    agent_timeout_seconds: float = DEFAULT_AGENT_TIMEOUT_SECONDS
+    agent_timeouts: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_AGENT_TIMEOUTS))
+    llm_call_timeout_seconds: float = DEFAULT_LLM_CALL_TIMEOUT_SECONDS
+    # 每个Agent提示词的token预算，未单独配置的Agent使用 prompt_token_budget
+    prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET
+    agent_prompt_budgets: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_AGENT_PROMPT_BUDGETS))
+
+    def get_agent_timeout(self, agent_name: str) -> float:
+        """获取Agent执行超时（秒）"""
+        return self.agent_timeouts.get(agent_name, self.agent_timeout_seconds)
+
+    def get_prompt_budget(self, agent_name: str) -> int:
+        """获取Agent提示词的token预算"""
+        return self.agent_prompt_budgets.get(agent_name, self.prompt_token_budget)
 
 
 class ChainConfigManager:
@@ -48,10 +83,12 @@ class ChainConfigManager:
                 "UnitTestAgent": ["TestGenerationAgent"],
                 "RefactoringAgent": ["UnitTestAgent"],
                 "CodeScanningAgent": ["UnitTestAgent", "RefactoringAgent"],
+                # 结构化会移动扫描正在读取的文件，并消费扫描结果消息，必须在扫描之后执行
                 "ProjectStructureAgent": ["CodeScanningAgent"]
             },
             max_stalls=3,
-            max_retries=2
+            max_retries=2,
+            max_concurrency=3
         )
         
         # 最小可用链路配置（4个Agent）
@@ -70,7 +107,8 @@ class ChainConfigManager:
                 "UnitTestAgent": ["TestGenerationAgent"]
             },
             max_stalls=2,
-            max_retries=1
+            max_retries=1,
+            instruction_mode="template"
         )
         
         # 快速原型链路配置（2个Agent）
@@ -85,7 +123,8 @@ class ChainConfigManager:
                 "FunctionWritingAgent": ["CodePlanningAgent"]
             },
             max_stalls=1,
-            max_retries=1
+            max_retries=1,
+            instruction_mode="template"
         )
         
         # 质量保证链路配置（3个Agent）
@@ -127,7 +166,10 @@ class ChainConfigManager:
             "agents": config.agents,
             "dependencies": config.dependencies,
             "max_stalls": config.max_stalls,
-            "max_retries": config.max_retries
+            "max_retries": config.max_retries,
+            "max_concurrency": config.max_concurrency,
+            "instruction_mode": config.instruction_mode,
+            "speculative_prefetch": config.speculative_prefetch
         }
     
     def print_chain_summary(self):
@@ -141,7 +183,7 @@ class ChainConfigManager:
             print(f"   描述: {info['description']}")
             print(f"   Agent数量: {info['agent_count']}")
             print(f"   流程: {' → '.join(info['agents'])}")
-            print(f"   配置: 最大停滞={info['max_stalls']}, 最大重试={info['max_retries']}")
+            print(f"   配置: 最大停滞={info['max_stalls']}, 最大重试={info['max_retries']}, 最大并发={info['max_concurrency']}, 指令模式={info['instruction_mode']}")
 
 
 # 全局链路配置管理器实例
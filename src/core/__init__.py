@@ -5,11 +5,14 @@
 from .data_structures import NodeState, TaskLedger, ProgressLedger
 from .orchestrator import GraphFlowOrchestrator
 from .path_resolver import IntelligentPathResolver
+from .checkpoint import CheckpointManager, CHECKPOINT_VERSION
 
 __all__ = [
     "NodeState",
     "TaskLedger", 
     "ProgressLedger",
     "GraphFlowOrchestrator",
-    "IntelligentPathResolver"
+    "IntelligentPathResolver",
+    "CheckpointManager",
+    "CHECKPOINT_VERSION"
 ]
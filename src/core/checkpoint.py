@@ -0,0 +1,91 @@
+"""
+工作流检查点
+
+在每个节点执行完成后持久化 TaskLedger / ProgressLedger 快照，
+使工作流在中途失败后能够从最后完成的节点继续执行，而不必重新规划。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..memory.memory_config import memory_config
+
+
+# 检查点格式版本，格式不兼容时递增
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointManager:
+    """检查点管理器 - 以 gzip 压缩的紧凑JSON保存工作流快照"""
+
+    def __init__(self, checkpoint_dir: Optional[str] = None):
+        """
+        初始化检查点管理器
+
+        Args:
+            checkpoint_dir: 检查点保存目录，默认使用 memory/checkpoints
+        """
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else memory_config.checkpoints_path
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_checkpoint_path(self, task: str, chain_name: str, task_id: Optional[str] = None) -> Path:
+        """
+        根据任务内容、链路名称和任务ID计算检查点文件路径
+
+        批量运行时内容相同但ID不同的任务使用各自的检查点；未指定ID时与之前的路径一致。
+        """
+        key_source = f"{chain_name}\n{task.strip()}"
+        if task_id:
+            key_source = f"{task_id}\n{key_source}"
+        task_key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:16]
+        return self.checkpoint_dir / f"{chain_name}_{task_key}.json.gz"
+
+    def save(self, task: str, chain_name: str, snapshot: Dict[str, Any], task_id: Optional[str] = None) -> Path:
+        """原子写入检查点"""
+        path = self.get_checkpoint_path(task, chain_name, task_id)
+        payload = {
+            "version": CHECKPOINT_VERSION,
+            "saved_at": datetime.now().isoformat(),
+            "task": task,
+            "task_id": task_id,
+            "chain_name": chain_name,
+            **snapshot
+        }
+
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"), default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, task: str, chain_name: str, task_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """加载检查点，不存在或版本不兼容时返回None"""
+        path = self.get_checkpoint_path(task, chain_name, task_id)
+        if not path.exists():
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取检查点失败 {path}: {e}")
+            return None
+
+        if payload.get("version") != CHECKPOINT_VERSION:
+            print(f"⚠️ 检查点版本不兼容 (期望 {CHECKPOINT_VERSION}, 实际 {payload.get('version')})，忽略")
+            return None
+
+        return payload
+
+    def delete(self, task: str, chain_name: str, task_id: Optional[str] = None) -> bool:
+        """删除检查点"""
+        path = self.get_checkpoint_path(task, chain_name, task_id)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
@@ -4,13 +4,19 @@
 包含系统中使用的主要数据结构：
 - NodeState: 节点执行状态枚举
 - TaskLedger: 任务账本，管理全局任务状态和计划
+- ExecutionRecord / ExecutionHistory: 有界、按节点索引的执行历史
 - ProgressLedger: 进度账本，管理执行进度和状态跟踪
 """
 
 import asyncio
-from dataclasses import dataclass, field
+from collections import deque
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+
+# 生成文件的默认输出目录
+DEFAULT_OUTPUT_DIR = "/Users/jabez/output"
 
 
 class NodeState(Enum):
@@ -19,6 +25,7 @@ class NodeState(Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    TIMED_OUT = "timed_out"
     RETRYING = "retrying"
 
 
@@ -43,7 +50,7 @@ class TaskLedger:
         """更新执行计划"""
         self.plan = new_plan
 
-    def set_project_config(self, project_name: str, main_file: str, test_file: str, base_dir: str = "/Users/jabez/output"):
+    def set_project_config(self, project_name: str, main_file: str, test_file: str, base_dir: str = DEFAULT_OUTPUT_DIR):
         """设置项目配置信息"""
         self.project_config = {
             "project_name": project_name,
@@ -57,37 +64,278 @@ class TaskLedger:
     def get_file_path(self, file_type: str) -> str:
         """获取文件路径"""
         if file_type == "main":
-            return self.project_config.get("main_file_path", "/Users/jabez/output/main.py")
+            return self.project_config.get("main_file_path", f"{DEFAULT_OUTPUT_DIR}/main.py")
         elif file_type == "test":
-            return self.project_config.get("test_file_path", "/Users/jabez/output/test_main.py")
+            return self.project_config.get("test_file_path", f"{DEFAULT_OUTPUT_DIR}/test_main.py")
         else:
-            return f"{self.project_config.get('base_dir', '/Users/jabez/output')}/{file_type}"
+            return f"{self.project_config.get('base_dir', DEFAULT_OUTPUT_DIR)}/{file_type}"
 
     def get_intelligent_path_resolver(self):
         """获取智能路径解析器"""
         from .path_resolver import IntelligentPathResolver
         return IntelligentPathResolver(self.project_config, self.facts, self.plan)
 
+    # 运行过程中动态挂载到账本上的属性，需要随检查点一起保存
+    DYNAMIC_ATTRIBUTES = ("error_history", "enhanced_contexts")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可JSON化的字典（用于检查点）"""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        for attr in self.DYNAMIC_ATTRIBUTES:
+            if hasattr(self, attr):
+                data[attr] = getattr(self, attr)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskLedger":
+        """从检查点字典恢复任务账本"""
+        field_names = {f.name for f in fields(cls)}
+        ledger = cls(**{key: value for key, value in data.items() if key in field_names})
+        for attr in cls.DYNAMIC_ATTRIBUTES:
+            if attr in data:
+                setattr(ledger, attr, data[attr])
+        return ledger
+
+
+class ExecutionRecord:
+    """单条执行历史记录，兼容原来的字典式访问"""
+    __slots__ = ("node", "state", "timestamp", "result")
+
+    def __init__(self, node: str, state: str, timestamp: float, result: Optional[Dict[str, Any]] = None):
+        self.node = node
+        self.state = state
+        self.timestamp = timestamp
+        self.result = result
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"node": self.node, "state": self.state, "timestamp": self.timestamp}
+        if self.result is not None:
+            data["result"] = self.result
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExecutionRecord":
+        return cls(data.get("node", "unknown"), data.get("state", ""), data.get("timestamp", 0.0), data.get("result"))
+
+
+class ExecutionHistory:
+    """
+    执行历史 - 全局环形缓冲区 + 按节点索引
+
+    全局历史只保留最近 retention 条，每个节点另外保留最近 per_node_retention 条，
+    失败次数和总轮次单独计数，长时间重试循环下内存保持平稳，按节点查询为常数时间。
+    """
+
+    def __init__(self, retention: int = 200, per_node_retention: int = 20):
+        self.retention = max(1, retention)
+        self.per_node_retention = max(1, per_node_retention)
+        self._records: deque = deque(maxlen=self.retention)
+        self._by_node: Dict[str, deque] = {}
+        self._failure_counts: Dict[str, int] = {}
+        self.total_count = 0
+
+    def append(self, record: ExecutionRecord):
+        """追加一条记录"""
+        self._records.append(record)
+        node_records = self._by_node.get(record.node)
+        if node_records is None:
+            node_records = self._by_node[record.node] = deque(maxlen=self.per_node_retention)
+        node_records.append(record)
+        if record.state in (NodeState.FAILED.value, NodeState.TIMED_OUT.value):
+            self._failure_counts[record.node] = self._failure_counts.get(record.node, 0) + 1
+        self.total_count += 1
+
+    def for_node(self, node_name: str) -> List[ExecutionRecord]:
+        """获取节点最近的执行记录"""
+        return list(self._by_node.get(node_name, ()))
+
+    def failure_count(self, node_name: str) -> int:
+        """获取节点累计失败（含超时）次数（不受保留条数影响）"""
+        return self._failure_counts.get(node_name, 0)
+
+    def recent(self, count: int) -> List[ExecutionRecord]:
+        """获取全局最近 count 条记录"""
+        if count <= 0:
+            return []
+        start = max(0, len(self._records) - count)
+        return [self._records[i] for i in range(start, len(self._records))]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[ExecutionRecord]:
+        return iter(self._records)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化（按节点索引中超出全局缓冲区的记录一并保存）"""
+        retained = {id(record) for record in self._records}
+        extra = [record.to_dict() for records in self._by_node.values()
+                 for record in records if id(record) not in retained]
+        return {
+            "records": [record.to_dict() for record in self._records],
+            "node_extra_records": sorted(extra, key=lambda item: item["timestamp"]),
+            "failure_counts": dict(self._failure_counts),
+            "total_count": self.total_count,
+            "retention": self.retention,
+            "per_node_retention": self.per_node_retention
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any, retention: Optional[int] = None,
+                  per_node_retention: Optional[int] = None) -> "ExecutionHistory":
+        """从序列化数据恢复，兼容旧检查点中的列表格式"""
+        if isinstance(data, list):
+            data = {"records": data}
+        history = cls(retention or data.get("retention", 200),
+                      per_node_retention or data.get("per_node_retention", 20))
+
+        extra = [ExecutionRecord.from_dict(item) for item in data.get("node_extra_records", [])]
+        records = [ExecutionRecord.from_dict(item) for item in data.get("records", [])]
+        for record in extra:
+            history._by_node.setdefault(record.node, deque(maxlen=history.per_node_retention)).append(record)
+        for record in records:
+            history.append(record)
+
+        if "failure_counts" in data:
+            history._failure_counts = dict(data["failure_counts"])
+        history.total_count = max(history.total_count, data.get("total_count", 0))
+        return history
+
+
+class NodeStateMap(dict):
+    """节点状态字典 - 维护按状态分组的索引，直接赋值也会同步更新"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._by_state: Dict[NodeState, Dict[str, None]] = {}
+        self.version = 0
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, node_name: str, state: NodeState):
+        previous = self.get(node_name)
+        if previous is not None:
+            self._by_state.get(previous, {}).pop(node_name, None)
+        super().__setitem__(node_name, state)
+        self._by_state.setdefault(state, {})[node_name] = None
+        self.version += 1
+
+    def __delitem__(self, node_name: str):
+        self._by_state.get(self[node_name], {}).pop(node_name, None)
+        super().__delitem__(node_name)
+        self.version += 1
+
+    def setdefault(self, node_name: str, state: NodeState = None) -> NodeState:
+        if node_name not in self:
+            self[node_name] = state
+        return self[node_name]
+
+    def update(self, *args, **kwargs):
+        for node_name, state in dict(*args, **kwargs).items():
+            self[node_name] = state
+
+    def pop(self, node_name: str, *default):
+        if node_name in self:
+            state = self[node_name]
+            del self[node_name]
+            return state
+        if default:
+            return default[0]
+        raise KeyError(node_name)
+
+    def clear(self):
+        super().clear()
+        self._by_state.clear()
+        self.version += 1
+
+    def nodes_in_state(self, state: NodeState) -> List[str]:
+        """获取处于指定状态的节点（按进入该状态的顺序）"""
+        return list(self._by_state.get(state, ()))
+
+    def count_in_state(self, state: NodeState) -> int:
+        """获取处于指定状态的节点数量"""
+        return len(self._by_state.get(state, ()))
+
 
 @dataclass
 class ProgressLedger:
     """进度账本 - 管理执行进度和状态跟踪"""
-    node_states: Dict[str, NodeState] = field(default_factory=dict)
-    execution_history: List[Dict[str, Any]] = field(default_factory=list)
+    node_states: NodeStateMap = field(default_factory=NodeStateMap)
+    execution_history: ExecutionHistory = field(default_factory=ExecutionHistory)
     current_active_nodes: Set[str] = field(default_factory=set)
     stall_count: int = 0
     retry_counts: Dict[str, int] = field(default_factory=dict)
+    node_instructions: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not isinstance(self.node_states, NodeStateMap):
+            self.node_states = NodeStateMap(self.node_states)
+        if not isinstance(self.execution_history, ExecutionHistory):
+            self.execution_history = ExecutionHistory.from_dict(self.execution_history)
 
-    def update_node_state(self, node_name: str, state: NodeState):
+    def update_node_state(self, node_name: str, state: NodeState, result: Optional[Dict[str, Any]] = None):
         """更新节点状态并记录历史"""
         self.node_states[node_name] = state
-        self.execution_history.append({
-            "node": node_name,
-            "state": state.value,
-            "timestamp": asyncio.get_event_loop().time()
-        })
+        self.execution_history.append(ExecutionRecord(
+            node_name, state.value, asyncio.get_event_loop().time(), result
+        ))
+
+    def get_node_history(self, node_name: str) -> List[ExecutionRecord]:
+        """获取节点最近的执行历史"""
+        return self.execution_history.for_node(node_name)
+
+    def get_nodes_in_state(self, state: NodeState) -> List[str]:
+        """获取处于指定状态的节点"""
+        return self.node_states.nodes_in_state(state)
+
+    def activate_node(self, node_name: str, instruction: str):
+        """
+        标记节点开始执行并保存其执行指令
+
+        按节点分别记录，并行批次中的节点互不覆盖对方的活跃状态和指令
+        """
+        self.current_active_nodes.add(node_name)
+        self.node_instructions[node_name] = instruction
+
+    def deactivate_node(self, node_name: str):
+        """节点执行结束（无论成败）后移出活跃集合"""
+        self.current_active_nodes.discard(node_name)
 
     def increment_retry(self, node_name: str) -> int:
         """增加重试计数并返回当前计数"""
         self.retry_counts[node_name] = self.retry_counts.get(node_name, 0) + 1
         return self.retry_counts[node_name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可JSON化的字典（用于检查点），不包含瞬时的活跃节点集合"""
+        return {
+            "node_states": {node: state.value for node, state in self.node_states.items()},
+            "execution_history": self.execution_history.to_dict(),
+            "stall_count": self.stall_count,
+            "retry_counts": dict(self.retry_counts),
+            "node_instructions": dict(self.node_instructions)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], history_retention: Optional[int] = None) -> "ProgressLedger":
+        """从检查点字典恢复进度账本，中断时仍在执行的节点重置为未开始"""
+        ledger = cls(
+            execution_history=ExecutionHistory.from_dict(data.get("execution_history", []), history_retention),
+            stall_count=data.get("stall_count", 0),
+            retry_counts=dict(data.get("retry_counts", {})),
+            node_instructions=dict(data.get("node_instructions", {}))
+        )
+        for node, value in data.get("node_states", {}).items():
+            state = NodeState(value)
+            if state == NodeState.IN_PROGRESS:
+                state = NodeState.NOT_STARTED
+            ledger.node_states[node] = state
+        return ledger
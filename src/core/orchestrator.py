@@ -8,15 +8,20 @@
 import asyncio
 import json
 import time
+from dataclasses import asdict
 from typing import Any, Dict, List, Optional, Set, Sequence
 from autogen_agentchat.base import ChatAgent, Response
 from autogen_agentchat.messages import TextMessage, StopMessage
+from autogen_core import CancellationToken
 from autogen_core.models import UserMessage
 
-from .data_structures import NodeState, TaskLedger, ProgressLedger
+from .data_structures import NodeState, TaskLedger, ProgressLedger, ExecutionHistory, DEFAULT_OUTPUT_DIR
 from .orchestrator_helpers import OrchestratorHelpers
+from .checkpoint import CheckpointManager
 from ..utils.file_naming import parse_task_and_generate_config
 from ..utils.workflow_logger import WorkflowLogger
+from ..utils.llm_cache import LLMCache, CachedModelClient
+from ..utils.model_timeout import TimeoutModelClient
 from ..memory import (
     execution_log_manager,
     agent_state_manager,
@@ -24,7 +29,9 @@ from ..memory import (
     initialize_memory_system,
     cleanup_memory_system
 )
-from ..memory.unit_test_memory_manager import unit_test_memory_manager
+from ..memory.agent_communication_memory import AgentContext, AgentCommunicationMemory
+from ..memory.unit_test_memory_manager import unit_test_memory_manager, UnitTestMemoryManager
+from ..memory.test_report_parser import find_report_paths
 
 
 class GraphFlowOrchestrator:
@@ -38,7 +45,14 @@ class GraphFlowOrchestrator:
     4. 执行结果分析和错误处理
     """
 
-    def __init__(self, graph, participants: List[ChatAgent], model_client, max_stalls: int = 3, max_retries: int = 2, chain_name: str = "standard"):
+    # 仅由失败路由触发的条件节点（如测试失败后的重构），不参与DAG就绪集合计算
+    CONDITIONAL_NODES = {"RefactoringAgent"}
+
+    def __init__(self, graph, participants: List[ChatAgent], model_client, max_stalls: int = 3, max_retries: int = 2, chain_name: str = "standard", max_concurrency: Optional[int] = None, llm_cache: Optional[LLMCache] = None, checkpoint_dir: Optional[str] = None,
+                 output_dir: str = DEFAULT_OUTPUT_DIR, communication_memory: Optional[AgentCommunicationMemory] = None,
+                 unit_test_memory: Optional[UnitTestMemoryManager] = None, owns_memory_system: bool = True,
+                 speculative_prefetch: Optional[bool] = None, llm_call_timeout: Optional[float] = None,
+                 task_id: Optional[str] = None):
         """
         初始化编排器
 
@@ -49,6 +63,16 @@ class GraphFlowOrchestrator:
             max_stalls: 最大停滞次数
             max_retries: 最大重试次数
             chain_name: 链路名称，用于配置特定的依赖关系
+            max_concurrency: 同一轮内并行执行的就绪节点上限，为None时使用链路配置
+            llm_cache: 编排器自身LLM调用（规划、指令生成、进度分析）使用的响应缓存，为None时不缓存
+            checkpoint_dir: 检查点保存目录，为None时使用 memory/checkpoints
+            output_dir: 生成文件和日志的输出目录
+            communication_memory: Agent通信Memory，为None时使用全局实例
+            unit_test_memory: UnitTest专用Memory，为None时使用全局实例
+            owns_memory_system: 是否由本编排器负责初始化后清理Memory系统（多个编排器共享时设为False）
+            speculative_prefetch: 是否在当前节点执行时预取下一节点的指令，为None时使用链路配置
+            llm_call_timeout: 编排器单次LLM调用超时（秒），为None时使用链路配置，0表示不限制
+            task_id: 任务ID（批量运行时区分内容相同的任务的检查点）
         """
         self.graph = graph
         self.participants = {agent.name: agent for agent in participants}
@@ -57,15 +81,51 @@ class GraphFlowOrchestrator:
         self.max_retries = max_retries
         self.chain_name = chain_name  # 添加链路名称
 
+        # 链路配置（用于依赖关系DAG和并发上限）
+        self.chain_config = self._load_chain_config()
+        if max_concurrency is None:
+            max_concurrency = self.chain_config.max_concurrency if self.chain_config else 1
+        self.max_concurrency = max(1, max_concurrency)
+        self.instruction_mode = self.chain_config.instruction_mode if self.chain_config else "llm"
+
+        # 编排器自身的LLM调用：先加单次调用超时，再加响应缓存（缓存命中不受超时影响）
+        if llm_call_timeout is None:
+            llm_call_timeout = self.chain_config.llm_call_timeout_seconds if self.chain_config else None
+        if llm_call_timeout:
+            self.model_client = TimeoutModelClient(self.model_client, llm_call_timeout)
+        if llm_cache is not None:
+            self.model_client = CachedModelClient(self.model_client, llm_cache)
+        self.history_retention = self.chain_config.history_retention if self.chain_config else 200
+        if speculative_prefetch is None:
+            speculative_prefetch = self.chain_config.speculative_prefetch if self.chain_config else False
+        self.speculative_prefetch = speculative_prefetch
+
+        # 推测预取状态：当前节点执行期间为下一节点生成的指令
+        self._speculation: Optional[Dict[str, Any]] = None
+        self.speculation_stats = {"started": 0, "used": 0, "discarded": 0}
+
         # MagenticOne 风格的状态管理
         self.task_ledger = TaskLedger()
-        self.progress_ledger = ProgressLedger()
+        self.progress_ledger = ProgressLedger(execution_history=ExecutionHistory(self.history_retention))
+
+        # 每个节点最近一次提示词的分段token使用记录
+        self.prompt_token_usage: Dict[str, Dict[str, Any]] = {}
 
         # 智能路径解析器（延迟初始化）
         self.path_resolver = None
 
+        # 输出目录和Memory实例（批量运行时每个任务独立）
+        self.output_dir = output_dir
+        self.communication_memory = communication_memory or agent_communication_memory
+        self.unit_test_memory = unit_test_memory or unit_test_memory_manager
+        self.owns_memory_system = owns_memory_system
+        self.task_id = task_id
+
         # 工作流日志记录器
-        self.workflow_logger = WorkflowLogger()
+        self.workflow_logger = WorkflowLogger(log_dir=f"{output_dir}/logs", output_dir=output_dir)
+
+        # 检查点管理器（每个节点完成后保存快照，支持断点续跑）
+        self.checkpoint_manager = CheckpointManager(checkpoint_dir)
 
         # Memory系统标志
         self.memory_initialized = False
@@ -85,10 +145,16 @@ class GraphFlowOrchestrator:
     async def _initialize_memory_system(self):
         """初始化Memory系统"""
         if not self.memory_initialized:
-            success = await initialize_memory_system()
+            if self.owns_memory_system:
+                success = await initialize_memory_system()
+            else:
+                # 共享的Memory系统已由调用方（如批量运行）初始化，只初始化本编排器自己的实例，
+                # 不重复执行溢出重放、保留策略等全局初始化
+                await self.communication_memory.initialize()
+                success = True
             if success:
                 # 初始化UnitTest专用Memory
-                await unit_test_memory_manager.initialize()
+                await self.unit_test_memory.initialize()
 
                 self.memory_initialized = True
 
@@ -99,16 +165,20 @@ class GraphFlowOrchestrator:
             else:
                 print("⚠️ Memory系统初始化失败，将继续使用基础功能")
 
-    async def _configure_agent_dependencies(self):
-        """配置Agent依赖关系 - 支持不同链路配置"""
+    def _load_chain_config(self):
+        """加载当前链路配置，失败时返回None"""
         try:
-            # 尝试从链路配置获取依赖关系
             from ..config.chain_config import get_chain_config
-            chain_config = get_chain_config(self.chain_name)
-            agent_dependencies = chain_config.dependencies
-            print(f"🔗 使用 {self.chain_name} 链路的依赖配置")
+            return get_chain_config(self.chain_name)
         except Exception as e:
-            print(f"⚠️ 无法获取链路配置，使用默认依赖关系: {e}")
+            print(f"⚠️ 无法获取链路配置 {self.chain_name}: {e}")
+            return None
+
+    def _get_agent_dependencies(self) -> Dict[str, List[str]]:
+        """获取当前工作流中实际存在的Agent依赖关系（DAG）"""
+        if self.chain_config:
+            agent_dependencies = self.chain_config.dependencies
+        else:
             # 回退到默认的标准链路依赖关系
             agent_dependencies = {
                 "FunctionWritingAgent": ["CodePlanningAgent"],
@@ -127,9 +197,29 @@ class GraphFlowOrchestrator:
                 filtered_deps = [dep for dep in deps if dep in self.participants]
                 if filtered_deps:
                     filtered_dependencies[agent] = filtered_deps
+        return filtered_dependencies
+
+    def _get_flow_sequence(self) -> List[str]:
+        """获取当前链路的Agent顺序"""
+        if self.chain_config:
+            return self.chain_config.agents
+        # 回退到默认的标准链路顺序
+        return [
+            "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent",
+            "UnitTestAgent", "CodeScanningAgent", "ProjectStructureAgent"
+        ]
+
+    async def _configure_agent_dependencies(self):
+        """配置Agent依赖关系 - 支持不同链路配置"""
+        if self.chain_config:
+            print(f"🔗 使用 {self.chain_name} 链路的依赖配置")
+        else:
+            print(f"⚠️ 无法获取链路配置，使用默认依赖关系")
+
+        filtered_dependencies = self._get_agent_dependencies()
 
         # 设置到通信Memory中
-        agent_communication_memory.agent_dependencies = filtered_dependencies
+        self.communication_memory.agent_dependencies = filtered_dependencies
 
         print(f"🔗 配置Agent依赖关系: {len(filtered_dependencies)} 个依赖链")
         for agent, deps in filtered_dependencies.items():
@@ -137,20 +227,19 @@ class GraphFlowOrchestrator:
 
     async def _cleanup_memory_system(self):
         """清理Memory系统"""
-        if self.memory_initialized:
+        if self.memory_initialized and self.owns_memory_system:
             await cleanup_memory_system()
             print("🧹 Orchestrator Memory系统清理完成")
 
     def _get_current_workflow_stage(self) -> str:
         """获取当前工作流阶段"""
-        completed_nodes = [name for name, state in self.progress_ledger.node_states.items()
-                          if state == NodeState.COMPLETED]
+        completed_count = self.progress_ledger.node_states.count_in_state(NodeState.COMPLETED)
 
-        if not completed_nodes:
+        if not completed_count:
             return "initial"
-        elif len(completed_nodes) < len(self.participants) // 2:
+        elif completed_count < len(self.participants) // 2:
             return "early"
-        elif len(completed_nodes) < len(self.participants):
+        elif completed_count < len(self.participants):
             return "middle"
         else:
             return "final"
@@ -171,12 +260,13 @@ class GraphFlowOrchestrator:
     # 外层循环：任务规划和分解
     # ================================
 
-    async def run_stream(self, task: str):
+    async def run_stream(self, task: str, resume: bool = False):
         """
         运行高级调度的工作流
 
         Args:
             task: 要执行的任务描述
+            resume: 是否从该任务最近一次未完成运行的检查点继续执行
 
         Yields:
             执行过程中的事件和结果
@@ -187,11 +277,16 @@ class GraphFlowOrchestrator:
         self.task_ledger.original_task = task
 
         try:
-            # 外层循环：任务分解和计划制定
-            await self._outer_loop_planning(task)
+            start_nodes = None
+            if resume:
+                start_nodes = self._resume_from_checkpoint(task)
+
+            if start_nodes is None:
+                # 外层循环：任务分解和计划制定
+                await self._outer_loop_planning(task)
 
             # 内层循环：智能执行和监控
-            async for event in self._inner_loop_execution():
+            async for event in self._inner_loop_execution(start_nodes):
                 yield event
 
         finally:
@@ -219,7 +314,8 @@ class GraphFlowOrchestrator:
         self.task_ledger.set_project_config(
             project_config["project_name"],
             project_config["main_file"],
-            project_config["test_file"]
+            project_config["test_file"],
+            base_dir=self.output_dir
         )
 
         # 记录任务和项目配置
@@ -286,6 +382,67 @@ class GraphFlowOrchestrator:
 
         self.workflow_logger.log_event("success", "执行计划制定完成，开始多Agent协作")
 
+    # ================================
+    # 检查点：保存和恢复
+    # ================================
+
+    def _save_checkpoint(self, pending_nodes: List[str], finished: bool = False):
+        """保存当前账本快照和待执行节点"""
+        try:
+            snapshot = {
+                "finished": finished,
+                "pending_nodes": list(pending_nodes),
+                "task_ledger": self.task_ledger.to_dict(),
+                "progress_ledger": self.progress_ledger.to_dict(),
+                "agent_contexts": {
+                    name: asdict(context)
+                    for name, context in self.communication_memory.agent_contexts.items()
+                    if name in self.participants
+                }
+            }
+            self.checkpoint_manager.save(self.task_ledger.original_task, self.chain_name, snapshot, task_id=self.task_id)
+        except Exception as e:
+            print(f"⚠️ 保存检查点失败: {e}")
+
+    def _resume_from_checkpoint(self, task: str) -> Optional[List[str]]:
+        """
+        从检查点恢复账本状态
+
+        Returns:
+            恢复后待执行的节点列表；没有可用检查点时返回None
+        """
+        snapshot = self.checkpoint_manager.load(task, self.chain_name, task_id=self.task_id)
+        if not snapshot or snapshot.get("finished") or not snapshot.get("task_ledger", {}).get("plan"):
+            print("📭 未找到可恢复的检查点，从头开始执行")
+            return None
+
+        self.task_ledger = TaskLedger.from_dict(snapshot["task_ledger"])
+        self.progress_ledger = ProgressLedger.from_dict(snapshot["progress_ledger"], self.history_retention)
+        self.path_resolver = None
+
+        # 新加入的参与者补齐初始状态，Agent能力以当前参与者为准
+        for node_name in self.participants.keys():
+            self.progress_ledger.node_states.setdefault(node_name, NodeState.NOT_STARTED)
+        self._analyze_agent_capabilities()
+
+        for name, context in snapshot.get("agent_contexts", {}).items():
+            self.communication_memory.agent_contexts[name] = AgentContext(**context)
+
+        pending_nodes = [node for node in snapshot.get("pending_nodes", []) if node in self.participants]
+        completed_nodes = self.progress_ledger.get_nodes_in_state(NodeState.COMPLETED)
+
+        self.workflow_logger.log_task_start(task, {
+            "project_name": self.task_ledger.project_config.get("project_name", "未设置"),
+            "main_file_path": self.task_ledger.get_file_path('main'),
+            "test_file_path": self.task_ledger.get_file_path('test')
+        })
+        self.workflow_logger.log_event(
+            "info",
+            f"从检查点恢复 (保存于 {snapshot.get('saved_at')})，已完成: {', '.join(completed_nodes) or '无'}，"
+            f"继续执行: {', '.join(pending_nodes) or '无'}"
+        )
+        return pending_nodes
+
     def _format_team_description(self) -> str:
         """格式化团队描述，用于LLM分析"""
         descriptions = []
@@ -297,7 +454,7 @@ class GraphFlowOrchestrator:
     # 内层循环：智能执行和监控
     # ================================
 
-    async def _inner_loop_execution(self):
+    async def _inner_loop_execution(self, start_nodes: Optional[List[str]] = None):
         """
         内层循环：智能执行和监控
 
@@ -306,46 +463,65 @@ class GraphFlowOrchestrator:
         2. 智能选择下一个执行节点
         3. 监控执行结果
         4. 处理错误和重试逻辑
+
+        Args:
+            start_nodes: 起始节点（从检查点恢复时传入），为None时从图的源节点开始
         """
         self.workflow_logger.log_event("info", "开始多Agent协作执行")
 
         # 获取起始节点
-        current_nodes = self._get_source_nodes()
+        current_nodes = start_nodes if start_nodes is not None else self._get_source_nodes()
         execution_round = 0
 
         while current_nodes and self.progress_ledger.stall_count < self.max_stalls:
             execution_round += 1
 
-            # 智能选择下一个要执行的节点
-            next_node = await self._intelligent_node_selection(current_nodes)
+            # 保存检查点：此时所有已完成节点的结果都已写入账本
+            self._save_checkpoint(current_nodes)
 
-            if not next_node:
-                break
+            # 智能选择本轮要执行的节点（就绪节点可并行执行）
+            batch = await self._select_execution_batch(current_nodes)
 
-            # 记录Agent开始执行
-            agent_description = self.task_ledger.agent_capabilities.get(next_node, "未知功能")
-            self.workflow_logger.log_agent_start(next_node, agent_description)
+            if not batch:
+                break
 
-            # 执行节点并监控
-            execution_result = await self._execute_node_with_monitoring(next_node)
+            # 超出并发上限的就绪节点留待下一轮
+            deferred_nodes = [node for node in current_nodes if node not in batch]
 
-            # 记录Agent执行完成
-            success = execution_result.get("success", False)
-            output = execution_result.get("analysis", {}).get("message_content", "")
-            duration = execution_result.get("execution_time", 0)
+            # 记录Agent开始执行
+            for next_node in batch:
+                agent_description = self.task_ledger.agent_capabilities.get(next_node, "未知功能")
+                self.workflow_logger.log_agent_start(next_node, agent_description)
 
-            self.workflow_logger.log_agent_complete(next_node, success, output, duration)
+            # 串行执行时预取下一节点的指令，与当前节点的执行重叠
+            if len(batch) == 1:
+                await self._start_speculative_prefetch(batch[0])
 
-            # 检查是否需要重新选择 Agent
-            if execution_result.get("needs_reselection", False):
-                self.workflow_logger.log_event("warning", f"Agent {next_node} 需要重新选择")
-                alternative_nodes = await self._find_alternative_nodes(next_node)
-                if alternative_nodes:
-                    current_nodes = alternative_nodes
-                    self.workflow_logger.log_event("info", f"选择替代节点: {current_nodes}")
-                    continue
-                else:
-                    self.workflow_logger.log_event("warning", "无替代节点，继续原流程")
+            # 执行节点并监控
+            execution_results = await self._execute_batch(batch)
+
+            reselected_nodes = []
+            for next_node, execution_result in zip(batch, execution_results):
+                # 记录Agent执行完成
+                success = execution_result.get("success", False)
+                output = execution_result.get("analysis", {}).get("message_content", "")
+                duration = execution_result.get("execution_time", 0)
+
+                self.workflow_logger.log_agent_complete(next_node, success, output, duration)
+
+                # 检查是否需要重新选择 Agent
+                if execution_result.get("needs_reselection", False):
+                    self.workflow_logger.log_event("warning", f"Agent {next_node} 需要重新选择")
+                    alternative_nodes = await self._find_alternative_nodes(next_node)
+                    if alternative_nodes:
+                        reselected_nodes.extend(alternative_nodes)
+                        self.workflow_logger.log_event("info", f"选择替代节点: {alternative_nodes}")
+                    else:
+                        self.workflow_logger.log_event("warning", "无替代节点，继续原流程")
+
+            if reselected_nodes:
+                current_nodes = self._merge_candidate_nodes(reselected_nodes, deferred_nodes)
+                continue
 
             # 检查是否需要重新规划
             if await self._should_replan():
@@ -355,13 +531,17 @@ class GraphFlowOrchestrator:
                 continue
 
             # 获取下一批可执行节点
-            current_nodes = await self._get_next_executable_nodes(next_node, execution_result)
+            next_nodes = []
+            for next_node, execution_result in zip(batch, execution_results):
+                next_nodes.extend(await self._get_next_executable_nodes(next_node, execution_result))
+            current_nodes = self._merge_candidate_nodes(next_nodes, deferred_nodes)
 
             # 产出执行事件
-            yield TextMessage(
-                source=next_node,
-                content=f"节点 {next_node} 执行完成"
-            )
+            for next_node in batch:
+                yield TextMessage(
+                    source=next_node,
+                    content=f"节点 {next_node} 执行完成"
+                )
 
         # 记录工作流完成
         completed_agents = len([a for a in self.workflow_logger.workflow_data["agents"] if a["status"] == "completed"])
@@ -375,15 +555,185 @@ class GraphFlowOrchestrator:
             "success_rate": completed_agents / total_agents if total_agents > 0 else 0
         }
 
+        self._discard_speculation()
+        if self.speculation_stats["started"]:
+            summary["speculation"] = dict(self.speculation_stats)
+
         self.workflow_logger.log_workflow_complete(success, summary)
 
+        # 仅当所有节点都已处理完（而非因停滞退出）时标记检查点为完成，停滞退出仍可续跑
+        self._save_checkpoint(current_nodes, finished=not current_nodes)
+
         # 生成最终结果
         yield await self._generate_final_result()
 
     def _get_source_nodes(self) -> List[str]:
         """获取图的源节点（入度为0的节点）"""
-        # 简化实现：返回第一个节点作为起始点
-        return ["CodePlanningAgent"]
+        dependencies = self._get_agent_dependencies()
+        source_nodes = [
+            node for node in self._get_flow_sequence()
+            if node in self.participants
+            and node not in self.CONDITIONAL_NODES
+            and not dependencies.get(node)
+        ]
+        return source_nodes or ["CodePlanningAgent"]
+
+    def _is_dependency_satisfied(self, dependency: str, current_node: Optional[str] = None) -> bool:
+        """判断单个依赖是否满足"""
+        state = self.progress_ledger.node_states.get(dependency, NodeState.NOT_STARTED)
+        if state == NodeState.COMPLETED:
+            return True
+        # 刚执行完（即便重试耗尽）的节点允许流程继续推进，与原线性流程一致
+        if dependency == current_node:
+            return True
+        # 条件节点未被触发时视为满足
+        return dependency in self.CONDITIONAL_NODES and state == NodeState.NOT_STARTED
+
+    def _compute_ready_nodes(self, current_node: Optional[str] = None) -> List[str]:
+        """
+        根据链路依赖关系（DAG）计算就绪节点集合
+
+        Args:
+            current_node: 刚执行完成的节点，其后继即使在其失败时也允许推进
+
+        Returns:
+            按链路顺序排列的、所有依赖均已满足且待执行的节点列表
+        """
+        dependencies = self._get_agent_dependencies()
+        ready_nodes = []
+        for node in self._get_flow_sequence():
+            if node not in self.participants or node in self.CONDITIONAL_NODES or node == current_node:
+                continue
+            node_deps = dependencies.get(node, [])
+            state = self.progress_ledger.node_states.get(node)
+            # 失败（含超时）的直接后继在其前置节点重新执行后允许再次进入，与原线性流程一致
+            if state != NodeState.NOT_STARTED and not (state in (NodeState.FAILED, NodeState.TIMED_OUT)
+                                                       and current_node in node_deps):
+                continue
+            if all(self._is_dependency_satisfied(dep, current_node) for dep in node_deps):
+                ready_nodes.append(node)
+        return ready_nodes
+
+    def _merge_candidate_nodes(self, next_nodes: List[str], deferred_nodes: List[str]) -> List[str]:
+        """合并下一轮候选节点，去重并保留顺序；延后的节点仅在仍未执行时保留"""
+        still_pending = [
+            node for node in deferred_nodes
+            if self.progress_ledger.node_states.get(node) == NodeState.NOT_STARTED
+        ]
+        return list(dict.fromkeys(next_nodes + still_pending))
+
+    async def _select_execution_batch(self, candidate_nodes: List[str]) -> List[str]:
+        """
+        选择本轮要执行的节点批次
+
+        串行模式（max_concurrency=1）或只有一个候选时沿用智能节点选择；
+        并行模式下所有候选均来自DAG就绪集合，按并发上限截取并并发生成各自的指令。
+        """
+        if self.max_concurrency <= 1 or len(candidate_nodes) <= 1:
+            selected_node = await self._intelligent_node_selection(candidate_nodes)
+            return [selected_node] if selected_node else []
+
+        batch = [node for node in candidate_nodes if node in self.participants][:self.max_concurrency]
+        if not batch:
+            return []
+
+        instructions = await asyncio.gather(*[
+            self._generate_specific_instruction(node) for node in batch
+        ])
+
+        for node, instruction in zip(batch, instructions):
+            print(f"📋 [{node}] 执行指令: {instruction}")
+            self.progress_ledger.activate_node(node, instruction)
+
+        self.workflow_logger.log_event("progress", f"并行执行就绪节点: {', '.join(batch)}")
+        return batch
+
+    def _predict_next_node(self, running_node: str) -> Optional[str]:
+        """预测节点成功后唯一的后继节点，存在多个或没有后继时返回None"""
+        ready_nodes = self._compute_ready_nodes(running_node)
+        return ready_nodes[0] if len(ready_nodes) == 1 else None
+
+    async def _start_speculative_prefetch(self, running_node: str):
+        """
+        在节点执行期间推测生成下一节点的指令
+
+        假定当前节点会成功完成，立即开始为预测的后继节点调用LLM生成指令；
+        当前节点失败、实际后继不同或依赖上下文发生变化时丢弃预取结果。
+        模板指令模式下首次执行无需LLM调用，不做预取。
+        """
+        self._discard_speculation()
+        if not self.speculative_prefetch or self.instruction_mode == "template":
+            return
+
+        predicted_node = self._predict_next_node(running_node)
+        if predicted_node is None:
+            return
+
+        context = await OrchestratorHelpers.build_instruction_context(
+            self, predicted_node, assume_completed=running_node
+        )
+        self._speculation = {
+            "node": predicted_node,
+            "after": running_node,
+            "signature": OrchestratorHelpers.instruction_context_signature(self, context),
+            "task": asyncio.create_task(
+                OrchestratorHelpers.generate_specific_instruction(self, predicted_node, context)
+            )
+        }
+        self.speculation_stats["started"] += 1
+        print(f"🔮 预取 {predicted_node} 的执行指令（与 {running_node} 并行）")
+
+    async def _take_speculative_instruction(self, node_name: str) -> Optional[str]:
+        """取出仍然有效的预取指令，无效时丢弃并返回None"""
+        speculation = self._speculation
+        if speculation is None:
+            return None
+        self._speculation = None
+
+        previous_state = self.progress_ledger.node_states.get(speculation["after"])
+        if speculation["node"] != node_name or previous_state != NodeState.COMPLETED:
+            self._cancel_speculation(speculation)
+            return None
+
+        # 当前节点的结果可能改变了依赖上下文（如生成了新文件），此时预取的指令已过期
+        context = await OrchestratorHelpers.build_instruction_context(self, node_name)
+        if OrchestratorHelpers.instruction_context_signature(self, context) != speculation["signature"]:
+            self._cancel_speculation(speculation)
+            return None
+
+        try:
+            instruction = await speculation["task"]
+        except Exception as e:
+            print(f"⚠️ 预取指令失败，重新生成: {e}")
+            self.speculation_stats["discarded"] += 1
+            return None
+
+        self.speculation_stats["used"] += 1
+        print(f"🔮 使用预取的 {node_name} 执行指令")
+        return instruction
+
+    def _discard_speculation(self):
+        """丢弃尚未使用的预取结果"""
+        if self._speculation is not None:
+            self._cancel_speculation(self._speculation)
+            self._speculation = None
+
+    def _cancel_speculation(self, speculation: Dict[str, Any]):
+        """取消预取任务并计入丢弃次数"""
+        task = speculation["task"]
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()  # 取回异常，避免未处理异常警告
+        self.speculation_stats["discarded"] += 1
+
+    async def _execute_batch(self, batch: List[str]) -> List[Dict[str, Any]]:
+        """执行一批节点，多个节点时并发等待各自的LLM/工具调用"""
+        if len(batch) == 1:
+            return [await self._execute_node_with_monitoring(batch[0])]
+        return list(await asyncio.gather(*[
+            self._execute_node_with_monitoring(node) for node in batch
+        ]))
 
     # ================================
     # 智能节点选择和分析
@@ -405,14 +755,13 @@ class GraphFlowOrchestrator:
         # 如果只有一个候选，使用进度账本分析生成具体指令
         if len(candidate_nodes) == 1:
             selected_node = candidate_nodes[0]
-            instruction = await self._generate_specific_instruction(selected_node)
+            instruction = await self._take_speculative_instruction(selected_node)
+            if instruction is None:
+                instruction = await self._generate_specific_instruction(selected_node)
             print(f"📋 执行指令: {instruction}")
 
             # 存储指令供后续使用
-            self.progress_ledger.current_active_nodes = {selected_node}
-            if not hasattr(self.progress_ledger, 'node_instructions'):
-                self.progress_ledger.node_instructions = {}
-            self.progress_ledger.node_instructions[selected_node] = instruction
+            self.progress_ledger.activate_node(selected_node, instruction)
 
             return selected_node
 
@@ -427,10 +776,7 @@ class GraphFlowOrchestrator:
             print(f"📋 执行指令: {instruction}")
 
             # 存储指令
-            self.progress_ledger.current_active_nodes = {selected_node}
-            if not hasattr(self.progress_ledger, 'node_instructions'):
-                self.progress_ledger.node_instructions = {}
-            self.progress_ledger.node_instructions[selected_node] = instruction
+            self.progress_ledger.activate_node(selected_node, instruction)
 
             return selected_node
         else:
@@ -532,7 +878,7 @@ class GraphFlowOrchestrator:
         history_lines = []
 
         # 获取最近的执行历史
-        recent_history = self.progress_ledger.execution_history[-5:]  # 最近5次
+        recent_history = self.progress_ledger.execution_history.recent(5)  # 最近5次
 
         for item in recent_history:
             node = item.get("node", "unknown")
@@ -574,13 +920,22 @@ class GraphFlowOrchestrator:
             # 构建增强的提示
             enhanced_prompt = await self._build_enhanced_prompt(node_name)
 
-            # 执行 Agent
+            # 执行 Agent（带墙钟超时，超时后通过 CancellationToken 取消进行中的LLM/工具调用）
             start_time = time.time()
+            agent_timeout = self._get_agent_timeout(node_name)
+            cancellation_token = CancellationToken()
 
-            response = await agent.on_messages(
-                [TextMessage(source="user", content=enhanced_prompt)],
-                cancellation_token=None
-            )
+            try:
+                response = await asyncio.wait_for(
+                    agent.on_messages(
+                        [TextMessage(source="user", content=enhanced_prompt)],
+                        cancellation_token=cancellation_token
+                    ),
+                    timeout=agent_timeout or None
+                )
+            except asyncio.TimeoutError:
+                cancellation_token.cancel()
+                return await self._handle_node_timeout(node_name, agent_timeout, time.time() - start_time)
 
             execution_time = time.time() - start_time
 
@@ -621,7 +976,8 @@ class GraphFlowOrchestrator:
                         duration=execution_time,
                         context={
                             "stall_count": self.progress_ledger.stall_count,
-                            "workflow_stage": self._get_current_workflow_stage()
+                            "workflow_stage": self._get_current_workflow_stage(),
+                            "prompt_tokens": self.prompt_token_usage.get(node_name, {}).get("used_tokens", 0)
                         }
                     )
 
@@ -665,6 +1021,43 @@ class GraphFlowOrchestrator:
                 "node": node_name,
                 "execution_time": 0
             }
+        finally:
+            self.progress_ledger.deactivate_node(node_name)
+
+    def _get_agent_timeout(self, node_name: str) -> Optional[float]:
+        """获取Agent执行超时（秒），0或None表示不限制"""
+        if self.chain_config is None:
+            return None
+        return self.chain_config.get_agent_timeout(node_name)
+
+    async def _handle_node_timeout(self, node_name: str, timeout: float, execution_time: float) -> Dict[str, Any]:
+        """
+        记录节点超时：标记为 TIMED_OUT，其余与普通执行失败一致
+
+        停滞计数、重试判断和替代节点选择都走普通失败的同一路径，超时不额外计入重试次数
+        """
+        self.progress_ledger.update_node_state(node_name, NodeState.TIMED_OUT)
+        self.progress_ledger.stall_count += 1
+
+        message = f"{node_name} 执行超过 {timeout} 秒未完成，已取消"
+        print(f"⏱️ {message}")
+        self.workflow_logger.log_event("warning", message)
+
+        result_analysis = {
+            "success": False,
+            "failure_reasons": [f"执行超时（{timeout}秒）"],
+            "message_content": "",
+            "has_completion_marker": False
+        }
+        return {
+            "success": False,
+            "analysis": result_analysis,
+            "node": node_name,
+            "execution_time": execution_time,
+            "timed_out": True,
+            "error": message,
+            "needs_reselection": await self._should_reselect_agent(node_name, result_analysis)
+        }
 
     async def _build_enhanced_prompt(self, node_name: str) -> str:
         """构建增强的提示 - 使用具体指令和错误信息"""
@@ -735,7 +1128,7 @@ class GraphFlowOrchestrator:
                     try:
                         import json
                         import os
-                        report_path = "/Users/jabez/output/test_report.json"
+                        report_path = self.task_ledger.get_file_path("test_report.json")
                         if os.path.exists(report_path):
                             with open(report_path, 'r', encoding='utf-8') as f:
                                 report_data = json.load(f)
@@ -799,7 +1192,8 @@ class GraphFlowOrchestrator:
         """获取下一批可执行节点 - 基于test.py的智能链路选择逻辑"""
 
         # 特殊处理：单元测试失败的情况
-        if current_node == "UnitTestAgent" and not execution_result["success"]:
+        # 超时不携带测试输出，不触发重构，直接走下方的重试/替代逻辑
+        if current_node == "UnitTestAgent" and not execution_result["success"] and not execution_result.get("timed_out"):
             print(f"🔧 单元测试失败，启动智能修复流程")
 
             # 检查失败原因
@@ -851,12 +1245,11 @@ class GraphFlowOrchestrator:
         elif current_node == "UnitTestAgent" and execution_result["success"]:
             print(f"✅ 单元测试通过，继续后续流程")
 
-            # 根据当前链路配置决定下一步
-            if "CodeScanningAgent" in self.participants:
-                return ["CodeScanningAgent"]  # 标准链路：继续代码扫描
-            else:
+            # 根据当前链路的依赖关系决定下一步（标准链路中扫描和结构化并行就绪）
+            ready_nodes = self._compute_ready_nodes(current_node)
+            if not ready_nodes:
                 print(f"🎉 {self.chain_name} 链路执行完成，UnitTestAgent 是最后一个节点")
-                return []  # 最小链路：结束流程
+            return ready_nodes
 
         # 一般失败处理：智能重试和替代
         if not execution_result["success"]:
@@ -873,37 +1266,17 @@ class GraphFlowOrchestrator:
                     print(f"🔄 找到替代节点: {alternative_nodes}")
                     return alternative_nodes
 
-        # 正常流程：根据当前链路配置的Agent顺序执行
-        try:
-            # 获取当前链路配置的Agent顺序
-            from ..config.chain_config import get_chain_config
-            chain_config = get_chain_config(self.chain_name)
-            current_flow_sequence = chain_config.agents
-            print(f"🔗 使用 {self.chain_name} 链路顺序: {' → '.join(current_flow_sequence)}")
-        except Exception as e:
-            print(f"⚠️ 无法获取链路配置，使用默认顺序: {e}")
-            # 回退到默认的标准链路顺序
-            current_flow_sequence = [
-                "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent",
-                "UnitTestAgent", "CodeScanningAgent", "ProjectStructureAgent"
-            ]
+        # 正常流程：根据当前链路配置的依赖关系（DAG）计算就绪节点
+        ready_nodes = self._compute_ready_nodes(current_node)
+        if ready_nodes:
+            print(f"➡️ 正常流程：{current_node} -> {', '.join(ready_nodes)}")
+            return ready_nodes
 
-        try:
-            current_index = current_flow_sequence.index(current_node)
-            if current_index + 1 < len(current_flow_sequence):
-                next_node = current_flow_sequence[current_index + 1]
-                # 确保下一个节点在当前参与者中
-                if next_node in self.participants:
-                    print(f"➡️ 正常流程：{current_node} -> {next_node}")
-                    return [next_node]
-                else:
-                    print(f"⚠️ 下一个节点 {next_node} 不在当前参与者中，流程结束")
-            else:
-                print(f"🎉 {self.chain_name} 链路执行完成，{current_node} 是最后一个节点")
-        except ValueError:
+        if current_node in self._get_flow_sequence():
+            print(f"🎉 {self.chain_name} 链路执行完成，{current_node} 之后没有就绪节点")
+        else:
             # 如果当前节点不在流程中，返回空列表结束
             print(f"⚠️ 当前节点 {current_node} 不在 {self.chain_name} 链路中，流程结束")
-            pass
 
         return []  # 结束流程
 
@@ -932,10 +1305,9 @@ class GraphFlowOrchestrator:
     async def _generate_final_result(self) -> StopMessage:
         """生成最终结果"""
         # 统计执行结果
-        completed_nodes = [node for node, state in self.progress_ledger.node_states.items()
-                          if state == NodeState.COMPLETED]
-        failed_nodes = [node for node, state in self.progress_ledger.node_states.items()
-                       if state == NodeState.FAILED]
+        completed_nodes = self.progress_ledger.get_nodes_in_state(NodeState.COMPLETED)
+        failed_nodes = self.progress_ledger.get_nodes_in_state(NodeState.FAILED)
+        timed_out_nodes = self.progress_ledger.get_nodes_in_state(NodeState.TIMED_OUT)
 
         final_message = f"""
 🎉 多Agent协作流程执行完成！
@@ -943,11 +1315,13 @@ class GraphFlowOrchestrator:
 📊 执行统计：
 ✅ 成功完成的Agent: {len(completed_nodes)}
 ❌ 执行失败的Agent: {len(failed_nodes)}
-🔄 总执行轮次: {len(self.progress_ledger.execution_history)}
+⏱️ 执行超时的Agent: {len(timed_out_nodes)}
+🔄 总执行轮次: {self.progress_ledger.execution_history.total_count}
 
 📋 详细结果：
 成功: {', '.join(completed_nodes)}
 失败: {', '.join(failed_nodes) if failed_nodes else '无'}
+超时: {', '.join(timed_out_nodes) if timed_out_nodes else '无'}
 
 🎯 项目配置：
 项目名称: {self.task_ledger.project_config.get('project_name', '未设置')}
@@ -968,9 +1342,9 @@ class GraphFlowOrchestrator:
         try:
             # 更新Agent上下文为"starting"
             current_task = self._get_current_task_for_agent(agent_name)
-            dependencies = agent_communication_memory.agent_dependencies.get(agent_name, [])
+            dependencies = self.communication_memory.agent_dependencies.get(agent_name, [])
 
-            await agent_communication_memory.update_agent_context(
+            await self.communication_memory.update_agent_context(
                 agent_name=agent_name,
                 current_task=current_task,
                 execution_state="starting",
@@ -978,10 +1352,10 @@ class GraphFlowOrchestrator:
             )
 
             # 收集依赖Agent的输出
-            dependency_outputs = await agent_communication_memory.get_dependency_outputs(agent_name)
+            dependency_outputs = await self.communication_memory.get_dependency_outputs(agent_name)
 
             # 获取发送给该Agent的消息
-            incoming_messages = await agent_communication_memory.get_messages_for_agent(agent_name, limit=3)
+            incoming_messages = await self.communication_memory.get_messages_for_agent(agent_name, limit=3)
 
             # 构建增强的上下文信息并存储到任务账本中
             enhanced_context = {
@@ -990,7 +1364,7 @@ class GraphFlowOrchestrator:
                     f"{msg.from_agent} ({msg.message_type}): {msg.content[:100]}..."
                     for msg in incoming_messages
                 ],
-                "suggestions": await agent_communication_memory.suggest_next_actions(agent_name)
+                "suggestions": await self.communication_memory.suggest_next_actions(agent_name)
             }
 
             # 存储到任务账本中
@@ -1017,7 +1391,7 @@ class GraphFlowOrchestrator:
                 "analysis": analysis
             }
 
-            await agent_communication_memory.update_agent_context(
+            await self.communication_memory.update_agent_context(
                 agent_name=agent_name,
                 current_task=self._get_current_task_for_agent(agent_name),
                 execution_state=execution_state,
@@ -1044,14 +1418,14 @@ class GraphFlowOrchestrator:
 
             # 找到依赖当前Agent的其他Agent
             dependent_agents = [
-                agent for agent, deps in agent_communication_memory.agent_dependencies.items()
+                agent for agent, deps in self.communication_memory.agent_dependencies.items()
                 if agent_name in deps and agent in self.participants
             ]
 
             for dependent_agent in dependent_agents:
                 if success:
                     # 发送成功结果
-                    await agent_communication_memory.send_message(
+                    await self.communication_memory.send_message(
                         from_agent=agent_name,
                         to_agent=dependent_agent,
                         message_type="result",
@@ -1064,7 +1438,7 @@ class GraphFlowOrchestrator:
                 else:
                     # 发送错误信息
                     failure_reasons = analysis.get("failure_reasons", [])
-                    await agent_communication_memory.send_message(
+                    await self.communication_memory.send_message(
                         from_agent=agent_name,
                         to_agent=dependent_agent,
                         message_type="error",
@@ -1101,10 +1475,10 @@ class GraphFlowOrchestrator:
             # 特殊处理：UnitTestAgent失败 → RefactoringAgent
             if agent_name == "UnitTestAgent" and "RefactoringAgent" in self.participants:
                 # 获取完整的测试信息
-                detailed_test_info = await unit_test_memory_manager.get_detailed_test_info_for_refactoring("UnitTestAgent")
+                detailed_test_info = await self.unit_test_memory.get_detailed_test_info_for_refactoring("UnitTestAgent")
 
                 # 发送详细的错误信息
-                await agent_communication_memory.send_message(
+                await self.communication_memory.send_message(
                     from_agent="UnitTestAgent",
                     to_agent="RefactoringAgent",
                     message_type="error",
@@ -1137,7 +1511,7 @@ class GraphFlowOrchestrator:
                 else:
                     context_content = f"测试环境和代码上下文信息: {self._get_test_context()}"
 
-                await agent_communication_memory.send_message(
+                await self.communication_memory.send_message(
                     from_agent="UnitTestAgent",
                     to_agent="RefactoringAgent",
                     message_type="context",
@@ -1158,7 +1532,7 @@ class GraphFlowOrchestrator:
 
             # 特殊处理：RefactoringAgent成功 → UnitTestAgent
             if agent_name == "RefactoringAgent" and "UnitTestAgent" in self.participants:
-                await agent_communication_memory.send_message(
+                await self.communication_memory.send_message(
                     from_agent="RefactoringAgent",
                     to_agent="UnitTestAgent",
                     message_type="context",
@@ -1171,7 +1545,7 @@ class GraphFlowOrchestrator:
 
             # CodeScanningAgent成功 → ProjectStructureAgent
             elif agent_name == "CodeScanningAgent" and "ProjectStructureAgent" in self.participants:
-                await agent_communication_memory.send_message(
+                await self.communication_memory.send_message(
                     from_agent="CodeScanningAgent",
                     to_agent="ProjectStructureAgent",
                     message_type="result",
@@ -1201,11 +1575,11 @@ class GraphFlowOrchestrator:
             # 提取测试文件信息
             test_files = self._extract_test_files_from_response(raw_response)
 
-            # 提取测试报告信息
+            # 提取测试报告信息（优先使用Agent保存的结构化报告文件）
             test_reports = self._extract_test_reports_from_response(raw_response)
 
             # 记录到UnitTest专用Memory
-            await unit_test_memory_manager.record_complete_test_execution(
+            await self.unit_test_memory.record_complete_test_execution(
                 agent_name=agent_name,
                 task_description=task_description,
                 raw_output=raw_response,
@@ -1213,7 +1587,9 @@ class GraphFlowOrchestrator:
                 success=result_analysis["success"],
                 duration=execution_time,
                 test_files=test_files,
-                test_reports=test_reports
+                test_reports=test_reports,
+                report_path=test_reports.get("report_path"),
+                project_dir=self.output_dir
             )
 
             print(f"🧪 UnitTestAgent完整输出已保存到专用Memory")
@@ -1241,22 +1617,27 @@ class GraphFlowOrchestrator:
         """从响应中提取测试报告信息"""
         reports = {}
 
-        # 查找JSON格式的测试报告
-        import re
-        json_pattern = r'\{[^{}]*"test_files"[^{}]*\}'
-        json_matches = re.findall(json_pattern, response, re.DOTALL)
+        # 优先定位Agent保存的结构化报告文件（JUnit XML / JSON），由UnitTest Memory直接解析
+        report_paths = find_report_paths(response)
+        if report_paths:
+            reports["report_path"] = report_paths[0]
+            reports["report_files"] = report_paths
+        else:
+            # 回退：查找响应中内联的JSON格式测试报告
+            import re
+            json_pattern = r'\{[^{}]*"test_files"[^{}]*\}'
+            json_matches = re.findall(json_pattern, response, re.DOTALL)
 
-        for i, json_str in enumerate(json_matches):
-            try:
-                import json
-                report_data = json.loads(json_str)
-                reports[f"report_{i+1}"] = report_data
-            except:
-                continue
+            for i, json_str in enumerate(json_matches):
+                try:
+                    import json
+                    report_data = json.loads(json_str)
+                    reports[f"report_{i+1}"] = report_data
+                except:
+                    continue
 
         # 查找Markdown格式的报告路径
-        md_pattern = r'test_report\.md'
-        if re.search(md_pattern, response):
+        if "test_report.md" in response:
             reports["markdown_report"] = "test_report.md"
 
         return reports
@@ -5,12 +5,16 @@
 """
 
 import asyncio
+import hashlib
+import textwrap
 from typing import Any, Dict, List, Optional
 from autogen_agentchat.base import Response
 from autogen_agentchat.messages import TextMessage, StopMessage
 from autogen_core.models import UserMessage
 
-from .data_structures import NodeState
+from .data_structures import NodeState, DEFAULT_OUTPUT_DIR
+from ..config.chain_config import DEFAULT_PROMPT_TOKEN_BUDGET
+from ..utils.prompt_budget import PromptBudgetAssembler
 
 
 class OrchestratorHelpers:
@@ -21,91 +25,119 @@ class OrchestratorHelpers:
         """构建增强的提示 - 使用具体指令和错误信息"""
         # 获取为该节点生成的具体指令
         specific_instruction = ""
-        if hasattr(orchestrator.progress_ledger, 'node_instructions') and node_name in orchestrator.progress_ledger.node_instructions:
+        if node_name in orchestrator.progress_ledger.node_instructions:
             specific_instruction = orchestrator.progress_ledger.node_instructions[node_name]
         else:
             # 如果没有预生成的指令，现在生成
             specific_instruction = await orchestrator._generate_specific_instruction(node_name)
 
-        # 构建基础提示
-        enhanced_prompt = f"""
+        assembler = PromptBudgetAssembler(OrchestratorHelpers.get_prompt_budget(orchestrator, node_name))
+
+        # 构建基础提示（按优先级分配token预算，输出顺序保持不变）
+        assembler.add("instruction", f"""
         【具体执行指令】
-        {specific_instruction}
+        {specific_instruction}""", priority=0)
 
+        assembler.add("task_background", f"""
         【任务背景】
         原始任务：{orchestrator.task_ledger.original_task}
 
         【项目配置】
         项目名称：{orchestrator.task_ledger.project_config.get('project_name', '未设置')}
         主文件路径：{orchestrator.task_ledger.get_file_path('main')}
-        测试文件路径：{orchestrator.task_ledger.get_file_path('test')}
+        测试文件路径：{orchestrator.task_ledger.get_file_path('test')}""", priority=10)
 
+        assembler.add("plan", f"""
         【执行计划】
-        {orchestrator.task_ledger.plan[0] if orchestrator.task_ledger.plan else "无具体计划"}
+        {orchestrator.task_ledger.plan[0] if orchestrator.task_ledger.plan else "无具体计划"}""", priority=70)
 
+        assembler.add("current_state", f"""
         【当前状态】
-        {OrchestratorHelpers.format_current_state(orchestrator)}
-        """
+        {OrchestratorHelpers.format_current_state(orchestrator)}""", priority=80)
 
         # 添加Agent通信增强信息
         if orchestrator.memory_initialized and hasattr(orchestrator.task_ledger, 'enhanced_contexts'):
             enhanced_context = orchestrator.task_ledger.enhanced_contexts.get(node_name, {})
 
             if enhanced_context:
-                enhanced_prompt += "\n\n        【🔗 Agent协作信息】"
+                assembler.add_header("collaboration_header", "        【🔗 Agent协作信息】", group="collaboration")
 
                 # 依赖Agent输出
                 if enhanced_context.get("dependency_outputs"):
-                    enhanced_prompt += f"""
-
+                    assembler.add("dependency_outputs", f"""
         【📋 依赖Agent输出】
-        {OrchestratorHelpers._format_dependency_outputs(enhanced_context["dependency_outputs"])}"""
+        {OrchestratorHelpers._format_dependency_outputs(enhanced_context["dependency_outputs"])}""", priority=30, group="collaboration")
 
                 # 收到的消息
                 if enhanced_context.get("incoming_messages"):
-                    enhanced_prompt += f"""
-
+                    assembler.add("incoming_messages", f"""
         【📨 收到的消息】
-        {chr(10).join([f"        - {msg}" for msg in enhanced_context["incoming_messages"]])}"""
+        {chr(10).join([f"        - {msg}" for msg in enhanced_context["incoming_messages"]])}""", priority=50, group="collaboration")
 
                 # 智能建议
                 if enhanced_context.get("suggestions"):
-                    enhanced_prompt += f"""
-
+                    assembler.add("suggestions", f"""
         【💡 建议的行动】
-        {chr(10).join([f"        - {suggestion}" for suggestion in enhanced_context["suggestions"]])}"""
+        {chr(10).join([f"        - {suggestion}" for suggestion in enhanced_context["suggestions"]])}""", priority=60, group="collaboration")
 
         # 特殊处理：为重构Agent添加错误信息
         if node_name == "RefactoringAgent" and hasattr(orchestrator.task_ledger, 'error_history') and orchestrator.task_ledger.error_history:
             latest_error = orchestrator.task_ledger.error_history[-1]
-            enhanced_prompt += f"""
-
+            assembler.add("test_errors", f"""
         【🚨 测试错误信息】
         错误来源：{latest_error['source']}
-        错误原因：{latest_error['errors']}
+        错误原因：{latest_error['errors']}""", priority=20)
 
+            # 完整测试输出体积最大，保留首尾（失败摘要在末尾）
+            assembler.add("test_output", f"""
         【📋 测试输出详情】
-        {latest_error['test_output']}
+        {latest_error['test_output']}""", priority=40, strategy="head_tail")
 
+            assembler.add("fix_guidance", """
         【🔧 修复指导】
         请仔细分析上述测试错误，确定是业务代码问题还是测试代码问题：
         1. 如果是函数名、参数、返回值不匹配 -> 修复业务代码
         2. 如果是测试用例编写错误 -> 修复测试代码
         3. 如果是逻辑实现错误 -> 修复业务代码
         4. 确保修复后测试能够通过
-        """
-
-        enhanced_prompt += """
+        """, priority=5)
 
+        assembler.add("reminder", """
         【重要提醒】
         - 请严格按照上述具体指令执行
         - 确保完成后输出相应的完成标记
         - 如果遇到问题，请详细说明具体情况
         - 对于文件操作类任务，确保成功调用相关工具
-        """
+        """, priority=5)
+
+        enhanced_prompt, usage = assembler.assemble()
+        OrchestratorHelpers.record_prompt_usage(orchestrator, node_name, usage)
 
         return enhanced_prompt
 
+    @staticmethod
+    def get_prompt_budget(orchestrator, node_name: str) -> int:
+        """获取节点提示词的token预算（来自链路配置）"""
+        chain_config = getattr(orchestrator, "chain_config", None)
+        if chain_config is None:
+            return DEFAULT_PROMPT_TOKEN_BUDGET
+        return chain_config.get_prompt_budget(node_name)
+
+    @staticmethod
+    def record_prompt_usage(orchestrator, node_name: str, usage: Dict[str, Any]):
+        """记录各段落的token使用情况，有段落被截断或丢弃时写入工作流日志"""
+        if not hasattr(orchestrator, "prompt_token_usage"):
+            orchestrator.prompt_token_usage = {}
+        orchestrator.prompt_token_usage[node_name] = usage
+
+        trimmed = [name for name, section in usage["sections"].items()
+                   if section["truncated"] or section["dropped"]]
+        if trimmed:
+            orchestrator.workflow_logger.log_event(
+                "warning",
+                f"{node_name} 提示词超出预算 {usage['budget_tokens']} tokens，已截断/省略: {', '.join(trimmed)}"
+            )
+
     @staticmethod
     def format_current_state(orchestrator) -> str:
         """格式化当前执行状态"""
@@ -116,36 +148,46 @@ class OrchestratorHelpers:
         return "\n".join(state_info)
 
     @staticmethod
-    async def generate_specific_instruction(orchestrator, node_name: str) -> str:
-        """为特定节点生成具体执行指令 - 集成智能路径解析"""
-        # 获取节点的历史执行情况
-        node_history = [item for item in orchestrator.progress_ledger.execution_history if item.get("node") == node_name]
-
-        # 检查依赖关系和前置条件
-        dependency_info = await OrchestratorHelpers.check_dependencies(orchestrator, node_name)
-
-        # 初始化智能路径解析器
-        path_resolver = orchestrator._initialize_path_resolver()
+    async def build_instruction_context(orchestrator, node_name: str,
+                                        assume_completed: Optional[str] = None) -> Dict[str, Any]:
+        """
+        收集生成节点指令所需的上下文
 
-        # 生成路径相关信息
-        path_info = ""
-        if path_resolver:
-            structure = path_resolver.discover_project_structure()
-            working_dir = path_resolver.get_working_directory_for_agent(node_name)
+        Args:
+            assume_completed: 视为已完成的节点（预取下一节点指令时传入当前正在执行的节点）
+        """
+        return {
+            # 获取节点的历史执行情况
+            "node_history": orchestrator.progress_ledger.get_node_history(node_name),
+            # 检查依赖关系和前置条件
+            "dependency_info": await OrchestratorHelpers.check_dependencies(orchestrator, node_name, assume_completed),
+            # 生成路径相关信息
+            "path_info": OrchestratorHelpers.build_path_info(orchestrator, node_name)
+        }
 
-            path_info = f"""
-        🔍 **智能路径信息**：
-        - 推荐工作目录: {working_dir}
-        - 项目根目录: {structure.get('project_root', '未检测到')}
-        - Utils目录: {structure.get('utils_dir', '未检测到')}
-        - 主文件: {', '.join(structure.get('main_files', [])) or '未检测到'}
-        - 测试文件: {', '.join(structure.get('test_files', [])) or '未检测到'}
+    @staticmethod
+    def instruction_context_signature(orchestrator, context: Dict[str, Any]) -> str:
+        """计算指令上下文签名，用于判断预取的指令是否仍然有效"""
+        plan = orchestrator.task_ledger.plan[0] if orchestrator.task_ledger.plan else ""
+        raw = "\n".join([context["dependency_info"], context["path_info"], plan])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-        📋 **路径使用建议**：
-        - 对于UnitTestAgent: 在 {working_dir} 目录下执行测试
-        - 对于文件操作: 使用项目根目录 {structure.get('project_root', working_dir)}
-        - 对于模块导入: 确保正确的sys.path设置
-        """
+    @staticmethod
+    async def generate_specific_instruction(orchestrator, node_name: str,
+                                            context: Optional[Dict[str, Any]] = None) -> str:
+        """为特定节点生成具体执行指令 - 集成智能路径解析"""
+        if context is None:
+            context = await OrchestratorHelpers.build_instruction_context(orchestrator, node_name)
+        node_history = context["node_history"]
+        dependency_info = context["dependency_info"]
+        path_info = context["path_info"]
+
+        # 模板模式：首次执行的节点直接按模板生成指令，只有重试时才调用LLM
+        is_retry = orchestrator.progress_ledger.execution_history.failure_count(node_name) > 0
+        if getattr(orchestrator, "instruction_mode", "llm") == "template" and not is_retry:
+            return await OrchestratorHelpers.build_template_instruction(
+                orchestrator, node_name, dependency_info, path_info
+            )
 
         # 构建指令生成提示
         instruction_prompt = f"""
@@ -186,15 +228,82 @@ class OrchestratorHelpers:
             return OrchestratorHelpers.get_default_instruction(orchestrator, node_name, dependency_info)
 
     @staticmethod
-    async def check_dependencies(orchestrator, node_name: str) -> str:
+    def build_path_info(orchestrator, node_name: str) -> str:
+        """基于智能路径解析结果生成路径信息"""
+        # 初始化智能路径解析器
+        path_resolver = orchestrator._initialize_path_resolver()
+        if not path_resolver:
+            return ""
+
+        structure = path_resolver.discover_project_structure()
+        working_dir = path_resolver.get_working_directory_for_agent(node_name)
+
+        return f"""
+        🔍 **智能路径信息**：
+        - 推荐工作目录: {working_dir}
+        - 项目根目录: {structure.get('project_root', '未检测到')}
+        - Utils目录: {structure.get('utils_dir', '未检测到')}
+        - 主文件: {', '.join(structure.get('main_files', [])) or '未检测到'}
+        - 测试文件: {', '.join(structure.get('test_files', [])) or '未检测到'}
+
+        📋 **路径使用建议**：
+        - 对于UnitTestAgent: 在 {working_dir} 目录下执行测试
+        - 对于文件操作: 使用项目根目录 {structure.get('project_root', working_dir)}
+        - 对于模块导入: 确保正确的sys.path设置
+        """
+
+    @staticmethod
+    async def build_template_instruction(orchestrator, node_name: str, dependency_info: str, path_info: str) -> str:
+        """不调用LLM，根据执行计划、依赖输出和路径信息确定性地生成指令"""
+        instruction_parts = [OrchestratorHelpers.get_default_instruction(orchestrator, node_name, dependency_info)]
+
+        plan_section = OrchestratorHelpers.extract_plan_section(orchestrator, node_name)
+        if plan_section:
+            instruction_parts.append(f"执行计划中与你相关的步骤：\n{plan_section}")
+
+        if orchestrator.memory_initialized:
+            dependency_outputs = await orchestrator.communication_memory.get_dependency_outputs(node_name)
+            if dependency_outputs:
+                instruction_parts.append(
+                    f"依赖Agent输出：\n{OrchestratorHelpers._format_dependency_outputs(dependency_outputs)}"
+                )
+
+        if path_info:
+            instruction_parts.append(textwrap.dedent(path_info).strip())
+
+        return "\n\n".join(instruction_parts)
+
+    @staticmethod
+    def extract_plan_section(orchestrator, node_name: str, max_lines: int = 8) -> str:
+        """从执行计划中提取提到该节点的步骤"""
+        if not orchestrator.task_ledger.plan:
+            return ""
+
+        other_agents = [name for name in orchestrator.participants if name != node_name]
+        section_lines = []
+        collecting = False
+        for line in orchestrator.task_ledger.plan[0].splitlines():
+            if node_name in line:
+                collecting = True
+            elif collecting and any(agent in line for agent in other_agents):
+                collecting = False
+
+            if collecting and line.strip():
+                section_lines.append(line.rstrip())
+                if len(section_lines) >= max_lines:
+                    break
+
+        return "\n".join(section_lines)
+
+    @staticmethod
+    async def check_dependencies(orchestrator, node_name: str, assume_completed: Optional[str] = None) -> str:
         """检查节点的依赖关系和前置条件"""
         dependency_info = []
 
         # 检查已完成的节点和它们的输出
-        completed_nodes = []
-        for node, state in orchestrator.progress_ledger.node_states.items():
-            if state == NodeState.COMPLETED:
-                completed_nodes.append(node)
+        completed_nodes = orchestrator.progress_ledger.get_nodes_in_state(NodeState.COMPLETED)
+        if assume_completed and assume_completed not in completed_nodes:
+            completed_nodes.append(assume_completed)
 
         dependency_info.append(f"已完成的节点: {completed_nodes}")
 
@@ -250,15 +359,16 @@ class OrchestratorHelpers:
         main_file_path = orchestrator.task_ledger.get_file_path('main')
         test_file_path = orchestrator.task_ledger.get_file_path('test')
         project_name = orchestrator.task_ledger.project_config.get('project_name', 'custom_project')
+        base_dir = orchestrator.task_ledger.project_config.get('base_dir', DEFAULT_OUTPUT_DIR)
 
         base_instructions = {
-            "CodePlanningAgent": f"分析{project_name}需求，制定详细的实现计划。明确指定所有文件保存在 /Users/jabez/output 目录下，主代码文件为 {main_file_path}，测试文件为 {test_file_path}。",
+            "CodePlanningAgent": f"分析{project_name}需求，制定详细的实现计划。明确指定所有文件保存在 {base_dir} 目录下，主代码文件为 {main_file_path}，测试文件为 {test_file_path}。",
             "FunctionWritingAgent": f"编写完整的{project_name}代码，保存到 {main_file_path} 文件中。确保包含所有必要的函数实现。",
             "TestGenerationAgent": f"读取 {main_file_path} 文件中的代码，为每个函数生成完整的测试用例，保存到 {test_file_path} 文件中。",
-            "UnitTestAgent": f"执行 {test_file_path} 中的测试用例，生成详细的测试报告。使用 sys.path.insert(0, '/Users/jabez/output') 确保能导入模块。",
+            "UnitTestAgent": f"执行 {test_file_path} 中的测试用例，生成详细的测试报告。使用 sys.path.insert(0, '{base_dir}') 确保能导入模块。",
             "RefactoringAgent": f"分析测试错误信息，智能修复代码问题。读取 {main_file_path} 和 {test_file_path}，根据错误类型选择修复策略，确保测试通过。",
             "CodeScanningAgent": f"扫描 {main_file_path} 文件，进行静态代码分析，生成质量报告。",
-            "ProjectStructureAgent": f"基于 /Users/jabez/output 目录中的文件创建完整的项目目录结构，包含 src、tests、docs 等文件夹，并生成必要的配置文件。"
+            "ProjectStructureAgent": f"基于 {base_dir} 目录中的文件创建完整的项目目录结构，包含 src、tests、docs 等文件夹，并生成必要的配置文件。"
         }
 
         base_instruction = base_instructions.get(node_name, f"请根据你的专业能力完成 {node_name} 的相关任务。")
@@ -5,15 +5,162 @@
 """
 
 import os
-import glob
-from pathlib import Path
-from typing import Dict, List, Any
+import time
+import threading
+from typing import Dict, List, Any, Optional
+
+from .data_structures import DEFAULT_OUTPUT_DIR
+
+
+class ProjectFileIndex:
+    """
+    项目文件索引 - 单次遍历目录建立缓存
+
+    通过比较已索引目录的 mtime 判断是否需要重建（新增、删除、重命名文件都会改变所在目录的 mtime），
+    每次检查要 stat 所有已索引目录，开销与目录数成正比（远小于重新遍历文件），因此按 min_check_interval 限制检查频率；
+    安装了 watchdog 时可以改用文件系统事件通知来失效缓存，检查不再访问文件系统。
+    返回的结构是副本，调用方修改列表不会影响缓存。
+    """
+
+    def __init__(self, base_dir: str, use_watcher: bool = False, min_check_interval: float = 1.0):
+        """
+        初始化项目文件索引
+
+        Args:
+            base_dir: 要索引的根目录
+            use_watcher: 是否使用 watchdog 监听文件系统变化（未安装时回退到 mtime 检查）
+            min_check_interval: 两次 mtime 检查之间的最小间隔（秒）
+        """
+        self.base_dir = base_dir
+        self.min_check_interval = min_check_interval
+        self._structure: Optional[Dict[str, Any]] = None
+        self._dir_mtimes: Dict[str, int] = {}
+        self._last_check = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._observer = None
+
+        if use_watcher:
+            self._start_watcher()
+
+    def _start_watcher(self):
+        """启动 watchdog 监听，可选依赖"""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            print("⚠️ 未安装 watchdog，项目文件索引使用目录 mtime 检查")
+            return
+
+        index = self
+
+        class _InvalidateHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                index._dirty = True
+
+        if os.path.isdir(self.base_dir):
+            self._observer = Observer()
+            self._observer.schedule(_InvalidateHandler(), self.base_dir, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+
+    def is_stale(self) -> bool:
+        """判断索引是否需要重建（未使用 watchdog 时逐个 stat 已索引目录，距上次检查不足 min_check_interval 时跳过）"""
+        if self._dirty or self._structure is None:
+            return True
+        if self._observer is not None:
+            return False
+
+        now = time.monotonic()
+        if now - self._last_check < self.min_check_interval:
+            return False
+        self._last_check = now
+
+        for dir_path, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(dir_path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self) -> Dict[str, Any]:
+        """单次遍历重建索引"""
+        with self._lock:
+            test_prefixed, test_suffixed, main_files, python_files = [], [], [], []
+            utils_dir = None
+            dir_mtimes = {}
+
+            for root, dirs, files in os.walk(self.base_dir):
+                dirs.sort()
+                try:
+                    dir_mtimes[root] = os.stat(root).st_mtime_ns
+                except OSError:
+                    continue
+
+                if utils_dir is None and "utils" in dirs:
+                    utils_dir = os.path.join(root, "utils")
+
+                is_top_level = root == self.base_dir
+                for name in sorted(files):
+                    if not name.endswith(".py"):
+                        continue
+                    file_path = os.path.join(root, name)
+                    python_files.append(file_path)
+                    if name.startswith("test_"):
+                        test_prefixed.append(file_path)
+                    if name.endswith("_test.py"):
+                        test_suffixed.append(file_path)
+                    if is_top_level and not name.startswith("test_"):
+                        main_files.append(file_path)
+
+            self._structure = {
+                'main_files': main_files,
+                'test_files': test_prefixed + test_suffixed,
+                'utils_dir': utils_dir,
+                'python_files': python_files
+            }
+            self._dir_mtimes = dir_mtimes
+            self._dirty = False
+            self._last_check = time.monotonic()
+            return self._copy_structure(self._structure)
+
+    def get_structure(self) -> Dict[str, Any]:
+        """获取索引结果的副本，必要时重建"""
+        if self.is_stale():
+            return self.refresh()
+        return self._copy_structure(self._structure)
+
+    @staticmethod
+    def _copy_structure(structure: Dict[str, Any]) -> Dict[str, Any]:
+        """复制结构中的列表，避免调用方修改共享缓存"""
+        return {key: list(value) if isinstance(value, list) else value for key, value in structure.items()}
+
+    def close(self):
+        """停止文件系统监听"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+
+# 按根目录共享的文件索引，多个解析器/编排器复用同一份缓存
+_project_indexes: Dict[str, ProjectFileIndex] = {}
+
+
+def get_project_index(base_dir: str, use_watcher: bool = False) -> ProjectFileIndex:
+    """获取（或创建）指定目录的共享文件索引"""
+    base_dir = os.path.abspath(base_dir)
+    index = _project_indexes.get(base_dir)
+    if index is None:
+        index = ProjectFileIndex(base_dir, use_watcher=use_watcher)
+        _project_indexes[base_dir] = index
+    return index
 
 
 class IntelligentPathResolver:
     """智能路径解析器 - 用于动态发现和管理项目文件路径"""
     
-    def __init__(self, project_config: Dict[str, str], facts: List[str], plan: List[str]):
+    def __init__(self, project_config: Dict[str, str], facts: List[str], plan: List[str], use_watcher: bool = False):
         """
         初始化智能路径解析器
         
@@ -21,15 +168,17 @@ class IntelligentPathResolver:
             project_config: 项目配置信息
             facts: 已确认的事实列表
             plan: 执行计划列表
+            use_watcher: 是否使用 watchdog 监听输出目录变化来失效文件索引
         """
         self.project_config = project_config
         self.facts = facts
         self.plan = plan
-        self.base_dirs = ['/Users/jabez/output']
+        self.base_dirs = [project_config.get('base_dir', DEFAULT_OUTPUT_DIR)]
+        self.use_watcher = use_watcher
         
     def discover_project_structure(self) -> Dict[str, Any]:
         """
-        发现项目结构
+        发现项目结构（基于缓存的文件索引，目录未变化时不重新扫描）
         
         Returns:
             包含项目结构信息的字典
@@ -45,24 +194,7 @@ class IntelligentPathResolver:
         for base_dir in self.base_dirs:
             if os.path.exists(base_dir):
                 try:
-                    path = Path(base_dir)
-                    
-                    # 查找测试文件
-                    for pattern in ['test_*.py', '*_test.py']:
-                        structure['test_files'].extend([str(f) for f in path.rglob(pattern)])
-                    
-                    # 查找主文件
-                    for pattern in ['*.py']:
-                        matches = list(path.glob(pattern))
-                        structure['main_files'].extend([str(f) for f in matches if not f.name.startswith('test_')])
-                    
-                    # 查找utils目录
-                    utils_dirs = list(path.glob('**/utils'))
-                    if utils_dirs:
-                        structure['utils_dir'] = str(utils_dirs[0])
-                    
-                    # 统计Python文件
-                    structure['python_files'] = [str(f) for f in path.rglob('*.py')]
+                    structure.update(get_project_index(base_dir, self.use_watcher).get_structure())
                     
                     if structure['main_files'] or structure['test_files']:
                         structure['project_root'] = base_dir
@@ -73,6 +205,12 @@ class IntelligentPathResolver:
         
         return structure
     
+    def refresh(self):
+        """强制重建所有根目录的文件索引"""
+        for base_dir in self.base_dirs:
+            if os.path.exists(base_dir):
+                get_project_index(base_dir, self.use_watcher).refresh()
+    
     def get_working_directory_for_agent(self, agent_name: str) -> str:
         """
         为特定Agent获取推荐的工作目录
@@ -88,7 +226,7 @@ class IntelligentPathResolver:
         if structure['project_root']:
             return structure['project_root']
         
-        return self.base_dirs[0] if self.base_dirs else '/Users/jabez/output'
+        return self.base_dirs[0] if self.base_dirs else DEFAULT_OUTPUT_DIR
     
     def generate_path_report(self) -> str:
         """
@@ -22,6 +22,8 @@ from autogen_ext.tools.mcp import McpWorkbench
 from src.config import create_mcp_servers, create_model_client
 from src.agents import create_all_agents
 from src.core import GraphFlowOrchestrator
+from src.utils.llm_cache import SQLiteLLMCache
+from src.utils.dashboard import parse_web_option, start_dashboard, stop_dashboard
 
 
 # 配置日志 - 隐藏详细的技术日志
@@ -54,7 +56,7 @@ def create_mcp_server_params():
         raise
 
 
-async def create_graph_and_orchestrator(agents, model_client):
+async def create_graph_and_orchestrator(agents, model_client, llm_cache=None):
     """创建执行图和编排器"""
     try:
         # 创建简单的有向图
@@ -81,7 +83,8 @@ async def create_graph_and_orchestrator(agents, model_client):
             participants=agents,
             model_client=model_client,
             max_stalls=3,
-            max_retries=2
+            max_retries=2,
+            llm_cache=llm_cache
         )
         
         logger.info("执行图和编排器创建成功")
@@ -92,8 +95,9 @@ async def create_graph_and_orchestrator(agents, model_client):
         raise
 
 
-async def run_workflow(task: str):
-    """运行完整的工作流"""
+async def run_workflow(task: str, resume: bool = False, web_port: int = None, use_llm_cache: bool = True):
+    """运行完整的工作流（指定 web_port 时在同一进程中启动Memory Web管理界面，use_llm_cache 控制是否启用LLM响应缓存）"""
+    dashboard = await start_dashboard(web_port)
     try:
         logger.info("开始初始化多Agent协作系统...")
 
@@ -101,6 +105,9 @@ async def run_workflow(task: str):
         model_client = create_model_client()
         logger.info("LLM模型客户端创建成功")
 
+        # 编排器规划/指令提示的LLM响应缓存，重复运行相同任务时复用；--no-llm-cache 时关闭
+        llm_cache = SQLiteLLMCache() if use_llm_cache else None
+
         # 2. 创建MCP服务器参数
         filesystem_mcp_server, code_runner_mcp_server = create_mcp_server_params()
 
@@ -114,7 +121,7 @@ async def run_workflow(task: str):
                 logger.info(f"成功创建 {len(agents)} 个Agent")
 
                 # 5. 创建执行图和编排器
-                graph, orchestrator = await create_graph_and_orchestrator(agents, model_client)
+                graph, orchestrator = await create_graph_and_orchestrator(agents, model_client, llm_cache)
 
                 # 6. 运行工作流
                 print("\n" + "="*80)
@@ -122,7 +129,7 @@ async def run_workflow(task: str):
                 print("="*80)
 
                 # 使用编排器运行任务
-                async for event in orchestrator.run_stream(task):
+                async for event in orchestrator.run_stream(task, resume=resume):
                     # 事件已经通过WorkflowLogger处理，这里不需要额外打印
                     pass
 
@@ -134,9 +141,16 @@ async def run_workflow(task: str):
         # 关闭模型客户端
         await model_client.close()
 
+        if llm_cache is not None:
+            cache_stats = llm_cache.get_statistics()
+            print(f"💾 LLM缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次, 命中率 {cache_stats['hit_rate']:.1f}%")
+            llm_cache.close()
+
     except Exception as e:
         print(f"\n❌ 执行失败: {e}")
         raise
+    finally:
+        await stop_dashboard(dashboard)
 
 
 async def main():
@@ -157,9 +171,13 @@ async def main():
     """
     
     try:
-        # 可以从命令行参数获取任务，或使用默认任务
-        if len(sys.argv) > 1:
-            task = " ".join(sys.argv[1:])
+        # 可以从命令行参数获取任务，或使用默认任务；--resume 表示从检查点继续，--web[=端口] 同时启动Web管理界面，
+        # --no-llm-cache 关闭LLM响应缓存
+        resume = "--resume" in sys.argv
+        use_llm_cache = "--no-llm-cache" not in sys.argv
+        web_port, args = parse_web_option([arg for arg in sys.argv[1:] if arg not in ("--resume", "--no-llm-cache")])
+        if args:
+            task = " ".join(args)
         else:
             task = default_task
             
@@ -167,7 +185,7 @@ async def main():
         print(f"📝 日志将保存到: /Users/jabez/output/logs/")
 
         # 运行工作流
-        await run_workflow(task)
+        await run_workflow(task, resume=resume, web_port=web_port, use_llm_cache=use_llm_cache)
 
     except KeyboardInterrupt:
         print("\n⚠️ 用户中断执行")
@@ -15,12 +15,21 @@ from .agent_communication_memory import (
     AgentCommunicationMemory,
     AgentMessage,
     AgentContext,
+    MessageIndex,
     agent_communication_memory
 )
 from .unit_test_memory_manager import (
     UnitTestMemoryManager,
     unit_test_memory_manager
 )
+from .write_queue import MemoryWriteQueue, memory_write_queue
+from .executor import MemoryExecutor, memory_executor
+from .execution_stats import ExecutionStatsStore
+from .lexical_index import LexicalIndex
+from .test_report_parser import load_structured_report
+from .test_history import TestHistoryIndex
+from .embedding_service import EmbeddingService, get_embedding_service
+from .memory_manager import MemoryManager, memory_manager
 
 __all__ = [
     "memory_config",
@@ -32,9 +41,22 @@ __all__ = [
     "AgentCommunicationMemory",
     "AgentMessage",
     "AgentContext",
+    "MessageIndex",
     "agent_communication_memory",
     "UnitTestMemoryManager",
-    "unit_test_memory_manager"
+    "unit_test_memory_manager",
+    "MemoryWriteQueue",
+    "memory_write_queue",
+    "MemoryExecutor",
+    "memory_executor",
+    "ExecutionStatsStore",
+    "LexicalIndex",
+    "load_structured_report",
+    "TestHistoryIndex",
+    "EmbeddingService",
+    "get_embedding_service",
+    "MemoryManager",
+    "memory_manager"
 ]
 
 
@@ -43,6 +65,10 @@ async def initialize_memory_system():
     print("🧠 初始化Memory系统...")
 
     try:
+        # 可选：预加载共享嵌入模型，避免首次写入/查询时才加载
+        if memory_config.preload_embedding_model:
+            await memory_executor.run(get_embedding_service().preload)
+
         # 初始化执行日志管理器
         await execution_log_manager.initialize()
         print("✅ 执行日志管理器初始化完成")
@@ -51,6 +77,20 @@ async def initialize_memory_system():
         await agent_communication_memory.initialize()
         print("✅ Agent通信Memory初始化完成")
 
+        # 重放上次退出时未能写入的记录（登记所有经过写入队列的集合）
+        await unit_test_memory_manager.initialize()
+        await memory_write_queue.replay_spilled([
+            execution_log_manager.execution_memory,
+            agent_communication_memory.communication_memory,
+            unit_test_memory_manager.test_memory
+        ])
+
+        # 按配置的保留策略定期清理旧记忆
+        try:
+            await memory_manager.run_scheduled_retention()
+        except Exception as e:
+            print(f"⚠️ 执行Memory保留策略失败: {e}")
+
         # 检查Agent状态目录
         saved_states = agent_state_manager.list_saved_states()
         if saved_states:
@@ -69,9 +109,13 @@ async def cleanup_memory_system():
     print("🧹 清理Memory系统资源...")
 
     try:
+        # 先把写入队列中的记录全部落库，再关闭连接
+        await memory_write_queue.close()
         await execution_log_manager.close()
         await agent_communication_memory.close()
         await unit_test_memory_manager.close()
+        memory_executor.shutdown()
+        get_embedding_service().close()
         print("✅ Memory系统资源清理完成")
 
     except Exception as e:
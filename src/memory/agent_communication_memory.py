@@ -6,13 +6,17 @@ Agent间通信增强Memory系统
 
 import asyncio
 import json
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from dataclasses import dataclass
 
 from autogen_core.memory import MemoryContent, MemoryMimeType
 from .base_memory_manager import execution_log_manager
 from .memory_config import memory_config
+from .write_queue import memory_write_queue
+from ..utils.event_bus import event_bus
 
 
 @dataclass
@@ -39,6 +43,82 @@ class AgentContext:
     timestamp: str
 
 
+class MessageIndex:
+    """
+    消息历史 - 全局环形缓冲区 + 按接收方/接收方和类型/Agent对索引
+
+    消息按发送顺序（即时间顺序）追加，各索引都是有界deque，
+    取最新k条只需从尾部倒序遍历k条，长时间运行时每轮开销和内存保持平稳。
+    """
+
+    def __init__(self, retention: int = 1000, per_recipient: int = 200, per_pair: int = 200):
+        self.retention = max(1, retention)
+        self.per_recipient = max(1, per_recipient)
+        self.per_pair = max(1, per_pair)
+        self._messages: deque = deque(maxlen=self.retention)
+        self._by_recipient: Dict[str, deque] = {}
+        self._by_recipient_type: Dict[Tuple[str, str], deque] = {}
+        self._by_pair: Dict[Tuple[str, str], deque] = {}
+        self.total_count = 0
+
+    def append(self, message: AgentMessage):
+        """追加一条消息"""
+        self._messages.append(message)
+        self._index(self._by_recipient, message.to_agent, self.per_recipient).append(message)
+        self._index(self._by_recipient_type, (message.to_agent, message.message_type), self.per_recipient).append(message)
+        self._index(self._by_pair, self._pair_key(message.from_agent, message.to_agent), self.per_pair).append(message)
+        self.total_count += 1
+
+    def latest_for_recipient(self,
+                             agent_name: str,
+                             message_type: Optional[str] = None,
+                             from_agent: Optional[str] = None,
+                             limit: int = 10) -> List[AgentMessage]:
+        """获取发送给指定Agent的最新消息（最新的在前）"""
+        if from_agent:
+            candidates = self._by_pair.get(self._pair_key(from_agent, agent_name), ())
+        elif message_type:
+            candidates = self._by_recipient_type.get((agent_name, message_type), ())
+        else:
+            candidates = self._by_recipient.get(agent_name, ())
+
+        matches = (
+            msg for msg in reversed(candidates)
+            if msg.to_agent == agent_name
+            and (message_type is None or msg.message_type == message_type)
+            and (from_agent is None or msg.from_agent == from_agent)
+        )
+        return list(islice(matches, max(0, limit)))
+
+    def has_messages(self, agent_name: str, message_type: str) -> bool:
+        """指定Agent是否收到过该类型的消息"""
+        return bool(self._by_recipient_type.get((agent_name, message_type)))
+
+    def conversation(self, agent1: str, agent2: str, limit: int = 20) -> List[AgentMessage]:
+        """获取两个Agent之间最近的对话（按时间正序）"""
+        pair_messages = self._by_pair.get(self._pair_key(agent1, agent2), ())
+        recent = list(islice(reversed(pair_messages), max(0, limit)))
+        recent.reverse()
+        return recent
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[AgentMessage]:
+        return iter(self._messages)
+
+    @staticmethod
+    def _index(index: Dict[Any, deque], key: Any, maxlen: int) -> deque:
+        messages = index.get(key)
+        if messages is None:
+            messages = index[key] = deque(maxlen=maxlen)
+        return messages
+
+    @staticmethod
+    def _pair_key(agent1: str, agent2: str) -> Tuple[str, str]:
+        return (agent1, agent2) if agent1 <= agent2 else (agent2, agent1)
+
+
 class AgentCommunicationMemory:
     """Agent间通信Memory管理器"""
     
@@ -49,7 +129,11 @@ class AgentCommunicationMemory:
         
         # 内存中的快速访问缓存
         self.agent_contexts: Dict[str, AgentContext] = {}
-        self.message_history: List[AgentMessage] = []
+        self.message_history = MessageIndex(
+            retention=memory_config.message_history_retention,
+            per_recipient=memory_config.messages_per_recipient,
+            per_pair=memory_config.messages_per_pair
+        )
         self.agent_dependencies: Dict[str, List[str]] = {}
     
     async def initialize(self):
@@ -59,6 +143,18 @@ class AgentCommunicationMemory:
             self._initialized = True
             print("🔗 Agent通信Memory系统初始化完成")
     
+    def fork(self) -> "AgentCommunicationMemory":
+        """
+        创建共享底层向量存储、但拥有独立内存缓存的实例
+
+        用于同一进程内并发运行多个工作流时隔离各自的Agent上下文和消息（消息索引使用相同的容量配置）。
+        """
+        forked = AgentCommunicationMemory()
+        forked.communication_memory = self.communication_memory
+        forked._initialized = self._initialized
+        forked.agent_dependencies = dict(self.agent_dependencies)
+        return forked
+    
     # ================================
     # Agent上下文管理
     # ================================
@@ -138,6 +234,14 @@ class AgentCommunicationMemory:
         )
         
         self.message_history.append(message)
+        event_bus.publish("message", {
+            "message_id": message_id,
+            "from_agent": from_agent,
+            "to_agent": to_agent,
+            "message_type": message_type,
+            "timestamp": message.timestamp,
+            "content_preview": content[:100] + "..." if len(content) > 100 else content
+        })
         
         # 存储到向量数据库
         await self._store_message_to_memory(message)
@@ -150,36 +254,17 @@ class AgentCommunicationMemory:
                                    message_type: str = None,
                                    from_agent: str = None,
                                    limit: int = 10) -> List[AgentMessage]:
-        """获取发送给指定Agent的消息"""
-        messages = [
-            msg for msg in self.message_history
-            if msg.to_agent == agent_name
-        ]
-        
-        # 过滤条件
-        if message_type:
-            messages = [msg for msg in messages if msg.message_type == message_type]
-        
-        if from_agent:
-            messages = [msg for msg in messages if msg.from_agent == from_agent]
-        
-        # 按时间排序，返回最新的
-        messages.sort(key=lambda x: x.timestamp, reverse=True)
-        return messages[:limit]
+        """获取发送给指定Agent的消息（最新的在前）"""
+        return self.message_history.latest_for_recipient(
+            agent_name, message_type=message_type, from_agent=from_agent, limit=limit
+        )
     
     async def get_conversation_between_agents(self, 
                                             agent1: str, 
                                             agent2: str,
                                             limit: int = 20) -> List[AgentMessage]:
-        """获取两个Agent之间的对话历史"""
-        conversation = [
-            msg for msg in self.message_history
-            if (msg.from_agent == agent1 and msg.to_agent == agent2) or
-               (msg.from_agent == agent2 and msg.to_agent == agent1)
-        ]
-        
-        conversation.sort(key=lambda x: x.timestamp)
-        return conversation[-limit:]
+        """获取两个Agent之间的对话历史（按时间正序）"""
+        return self.message_history.conversation(agent1, agent2, limit)
     
     # ================================
     # 智能上下文推荐
@@ -219,13 +304,11 @@ class AgentCommunicationMemory:
                 suggestions.append(f"等待依赖Agent完成: {', '.join(incomplete_deps)}")
         
         # 检查是否有错误消息需要处理
-        error_messages = await self.get_messages_for_agent(agent_name, message_type="error")
-        if error_messages:
+        if self.message_history.has_messages(agent_name, "error"):
             suggestions.append("处理收到的错误信息")
         
         # 检查是否有上下文信息可以利用
-        context_messages = await self.get_messages_for_agent(agent_name, message_type="context")
-        if context_messages:
+        if self.message_history.has_messages(agent_name, "context"):
             suggestions.append("利用收到的上下文信息")
         
         return suggestions if suggestions else ["继续执行当前任务"]
@@ -249,7 +332,8 @@ Dependencies: {', '.join(context.dependencies)}
 Outputs: {json.dumps(context.outputs, ensure_ascii=False)}
         """.strip()
         
-        await self.communication_memory.add(
+        await memory_write_queue.put(
+            self.communication_memory,
             MemoryContent(
                 content=content,
                 mime_type=MemoryMimeType.TEXT,
@@ -275,7 +359,8 @@ Timestamp: {message.timestamp}
 Metadata: {json.dumps(message.metadata, ensure_ascii=False)}
         """.strip()
         
-        await self.communication_memory.add(
+        await memory_write_queue.put(
+            self.communication_memory,
             MemoryContent(
                 content=content,
                 mime_type=MemoryMimeType.TEXT,
@@ -6,15 +6,21 @@
 """
 
 import json
+import heapq
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 from pathlib import Path
 
 from autogen_core.memory import MemoryContent, MemoryMimeType
 from autogen_ext.memory.chromadb import ChromaDBVectorMemory
 
 from .memory_config import memory_config
+from .write_queue import memory_write_queue
+from .executor import memory_executor
+from .execution_stats import ExecutionStatsStore
+from .lexical_index import LexicalIndex
+from ..utils.event_bus import event_bus
 
 
 class ExecutionLogManager:
@@ -23,6 +29,13 @@ class ExecutionLogManager:
     def __init__(self):
         self.execution_memory: Optional[ChromaDBVectorMemory] = None
         self._initialized = False
+        self.stats_store = ExecutionStatsStore(memory_config.execution_logs_path / "execution_stats.json")
+        self._stats_version: Optional[str] = None
+        # 本进程内的写入/删除计数，与存储文件签名一起构成数据版本
+        self.version = 0
+        self.lexical_index = LexicalIndex(memory_config.execution_logs_path / "lexical_index.sqlite3")
+        # 记录入队后在后台更新全文索引和统计边车文件的任务，读取前和关闭时等待完成
+        self._index_tasks: Set[asyncio.Task] = set()
 
     async def initialize(self):
         """初始化memory系统"""
@@ -30,12 +43,20 @@ class ExecutionLogManager:
             self.execution_memory = memory_config.create_execution_memory()
             # 确保底层 Chroma 集合已初始化，避免 _collection 为 None
             try:
-                # autogen-ext 暴露的内部初始化方法（同步）
-                self.execution_memory._ensure_initialized()
+                # autogen-ext 暴露的内部初始化方法（同步，会加载嵌入模型，放到执行器中）
+                await memory_executor.run(self.execution_memory._ensure_initialized)
             except Exception as e:
                 # 不中断流程，但提示潜在问题；后续查询前再次确保
                 print(f"⚠️ 初始化执行内存集合时出现问题: {e}")
+            try:
+                await memory_executor.run(self._backfill_timestamp_index)
+            except Exception as e:
+                print(f"⚠️ 补写执行记录时间戳索引失败: {e}")
             self._initialized = True
+            try:
+                await self._sync_lexical_index()
+            except Exception as e:
+                print(f"⚠️ 同步执行记录全文索引失败: {e}")
     
     async def record_execution(self, 
                              agent_name: str, 
@@ -48,7 +69,8 @@ class ExecutionLogManager:
         if not self._initialized:
             await self.initialize()
         
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
         
         # 构建执行记录内容
         content_parts = [
@@ -68,12 +90,14 @@ class ExecutionLogManager:
         content = "\n".join(content_parts)
         
         # 构建metadata
+        task_type = self._classify_task(task_description)
         metadata = {
             "agent_name": agent_name,
             "success": success,
             "timestamp": timestamp,
+            "timestamp_unix": now.timestamp(),  # 数值时间戳，支持在 Chroma 中按时间范围过滤
             "duration": duration,
-            "task_type": self._classify_task(task_description),
+            "task_type": task_type,
         }
 
         if context:
@@ -85,23 +109,68 @@ class ExecutionLogManager:
                 else:
                     metadata[key] = str(value)
         
-        # 存储到向量数据库
-        await self.execution_memory.add(
+        # 放入写入队列，批量计算向量后存储到向量数据库；实际入库后再发布事件，订阅方收到时即可查到该记录
+        doc_id = await memory_write_queue.put(
+            self.execution_memory,
             MemoryContent(
                 content=content,
                 mime_type=MemoryMimeType.TEXT,
                 metadata=metadata
+            ),
+            on_written=lambda written_id: event_bus.publish(
+                "execution", self.execution_event(written_id, metadata, content)
             )
         )
+        self.version += 1
+        
+        # 增量更新统计聚合（内存计数）；全文索引和统计落盘放到后台，入队后即返回
+        self.stats_store.record(agent_name, task_type, success, duration, timestamp)
+        task = asyncio.get_running_loop().create_task(self._index_execution(doc_id, content, metadata))
+        self._index_tasks.add(task)
+        task.add_done_callback(self._index_tasks.discard)
         
         print(f"📝 记录执行日志: {agent_name} - {'成功' if success else '失败'}")
     
+    async def _index_execution(self, doc_id: str, content: str, metadata: Dict[str, Any]):
+        """后台写入全文索引并按间隔落盘统计（失败只记录警告，不影响执行记录本身）"""
+        try:
+            await memory_executor.run(self.lexical_index.add, [(doc_id, content, metadata)])
+        except Exception as e:
+            print(f"⚠️ 更新执行记录全文索引失败: {e}")
+        try:
+            await memory_executor.run(self.stats_store.save)
+        except Exception as e:
+            print(f"⚠️ 保存执行统计失败: {e}")
+
+    async def _wait_index_tasks(self):
+        """等待已入队记录的后台索引更新完成"""
+        if self._index_tasks:
+            await asyncio.gather(*list(self._index_tasks), return_exceptions=True)
+
     async def get_similar_executions(self,
                                    query: str,
                                    agent_name: Optional[str] = None,
                                    success_only: bool = False,
-                                   top_k: int = 10) -> List[Dict[str, Any]]:
-        """获取相似的执行记录"""
+                                   top_k: int = 10,
+                                   task_type: Optional[str] = None,
+                                   since: Optional[Any] = None,
+                                   until: Optional[Any] = None,
+                                   offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        获取相似的执行记录
+
+        过滤条件下推到 Chroma 的 where 子句，在满足条件的记录中按相似度取第 offset 到 offset+top_k 条。
+
+        Args:
+            query: 查询文本
+            agent_name: 只返回该Agent的记录
+            success_only: 只返回成功的记录
+            top_k: 本页返回的记录数
+            task_type: 只返回该任务类型的记录
+            since: 起始时间（datetime、ISO字符串或Unix时间戳），包含
+            until: 结束时间（datetime、ISO字符串或Unix时间戳），包含
+            offset: 分页偏移量
+        """
         if not self._initialized:
             await self.initialize()
 
@@ -114,37 +183,33 @@ class ExecutionLogManager:
             search_query = query
 
         try:
-            # 直接使用ChromaDB查询，绕过AutoGen的bug
-            # 在访问底层集合前确保已初始化
-            try:
-                self.execution_memory._ensure_initialized()
-            except Exception as e:
-                print(f"⚠️ 确保执行内存集合初始化失败: {e}")
-            collection = self.execution_memory._collection
-            if collection is None:
-                raise RuntimeError("Chroma collection is not initialized")
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+
+            where = self.build_where_filter(
+                agent_name=agent_name,
+                success=True if success_only else None,
+                task_type=task_type,
+                since=since,
+                until=until
+            )
 
-            # 执行查询
-            query_results = collection.query(
+            # 执行查询（Chroma不支持offset，取前 offset+top_k 条后切片）
+            query_results = await memory_executor.run(
+                collection.query,
                 query_texts=[search_query],
-                n_results=top_k
+                n_results=max(1, offset + top_k),
+                where=where
             )
             
             # 格式化结果
             results = []
-            docs = query_results['documents'][0]
-            distances = query_results['distances'][0]
-            metadatas = query_results['metadatas'][0]
-            ids = query_results['ids'][0]
+            docs = query_results['documents'][0][offset:]
+            distances = query_results['distances'][0][offset:]
+            metadatas = query_results['metadatas'][0][offset:]
+            ids = query_results['ids'][0][offset:]
             
             for doc, dist, meta, doc_id in zip(docs, distances, metadatas, ids):
-                # 过滤条件
-                if success_only and not meta.get('success', False):
-                    continue
-                
-                if agent_name and meta.get('agent_name') != agent_name:
-                    continue
-                
                 # 创建MemoryContent格式的结果
                 result = MemoryContent(
                     content=doc,
@@ -164,36 +229,499 @@ class ExecutionLogManager:
         except Exception as e:
             print(f"❌ 查询执行记录失败: {e}")
             return []
+
+    async def count_executions(self,
+                               agent_name: Optional[str] = None,
+                               success: Optional[bool] = None,
+                               task_type: Optional[str] = None,
+                               since: Optional[Any] = None,
+                               until: Optional[Any] = None,
+                               stored_since: Optional[float] = None) -> int:
+        """统计满足条件的执行记录数（精确值）"""
+        if not self._initialized:
+            await self.initialize()
+
+        try:
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+            where = self.build_where_filter(agent_name, success, task_type, since, until, stored_since)
+            if where is None:
+                return await memory_executor.run(collection.count)
+            # 只取ID，不加载文档和向量
+            page = await memory_executor.run(collection.get, where=where, include=[])
+            return len(page['ids'])
+        except Exception as e:
+            print(f"❌ 统计执行记录失败: {e}")
+            return 0
+
+    async def scan_executions(self,
+                              offset: int = 0,
+                              limit: int = 100,
+                              agent_name: Optional[str] = None,
+                              success: Optional[bool] = None,
+                              task_type: Optional[str] = None,
+                              since: Optional[Any] = None,
+                              until: Optional[Any] = None,
+                              newest_first: bool = False,
+                              include_content: bool = True,
+                              stored_since: Optional[float] = None) -> List[MemoryContent]:
+        """
+        分页遍历执行记录（不做向量检索，直接按存储顺序读取）
+
+        Args:
+            offset: 分页偏移量
+            limit: 本页记录数
+            stored_since: 只读取该Unix时间之后实际入库的记录（按 stored_unix，用于增量备份）
+            newest_first: 为True时按写入时间倒序分页（最新的记录在第一页）
+            include_content: 为False时只读取metadata，适合统计类遍历
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        try:
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+            where = self.build_where_filter(agent_name, success, task_type, since, until, stored_since)
+
+            if newest_first:
+                total = await self.count_executions(agent_name, success, task_type, since, until, stored_since)
+                end = max(0, total - offset)
+                offset, limit = max(0, end - limit), min(limit, end)
+                if limit == 0:
+                    return []
+
+            include = ["metadatas", "documents"] if include_content else ["metadatas"]
+            page = await memory_executor.run(
+                collection.get, where=where, limit=limit, offset=offset, include=include
+            )
+
+            records = self._format_get_results(page, include_content)
+            if newest_first:
+                records.reverse()
+            return records
+        except Exception as e:
+            print(f"❌ 遍历执行记录失败: {e}")
+            return []
+
+    async def scan_executions_before(self,
+                                     limit: int = 50,
+                                     before: Optional[Tuple[float, str]] = None,
+                                     initial_span: float = 3600.0) -> List[MemoryContent]:
+        """
+        按 (timestamp_unix, id) 倒序取严格早于 before 的记录（键集分页）
+
+        分页位置由最后一条记录的键决定，翻页期间写入或删除记录不会导致重复或遗漏。
+        Chroma 不支持排序，因此把时间范围下推到 where 条件、从 before 往前按时间窗口读取metadata：
+        窗口内记录过多时缩小窗口，为空时扩大窗口，每次读取都带有上限，一页的开销与 limit 成正比，与记录总数无关。
+
+        Args:
+            limit: 本页记录数
+            before: 上一页最后一条记录的 (timestamp_unix, id)，为None时从最新的记录开始
+            initial_span: 第一个时间窗口的长度（秒）
+        """
+        if limit <= 0:
+            return []
+        if not self._initialized:
+            await self.initialize()
+
+        try:
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+            newest = await memory_executor.run(self._newest_keys_before, collection, limit, before, initial_span)
+            if not newest:
+                return []
+
+            page = await memory_executor.run(
+                collection.get, ids=[doc_id for _, doc_id in newest], include=["metadatas", "documents"]
+            )
+        except Exception as e:
+            print(f"❌ 分页读取执行记录失败: {e}")
+            return []
+
+        order = {doc_id: index for index, (_, doc_id) in enumerate(newest)}
+        records = [record for record in self._format_get_results(page, include_content=True)
+                   if record.metadata["id"] in order]
+        records.sort(key=lambda record: order[record.metadata["id"]])
+        return records
+
+    @staticmethod
+    def _newest_keys_before(collection,
+                            limit: int,
+                            before: Optional[Tuple[float, str]],
+                            initial_span: float,
+                            min_span: float = 1e-3) -> List[Tuple[float, str]]:
+        """
+        在执行器线程中按时间窗口往前查找最新的 limit 个键
+
+        每个窗口先只取最多 4 * limit + 1 个ID，超出 4 * limit 时窗口减半重试，合适时才读取窗口内的metadata
+        （同一时间戳的记录超过上限时才整窗读取）；
+        窗口读完后如果还不够一页，先用 limit=1 的查询确认更早的记录是否存在，再把窗口翻倍继续往前。
+        """
+        cap = 4 * limit
+        upper = before[0] if before is not None else None
+        # 第一个窗口包含上界（同一时间戳下还有ID更小的记录），之后的窗口都不含上界
+        upper_inclusive = True
+        anchor = upper if upper is not None else datetime.now().timestamp()
+        span = max(initial_span, min_span)
+        keys: List[Tuple[float, str]] = []
+
+        while len(keys) < limit:
+            lower = anchor - span
+            conditions = [{"timestamp_unix": {"$gte": lower}}]
+            if upper is not None:
+                conditions.append({"timestamp_unix": {"$lte" if upper_inclusive else "$lt": upper}})
+            where = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+            # 先只取ID判断窗口是否过密，窗口合适时再读取metadata
+            probe = collection.get(where=where, limit=cap + 1, include=[])
+            if len(probe["ids"]) > cap and span > min_span:
+                span /= 2
+                continue
+            page = collection.get(where=where, include=["metadatas"])
+
+            for doc_id, meta in zip(page["ids"], page["metadatas"]):
+                key = (float((meta or {}).get("timestamp_unix") or 0), doc_id)
+                if before is None or key < before:
+                    keys.append(key)
+
+            upper, upper_inclusive, anchor = lower, False, lower
+            if len(keys) >= limit:
+                break
+            older = collection.get(where={"timestamp_unix": {"$lt": lower}}, limit=1, include=[])
+            if not older["ids"]:
+                break
+            span *= 2
+
+        return heapq.nlargest(limit, keys)
+
+    async def iter_executions(self, page_size: int = 500, include_content: bool = True, **filters):
+        """按页迭代全部（或满足过滤条件的）执行记录"""
+        offset = 0
+        while True:
+            page = await self.scan_executions(offset=offset, limit=page_size,
+                                              include_content=include_content, **filters)
+            if not page:
+                break
+            yield page
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+    async def delete_executions(self,
+                                agent_name: Optional[str] = None,
+                                success: Optional[bool] = None,
+                                task_type: Optional[str] = None,
+                                since: Optional[Any] = None,
+                                until: Optional[Any] = None,
+                                batch_size: int = 500) -> int:
+        """
+        删除满足条件的执行记录，返回删除条数
+
+        至少需要一个过滤条件，避免误删整个集合；按批取ID后删除，内存占用与记录总数无关。
+        """
+        where = self.build_where_filter(agent_name, success, task_type, since, until)
+        if where is None:
+            raise ValueError("删除执行记录至少需要一个过滤条件")
+
+        if not self._initialized:
+            await self.initialize()
+
+        await self._flush_pending_writes()
+        collection = await memory_executor.run(self._get_collection)
+
+        deleted = 0
+        while True:
+            # 已删除的记录不再出现在结果中，所以始终从头取
+            page = await memory_executor.run(collection.get, where=where, limit=batch_size, include=[])
+            if not page['ids']:
+                break
+            await memory_executor.run(collection.delete, ids=page['ids'])
+            await memory_executor.run(self.lexical_index.delete, page['ids'])
+            deleted += len(page['ids'])
+            if len(page['ids']) < batch_size:
+                break
+
+        if deleted:
+            self.version += 1
+            event_bus.publish("executions_deleted", {"count": deleted})
+            await self.rebuild_statistics()
+        return deleted
+
+    @staticmethod
+    def execution_event(doc_id: str, metadata: Dict[str, Any], content: str) -> Dict[str, Any]:
+        """执行记录的实时事件数据（与记忆列表条目的字段一致）"""
+        return {
+            "id": doc_id,
+            "agent_name": metadata.get("agent_name", "Unknown"),
+            "success": metadata.get("success", False),
+            "timestamp": metadata.get("timestamp", "Unknown"),
+            "duration": metadata.get("duration", 0),
+            "task_type": metadata.get("task_type", "general"),
+            "content_preview": content[:100] + "..." if len(content) > 100 else content
+        }
+
+    def get_data_version(self) -> str:
+        """
+        当前数据版本（用于缓存校验和ETag）
+
+        由本进程的写入/删除计数和 Chroma SQLite 文件（含WAL）的修改时间、大小组成，
+        其他进程写入执行记录后版本同样会变化。只读文件元数据，不访问集合。
+        """
+        parts = [str(self.version)]
+        for name in ("chroma.sqlite3", "chroma.sqlite3-wal"):
+            try:
+                stat = (memory_config.execution_logs_path / name).stat()
+                parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+            except OSError:
+                parts.append("0")
+        return ":".join(parts)
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取增量维护的执行统计（O(1)）
+
+        数据版本变化后读取时与集合记录数核对，不一致时先重新读取边车文件，仍不一致再从集合全量重建。
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        try:
+            await self._flush_pending_writes()
+            data_version = self.get_data_version()
+            # 数据版本变化（包括其他进程写入）后才与集合记录数核对
+            if data_version != self._stats_version:
+                collection = await memory_executor.run(self._get_collection)
+                stored_count = await memory_executor.run(collection.count)
+                if stored_count != self.stats_store.total:
+                    # 其他进程可能已经落盘了最新统计，先重新读取边车文件
+                    await memory_executor.run(self.stats_store.reload)
+                if stored_count != self.stats_store.total:
+                    print(f"🔄 执行统计与记录数不一致（{self.stats_store.total} / {stored_count}），重建统计")
+                    await self.rebuild_statistics()
+                self._stats_version = data_version
+        except Exception as e:
+            print(f"⚠️ 核对执行统计失败: {e}")
+
+        return self.stats_store.snapshot()
+
+    async def rebuild_statistics(self):
+        """从集合全量重建统计聚合（只读取metadata）"""
+        metadatas = []
+        async for page in self.iter_executions(include_content=False):
+            metadatas.extend(record.metadata for record in page)
+        await memory_executor.run(self.stats_store.rebuild, metadatas)
+
+    async def get_execution_by_id(self, execution_id: str) -> Optional[MemoryContent]:
+        """根据ID直接获取执行记录"""
+        if not self._initialized:
+            await self.initialize()
+
+        try:
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+            page = await memory_executor.run(collection.get, ids=[execution_id], include=["metadatas", "documents"])
+            records = self._format_get_results(page, include_content=True)
+            return records[0] if records else None
+        except Exception as e:
+            print(f"❌ 获取执行记录失败 {execution_id}: {e}")
+            return None
+
+    @staticmethod
+    def _format_get_results(page: Dict[str, Any], include_content: bool) -> List[MemoryContent]:
+        """把 collection.get 的结果转换为MemoryContent列表"""
+        documents = page.get('documents') if include_content else None
+        records = []
+        for index, doc_id in enumerate(page['ids']):
+            meta = page['metadatas'][index] or {}
+            records.append(MemoryContent(
+                content=documents[index] if documents else "",
+                mime_type=MemoryMimeType.TEXT,
+                metadata={**meta, 'id': doc_id}
+            ))
+        return records
+
+    @staticmethod
+    def build_where_filter(agent_name: Optional[str] = None,
+                           success: Optional[bool] = None,
+                           task_type: Optional[str] = None,
+                           since: Optional[Any] = None,
+                           until: Optional[Any] = None,
+                           stored_since: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """构建 Chroma where 过滤条件，没有条件时返回None"""
+        conditions = []
+        if agent_name:
+            conditions.append({"agent_name": agent_name})
+        if success is not None:
+            conditions.append({"success": success})
+        if task_type:
+            conditions.append({"task_type": task_type})
+        if since is not None:
+            conditions.append({"timestamp_unix": {"$gte": ExecutionLogManager._to_unix_time(since)}})
+        if until is not None:
+            conditions.append({"timestamp_unix": {"$lte": ExecutionLogManager._to_unix_time(until)}})
+        if stored_since is not None:
+            conditions.append({"stored_unix": {"$gte": float(stored_since)}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    @staticmethod
+    def _to_unix_time(value: Any) -> float:
+        """把 datetime / ISO字符串 / 数字 统一转换为Unix时间戳"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return value.timestamp()
+
+    async def _flush_pending_writes(self):
+        """读取前写入队列中尚未入库的执行记录并等待后台索引更新，保证能读到自己的写入"""
+        await memory_write_queue.flush(self.execution_memory)
+        await self._wait_index_tasks()
+
+    def _get_collection(self):
+        """获取底层 Chroma 集合（直接使用ChromaDB查询，绕过AutoGen的bug）"""
+        # 在访问底层集合前确保已初始化
+        try:
+            self.execution_memory._ensure_initialized()
+        except Exception as e:
+            print(f"⚠️ 确保执行内存集合初始化失败: {e}")
+        collection = self.execution_memory._collection
+        if collection is None:
+            raise RuntimeError("Chroma collection is not initialized")
+        return collection
+
+    def _backfill_timestamp_index(self):
+        """为旧记录补写数值时间戳 timestamp_unix，使时间范围过滤可以下推到 Chroma（只执行一次）"""
+        marker = memory_config.execution_logs_path / ".timestamp_unix_v1"
+        if marker.exists():
+            return
+
+        collection = self._get_collection()
+        page_size = 500
+        offset = 0
+        updated = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            ids_to_update, metadatas_to_update = [], []
+            for doc_id, meta in zip(page['ids'], page['metadatas']):
+                if meta and "timestamp_unix" not in meta and meta.get("timestamp"):
+                    try:
+                        unix_time = self._to_unix_time(meta["timestamp"])
+                    except (TypeError, ValueError):
+                        continue
+                    ids_to_update.append(doc_id)
+                    metadatas_to_update.append({**meta, "timestamp_unix": unix_time})
+            if ids_to_update:
+                collection.update(ids=ids_to_update, metadatas=metadatas_to_update)
+                updated += len(ids_to_update)
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+
+        marker.touch()
+        if updated:
+            print(f"🕒 已为 {updated} 条旧执行记录补写时间戳索引")
     
     async def get_error_solutions(self, error_description: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """获取错误解决方案"""
-        # 尝试多种查询策略
-        queries = [
-            f"error solution: {error_description}",
-            f"Error: {error_description}",
-            error_description,
-            f"failure {error_description}"
-        ]
+        """获取错误解决方案（成功记录中的全文 + 向量混合检索）"""
+        return await self.hybrid_search(error_description, top_k=top_k, success=True)
+
+    async def hybrid_search(self,
+                            query: str,
+                            top_k: int = 5,
+                            success: Optional[bool] = None,
+                            agent_name: Optional[str] = None) -> List[MemoryContent]:
+        """
+        全文（BM25）+ 向量混合检索，按倒数排名融合（RRF）排序
+
+        异常名、文件路径等精确词由全文索引命中，语义相近的描述由向量索引命中，
+        两路各取 hybrid_candidates 条候选，融合分数为 Σ 1/(k + 排名)。
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        candidates = max(top_k, memory_config.hybrid_candidates)
+        rrf_k = memory_config.hybrid_rrf_k
+
+        try:
+            await self._flush_pending_writes()
+            collection = await memory_executor.run(self._get_collection)
+            where = self.build_where_filter(agent_name=agent_name, success=success)
 
-        all_results = []
-        for query in queries:
-            results = await self.get_similar_executions(
-                query=query, 
-                success_only=True,
-                top_k=top_k
+            vector_results, lexical_ids = await asyncio.gather(
+                memory_executor.run(
+                    collection.query, query_texts=[query], n_results=candidates, where=where
+                ),
+                memory_executor.run(
+                    self.lexical_index.search, query, candidates, success, agent_name
+                )
             )
-            all_results.extend(results)
-
-        # 去重并返回
-        seen_ids = set()
-        unique_results = []
-        for result in all_results:
-            result_id = result.metadata.get('id')
-            if result_id and result_id not in seen_ids:
-                seen_ids.add(result_id)
-                unique_results.append(result)
-
-        return unique_results[:top_k]
+            vector_ids = vector_results['ids'][0]
+
+            scores: Dict[str, float] = {}
+            for rank, doc_id in enumerate(vector_ids, start=1):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+            for rank, doc_id in enumerate(lexical_ids, start=1):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+
+            top_ids = sorted(scores, key=scores.get, reverse=True)[:top_k]
+            if not top_ids:
+                return []
+
+            # 向量结果已带文档，只为仅由全文命中的记录补取文档
+            found = {
+                doc_id: (doc, meta)
+                for doc_id, doc, meta in zip(vector_ids, vector_results['documents'][0], vector_results['metadatas'][0])
+            }
+            missing = [doc_id for doc_id in top_ids if doc_id not in found]
+            if missing:
+                page = await memory_executor.run(collection.get, ids=missing, include=["metadatas", "documents"])
+                for doc_id, doc, meta in zip(page['ids'], page['documents'], page['metadatas']):
+                    found[doc_id] = (doc, meta)
+
+            vector_ranks = {doc_id: rank for rank, doc_id in enumerate(vector_ids, start=1)}
+            lexical_ranks = {doc_id: rank for rank, doc_id in enumerate(lexical_ids, start=1)}
+            results = []
+            for doc_id in top_ids:
+                if doc_id not in found:
+                    continue  # 全文索引中残留的已删除记录
+                doc, meta = found[doc_id]
+                results.append(MemoryContent(
+                    content=doc,
+                    mime_type=MemoryMimeType.TEXT,
+                    metadata={
+                        **(meta or {}),
+                        'id': doc_id,
+                        'rrf_score': scores[doc_id],
+                        'vector_rank': vector_ranks.get(doc_id),
+                        'lexical_rank': lexical_ranks.get(doc_id)
+                    }
+                ))
+
+            print(f"🔍 混合检索结果: 找到 {len(results)} 条记录")
+            return results
+
+        except Exception as e:
+            print(f"❌ 混合检索执行记录失败: {e}")
+            return []
+
+    async def _sync_lexical_index(self):
+        """全文索引与集合记录数不一致时（首次启用或异常退出后）从集合重建"""
+        collection = await memory_executor.run(self._get_collection)
+        stored_count = await memory_executor.run(collection.count)
+        indexed_count = await memory_executor.run(self.lexical_index.count)
+        if stored_count == indexed_count or not self.lexical_index.available:
+            return
+
+        await memory_executor.run(self.lexical_index.clear)
+        async for page in self.iter_executions(include_content=True):
+            entries = [(record.metadata['id'], record.content, record.metadata) for record in page]
+            await memory_executor.run(self.lexical_index.add, entries)
+        print(f"🔤 已重建执行记录全文索引: {stored_count} 条")
     
     def _classify_task(self, task_description: str) -> str:
         """分类任务类型"""
@@ -214,6 +742,9 @@ class ExecutionLogManager:
 
     async def close(self):
         """关闭memory连接"""
+        await self._wait_index_tasks()
+        self.stats_store.save(force=True)
+        self.lexical_index.close()
         if self.execution_memory:
             await self.execution_memory.close()
 
@@ -0,0 +1,330 @@
+"""
+共享嵌入模型服务
+
+执行日志、Agent通信和单元测试Memory原先各自配置一份 paraphrase-multilingual-MiniLM-L12-v2，
+同一进程内可能重复加载多次模型。这里提供进程级单例：首次使用时加载（也可以启动时预加载），
+并按 文本哈希 → 向量 做内存LRU + 磁盘缓存，"Agent: X\\nTask: ..." 这类高度重复的日志内容不再重复编码。
+磁盘缓存按最近访问时间做LRU淘汰，保留策略执行时还会清理长期未访问的条目。
+
+推理后端可选：
+- torch: 原始fp32模型
+- torch-int8: 对Linear层做动态int8量化
+- onnx: ONNX Runtime 推理（需要 sentence-transformers>=3.2 和 onnxruntime，可指定量化后的onnx文件）
+
+磁盘缓存精度可选 float32 / float16 / int8，只影响磁盘缓存文件的体积（float16 约为一半，int8 约为四分之一）。
+Chroma 的HNSW索引始终以float32存储，写入集合的向量不会因此变小。
+启用磁盘缓存时，新编码的向量也按缓存精度量化再反量化后返回，保证同一文本无论是否命中缓存写入的向量都一致。
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+except ImportError:  # 兼容未提供该基类的 chromadb 版本
+    EmbeddingFunction = object
+
+
+# 支持的推理后端和向量精度
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+EMBEDDING_PRECISIONS = ("float32", "float16", "int8")
+
+
+def quantize_vector(vector: np.ndarray, precision: str) -> bytes:
+    """按精度序列化向量：int8 使用逐向量对称缩放，前4字节保存float32缩放系数"""
+    vector = np.asarray(vector, dtype=np.float32)
+    if precision == "float16":
+        return vector.astype(np.float16).tobytes()
+    if precision == "int8":
+        scale = float(np.max(np.abs(vector))) / 127 or 1.0
+        quantized = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+        return np.float32(scale).tobytes() + quantized.tobytes()
+    return vector.tobytes()
+
+
+def dequantize_vector(blob: bytes, precision: str) -> np.ndarray:
+    """反序列化 quantize_vector 的结果为float32向量"""
+    if precision == "float16":
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    if precision == "int8":
+        scale = np.frombuffer(blob[:4], dtype=np.float32)[0]
+        return np.frombuffer(blob[4:], dtype=np.int8).astype(np.float32) * scale
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingService:
+    """进程内共享的嵌入模型服务"""
+
+    def __init__(self,
+                 model_name: str,
+                 cache_size: int = 4096,
+                 cache_path: Optional[Path] = None,
+                 disk_cache_max_entries: Optional[int] = None,
+                 backend: str = "torch",
+                 cache_precision: str = "float32",
+                 onnx_file: Optional[str] = None):
+        """
+        初始化嵌入服务（不会立即加载模型）
+
+        Args:
+            model_name: SentenceTransformer 模型名称
+            cache_size: 内存LRU缓存的向量条数
+            cache_path: 磁盘缓存SQLite文件路径，为None时只使用内存缓存
+            disk_cache_max_entries: 磁盘缓存条数上限，超出后按最近访问时间淘汰，为None时不限制
+            backend: 推理后端，见 EMBEDDING_BACKENDS
+            cache_precision: 磁盘缓存的存储精度，见 EMBEDDING_PRECISIONS（不影响Chroma中向量的存储）
+            onnx_file: onnx后端使用的模型文件（如 "onnx/model_qint8_avx512.onnx"），为None时使用默认导出
+        """
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"不支持的嵌入后端: {backend}，可选 {EMBEDDING_BACKENDS}")
+        if cache_precision not in EMBEDDING_PRECISIONS:
+            raise ValueError(f"不支持的缓存精度: {cache_precision}，可选 {EMBEDDING_PRECISIONS}")
+
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.disk_cache_max_entries = disk_cache_max_entries
+        self.backend = backend
+        self.cache_precision = cache_precision
+        self.onnx_file = onnx_file
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "encoded": 0, "disk_evictions": 0}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def preload(self):
+        """预加载模型（同步，建议在Memory执行器中调用）"""
+        self._get_model()
+
+    def embed(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """计算一批文本的向量，命中缓存的文本不再编码，未命中的一次批量编码"""
+        keys = [self._cache_key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        with self._cache_lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    vectors[key] = vector
+                    self.stats["memory_hits"] += 1
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            for key, vector in self._load_from_disk(missing).items():
+                vectors[key] = vector
+                self.stats["disk_hits"] += 1
+            self._remember(vectors, missing)
+
+        to_encode = {}
+        for text, key in zip(texts, keys):
+            if key not in vectors:
+                to_encode.setdefault(key, text)
+        if to_encode:
+            encoded = self._get_model().encode(list(to_encode.values()), convert_to_numpy=True)
+            if self.cache_path is not None:
+                # 与之后从磁盘缓存读出的向量保持一致
+                new_vectors = {
+                    key: dequantize_vector(quantize_vector(vector, self.cache_precision), self.cache_precision)
+                    for key, vector in zip(to_encode, encoded)
+                }
+            else:
+                new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(to_encode, encoded)}
+            self.stats["encoded"] += len(new_vectors)
+            vectors.update(new_vectors)
+            self._remember(vectors, list(new_vectors))
+            self._save_to_disk(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "cache_precision": self.cache_precision,
+            "model_loaded": self.is_loaded,
+            "memory_cache_entries": len(self._cache),
+            **self.stats
+        }
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    print(f"🧠 加载嵌入模型: {self.model_name} (后端 {self.backend})")
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "onnx":
+            model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+            return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+
+        model = SentenceTransformer(self.model_name, device="cpu" if self.backend == "torch-int8" else None)
+        if self.backend == "torch-int8":
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def _cache_key(self, text: str) -> str:
+        variant = f"{self.model_name}|{self.backend}|{self.onnx_file or ''}|{self.cache_precision}"
+        return hashlib.sha256(f"{variant}\n{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, vectors: Dict[str, np.ndarray], keys: List[str]):
+        """写入内存LRU缓存"""
+        with self._cache_lock:
+            for key in keys:
+                if key in vectors:
+                    self._cache[key] = vectors[key]
+                    self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _get_disk(self) -> Optional[sqlite3.Connection]:
+        if self.cache_path is None:
+            return None
+        if self._disk is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._disk.execute("PRAGMA table_info(embeddings)")}
+            if "last_access" not in columns:
+                # 旧版本缓存没有访问时间，视为最久未访问，最先被淘汰
+                self._disk.execute("ALTER TABLE embeddings ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)")
+            self._disk.commit()
+        return self._disk
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        with self._cache_lock:
+            disk = self._get_disk()
+            if disk is None or not keys:
+                return {}
+            placeholders = ",".join("?" * len(keys))
+            rows = disk.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys).fetchall()
+            if rows:
+                hit_keys = [key for key, _ in rows]
+                disk.execute(
+                    f"UPDATE embeddings SET last_access = ? WHERE key IN ({','.join('?' * len(hit_keys))})",
+                    [time.time(), *hit_keys]
+                )
+                disk.commit()
+        return {key: dequantize_vector(blob, self.cache_precision) for key, blob in rows}
+
+    def _save_to_disk(self, vectors: Dict[str, np.ndarray]):
+        with self._cache_lock:
+            disk = self._get_disk()
+            if disk is None:
+                return
+            now = time.time()
+            disk.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, quantize_vector(vector, self.cache_precision), now) for key, vector in vectors.items()]
+            )
+            self._prune_locked(disk, self.disk_cache_max_entries, None)
+            disk.commit()
+
+    def prune_disk_cache(self, max_age_days: Optional[float] = None, vacuum: bool = False) -> int:
+        """
+        清理磁盘缓存：淘汰超出条数上限的最久未访问条目，以及超过 max_age_days 天未访问的条目
+
+        Args:
+            max_age_days: 删除超过该天数未访问的条目，为None时只按条数上限淘汰
+            vacuum: 清理后执行 VACUUM 回收文件空间
+
+        Returns:
+            删除的条目数
+        """
+        with self._cache_lock:
+            disk = self._get_disk()
+            if disk is None:
+                return 0
+            removed = self._prune_locked(disk, self.disk_cache_max_entries, max_age_days)
+            disk.commit()
+            if vacuum:
+                disk.execute("VACUUM")
+            return removed
+
+    def _prune_locked(self, disk: sqlite3.Connection, max_entries: Optional[int], max_age_days: Optional[float]) -> int:
+        """在已持有缓存锁时删除过期和超出上限的条目"""
+        removed = 0
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 24 * 3600
+            removed += disk.execute("DELETE FROM embeddings WHERE last_access < ?", (cutoff,)).rowcount
+        if max_entries is not None:
+            overflow = disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - max_entries
+            if overflow > 0:
+                removed += disk.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+        self.stats["disk_evictions"] += removed
+        return removed
+
+    def close(self):
+        """关闭磁盘缓存连接"""
+        with self._cache_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+
+class SharedEmbeddingFunction(EmbeddingFunction):
+    """Chroma 嵌入函数适配器，所有集合共用同一个嵌入服务"""
+
+    def __init__(self, service: Optional[EmbeddingService] = None):
+        self._service = service
+
+    def __call__(self, input: Sequence[str]) -> List[np.ndarray]:
+        service = self._service or get_embedding_service()
+        return service.embed(list(input))
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """获取进程级嵌入服务单例"""
+    global _embedding_service
+    if _embedding_service is None:
+        with _service_lock:
+            if _embedding_service is None:
+                from .memory_config import memory_config
+                _embedding_service = EmbeddingService(
+                    model_name=memory_config.embedding_model_name,
+                    cache_size=memory_config.embedding_cache_size,
+                    cache_path=memory_config.embedding_cache_path if memory_config.embedding_disk_cache else None,
+                    disk_cache_max_entries=memory_config.embedding_disk_cache_max_entries,
+                    backend=memory_config.embedding_backend,
+                    cache_precision=memory_config.embedding_cache_precision,
+                    onnx_file=memory_config.embedding_onnx_file
+                )
+    return _embedding_service
+
+
+def create_shared_embedding_function() -> SharedEmbeddingFunction:
+    """供 CustomEmbeddingFunctionConfig 调用的工厂函数"""
+    return SharedEmbeddingFunction()
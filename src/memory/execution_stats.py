@@ -0,0 +1,158 @@
+"""
+执行记录统计聚合
+
+在 record_execution 写入时增量维护统计计数（总数、按Agent/任务类型的成功失败数、耗时直方图、时间范围），
+持久化到执行日志目录下的JSON边车文件，读取统计信息为O(1)，且不受分页/记录数上限影响。
+数据版本变化后读取时与集合记录数核对，不一致（例如上次异常退出未保存）时从集合全量重建。
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+# 耗时直方图的桶上界（秒），最后一个桶收集超过最大上界的记录
+DURATION_BUCKETS = [1, 5, 10, 30, 60, 120, 300, 600]
+
+
+def _bucket_label(duration: float) -> str:
+    for upper in DURATION_BUCKETS:
+        if duration <= upper:
+            return f"<={upper}s"
+    return f">{DURATION_BUCKETS[-1]}s"
+
+
+def _empty_counter() -> Dict[str, Any]:
+    return {"total": 0, "success": 0, "failure": 0, "duration_sum": 0.0, "duration_histogram": {}}
+
+
+class ExecutionStatsStore:
+    """执行记录统计聚合（边车文件持久化）"""
+
+    def __init__(self, path: Path, save_interval: float = 2.0):
+        """
+        初始化统计存储
+
+        Args:
+            path: 边车JSON文件路径
+            save_interval: 两次落盘的最小间隔（秒），关闭时强制落盘
+        """
+        self.path = Path(path)
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        # 串行化落盘：后取的快照一定后写入，不会被较旧的快照覆盖
+        self._write_lock = threading.Lock()
+        self._data = self._empty()
+        self._dirty = False
+        self._last_saved = 0.0
+        self._load()
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            "version": 1,
+            **_empty_counter(),
+            "agents": {},
+            "task_types": {},
+            "earliest": None,
+            "latest": None
+        }
+
+    @property
+    def total(self) -> int:
+        return self._data["total"]
+
+    def record(self, agent_name: str, task_type: str, success: bool, duration: float, timestamp: Optional[str]):
+        """累加一条执行记录"""
+        with self._lock:
+            self._accumulate(agent_name, task_type, success, duration, timestamp)
+            self._dirty = True
+
+    def rebuild(self, metadatas: Iterable[Dict[str, Any]]):
+        """从执行记录的metadata全量重建统计"""
+        with self._lock:
+            self._data = self._empty()
+            for meta in metadatas:
+                self._accumulate(
+                    meta.get("agent_name", "Unknown"),
+                    meta.get("task_type", "general"),
+                    bool(meta.get("success", False)),
+                    float(meta.get("duration", 0) or 0),
+                    meta.get("timestamp")
+                )
+            self._dirty = True
+        self.save(force=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前统计的副本"""
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def save(self, force: bool = False):
+        """
+        落盘（未到最小间隔时跳过，force=True 时立即写入）
+
+        先写同目录下的唯一临时文件再替换，避免写坏，也避免多个执行器线程或进程共用同一个临时文件；
+        取快照、写入和替换都在落盘锁内完成，统计锁只在取快照时持有，不阻塞记录写入。
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty or (not force and time.time() - self._last_saved < self.save_interval):
+                    return
+                content = json.dumps(self._data, ensure_ascii=False)
+                self._dirty = False
+                self._last_saved = time.time()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+
+    def reload(self):
+        """重新读取边车文件（其他进程写入执行记录后同步统计）"""
+        with self._lock:
+            self._data = self._empty()
+            self._dirty = False
+        self._load()
+
+    def _accumulate(self, agent_name: str, task_type: str, success: bool, duration: float, timestamp: Optional[str]):
+        bucket = _bucket_label(duration)
+        agents = self._data["agents"]
+        task_types = self._data["task_types"]
+        for counter in (self._data,
+                        agents.setdefault(agent_name, _empty_counter()),
+                        task_types.setdefault(task_type, _empty_counter())):
+            counter["total"] += 1
+            counter["success" if success else "failure"] += 1
+            counter["duration_sum"] += duration
+            counter["duration_histogram"][bucket] = counter["duration_histogram"].get(bucket, 0) + 1
+
+        if timestamp:
+            if self._data["earliest"] is None or timestamp < self._data["earliest"]:
+                self._data["earliest"] = timestamp
+            if self._data["latest"] is None or timestamp > self._data["latest"]:
+                self._data["latest"] = timestamp
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                self._data = data
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取执行统计文件失败，将重建: {e}")
@@ -0,0 +1,71 @@
+"""
+Memory执行器
+
+Chroma 的查询/写入和 SentenceTransformer 编码都是同步阻塞调用，
+统一放到专用线程池中执行，避免阻塞同时驱动LLM流式输出和MCP stdio通信的事件循环。
+同时限制进行中和排队中的调用数量：超过上限时调用方异步等待（背压），
+多个并发工作流共享执行器时不会互相卡住事件循环。
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .memory_config import memory_config
+
+
+class MemoryExecutor:
+    """Memory阻塞调用执行器"""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 线程池大小（同时执行的阻塞调用数）
+            max_pending: 已提交（执行中+排队中）调用数上限，超出时调用方等待
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.stats = {"submitted": 0, "waited": 0}
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行阻塞函数并等待结果"""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            self.stats["waited"] += 1
+
+        async with semaphore:
+            self.stats["submitted"] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池（下次调用时重新创建）"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="memory-io")
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量绑定事件循环，换了事件循环（如多次 asyncio.run）时重新创建
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+
+# 全局实例
+memory_executor = MemoryExecutor(
+    max_workers=memory_config.executor_workers,
+    max_pending=memory_config.executor_max_pending
+)
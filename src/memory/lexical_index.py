@@ -0,0 +1,178 @@
+"""
+执行日志词法索引
+
+异常名、文件路径、测试函数名这类错误字符串在向量检索中匹配效果差，
+这里在 SQLite FTS5 中为执行记录文档建立全文索引（BM25排序），与向量检索结果做倒数排名融合（RRF）。
+优先使用 trigram 分词器（支持中文和任意子串匹配），SQLite 版本过低时回退到 unicode61。
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 查询词：标识符、路径、异常名以及中文片段
+_TOKEN_PATTERN = re.compile(r"[\w.:/\\-]+")
+_MAX_QUERY_TOKENS = 32
+
+
+class LexicalIndex:
+    """基于 SQLite FTS5 的执行记录全文索引"""
+
+    def __init__(self, path: Path):
+        """
+        初始化索引（首次使用时才打开数据库）
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = Path(path)
+        self.tokenizer: Optional[str] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.available = True
+
+    def add(self, entries: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """写入或替换记录：(ID, 文档, metadata)"""
+        entries = list(entries)
+        if not entries:
+            return
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            self._delete_rows(connection, [doc_id for doc_id, _, _ in entries])
+            for doc_id, document, metadata in entries:
+                cursor = connection.execute(
+                    "INSERT INTO entries (doc_id, agent_name, success) VALUES (?, ?, ?)",
+                    (doc_id, metadata.get("agent_name"), 1 if metadata.get("success") else 0)
+                )
+                connection.execute("INSERT INTO documents (rowid, content) VALUES (?, ?)", (cursor.lastrowid, document))
+            connection.commit()
+
+    def delete(self, doc_ids: Sequence[str]):
+        """删除记录"""
+        with self._lock:
+            connection = self._connect()
+            if connection is None or not doc_ids:
+                return
+            self._delete_rows(connection, doc_ids)
+            connection.commit()
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute("DELETE FROM documents")
+            connection.execute("DELETE FROM entries")
+            connection.commit()
+
+    def count(self) -> int:
+        """索引中的记录数"""
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return 0
+            return connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def search(self,
+               query: str,
+               limit: int = 50,
+               success: Optional[bool] = None,
+               agent_name: Optional[str] = None) -> List[str]:
+        """
+        BM25 检索，返回按相关度排序的记录ID
+
+        查询文本拆分为标识符/路径/中文片段，任一片段命中即参与排序。
+        """
+        match = self.build_match_query(query, min_length=3 if self.tokenizer == "trigram" else 1)
+        if not match:
+            return []
+
+        sql = ("SELECT entries.doc_id FROM documents JOIN entries ON entries.rowid = documents.rowid "
+               "WHERE documents MATCH ?")
+        params: List[Any] = [match]
+        if success is not None:
+            sql += " AND entries.success = ?"
+            params.append(1 if success else 0)
+        if agent_name:
+            sql += " AND entries.agent_name = ?"
+            params.append(agent_name)
+        sql += " ORDER BY documents.rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return []
+            try:
+                return [row[0] for row in connection.execute(sql, params).fetchall()]
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ 全文检索失败: {e}")
+                return []
+
+    @staticmethod
+    def build_match_query(text: str, min_length: int = 1) -> str:
+        """把自由文本转换为 FTS5 MATCH 表达式（各片段加引号后 OR 连接）"""
+        tokens = []
+        for token in _TOKEN_PATTERN.findall(text or ""):
+            token = token.strip(".:/\\-")
+            if len(token) >= min_length and token not in tokens:
+                tokens.append(token)
+        tokens = tokens[:_MAX_QUERY_TOKENS]
+        return " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @staticmethod
+    def _delete_rows(connection: sqlite3.Connection, doc_ids: Sequence[str]):
+        # 通过普通表的唯一索引定位rowid，避免在FTS表中按非索引列全表扫描
+        for doc_id in doc_ids:
+            row = connection.execute("SELECT rowid FROM entries WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row:
+                connection.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+                connection.execute("DELETE FROM entries WHERE rowid = ?", (row[0],))
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._connection is not None or not self.available:
+            return self._connection
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        # entries 保存记录ID和过滤字段，rowid 与全文表一一对应
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "rowid INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, agent_name TEXT, success INTEGER)"
+        )
+        for tokenizer in ("trigram", "unicode61 tokenchars '_'"):
+            try:
+                connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+                    f"content, tokenize = \"{tokenizer}\")"
+                )
+                self.tokenizer = tokenizer.split()[0]
+                break
+            except sqlite3.OperationalError:
+                continue
+        else:
+            # 当前 SQLite 未编译 FTS5，只使用向量检索
+            print("⚠️ SQLite 不支持 FTS5，错误解决方案检索只使用向量索引")
+            connection.close()
+            self.available = False
+            return None
+
+        # 已存在的表沿用创建时的分词器
+        row = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'documents'").fetchone()
+        if row and "trigram" not in row[0]:
+            self.tokenizer = "unicode61"
+        connection.commit()
+        self._connection = connection
+        return connection
@@ -14,6 +14,11 @@ from autogen_ext.memory.chromadb import (
     SentenceTransformerEmbeddingFunctionConfig,
 )
 
+try:
+    from autogen_ext.memory.chromadb import CustomEmbeddingFunctionConfig
+except ImportError:  # 旧版 autogen-ext 不支持自定义嵌入函数，回退为每个集合各自加载模型
+    CustomEmbeddingFunctionConfig = None
+
 
 class MemoryConfig:
     """Memory系统配置类"""
@@ -31,9 +36,52 @@ class MemoryConfig:
         self.execution_logs_path = self.base_path / "execution_logs"
         self.agent_states_path = self.base_path / "agent_states"
         self.workflow_patterns_path = self.base_path / "workflow_patterns"
+        self.checkpoints_path = self.base_path / "checkpoints"
+        
+        # 嵌入模型：进程内共享一个模型实例，并缓存 文本哈希 → 向量
+        self.embedding_model_name = "paraphrase-multilingual-MiniLM-L12-v2"
+        self.embedding_cache_size = 4096
+        self.embedding_disk_cache = True
+        self.embedding_cache_path = self.base_path / "embedding_cache" / "embeddings.sqlite3"
+        self.embedding_disk_cache_max_entries = 100000  # 磁盘缓存条数上限，超出后按最近访问时间淘汰，None表示不限制
+        self.preload_embedding_model = False  # 为True时在初始化Memory系统时预加载模型
+        # 推理后端（torch / torch-int8 / onnx），切换前可用 embedding_benchmark.py 评估对召回率的影响
+        self.embedding_backend = "torch"
+        # 磁盘缓存的向量存储精度（float32 / float16 / int8），只缩小缓存文件；Chroma 中的向量始终为float32
+        self.embedding_cache_precision = "float32"
+        self.embedding_onnx_file = None
+        
+        # 写后批量入库：达到批量大小或时间间隔后统一计算向量并写入
+        self.write_behind = True
+        self.write_batch_size = 32
+        self.write_flush_interval = 2.0
+        
+        # Memory阻塞调用执行器：线程数和已提交调用数上限（背压）
+        self.executor_workers = 4
+        self.executor_max_pending = 64
+        
+        # 错误解决方案混合检索：全文和向量各取的候选数、倒数排名融合常数
+        self.hybrid_candidates = 50
+        self.hybrid_rrf_k = 60
+        
+        # Agent通信消息的内存索引容量：全局、每个接收方、每对Agent保留的最近消息数
+        self.message_history_retention = 1000
+        self.messages_per_recipient = 200
+        self.messages_per_pair = 200
+        
+        # 单元测试历史：内存中保留的完整记录数、持久化的运行摘要数、每个测试保留的运行结果数
+        self.unit_test_history_path = self.base_path / "unit_test_history.json"
+        self.unit_test_recent_records = 10
+        self.unit_test_recent_runs = 50
+        self.unit_test_per_test_runs = 20
+        
+        # 保留策略：定期删除超过保留天数的记忆并压缩持久化存储，None 表示不自动清理
+        self.retention_days = None
+        self.retention_interval_hours = 24.0
         
         # 创建目录
-        for path in [self.execution_logs_path, self.agent_states_path, self.workflow_patterns_path]:
+        for path in [self.execution_logs_path, self.agent_states_path, self.workflow_patterns_path,
+                     self.checkpoints_path]:
             path.mkdir(parents=True, exist_ok=True)
     
     def create_execution_memory(self) -> ChromaDBVectorMemory:
@@ -45,9 +93,7 @@ class MemoryConfig:
                 k=50,  # 返回最相关的50个结果，增加查询范围
                 score_threshold=0.0,  # 设置为0，不过滤任何结果
                 distance_metric="cosine",  # 明确指定使用余弦距离
-                embedding_function_config=SentenceTransformerEmbeddingFunctionConfig(
-                    model_name="paraphrase-multilingual-MiniLM-L12-v2"
-                ),
+                embedding_function_config=self.create_embedding_function_config(),
             )
         )
     
@@ -60,12 +106,17 @@ class MemoryConfig:
                 k=3,  # 返回最相关的3个工作流模式
                 score_threshold=0.0,  # 设置为0，不过滤任何结果
                 distance_metric="cosine",  # 明确指定使用余弦距离
-                embedding_function_config=SentenceTransformerEmbeddingFunctionConfig(
-                    model_name="paraphrase-multilingual-MiniLM-L12-v2"  # 统一使用中文模型
-                ),
+                embedding_function_config=self.create_embedding_function_config(),  # 统一使用中文模型
             )
         )
     
+    def create_embedding_function_config(self):
+        """创建嵌入函数配置：优先使用进程内共享的带缓存嵌入服务"""
+        if CustomEmbeddingFunctionConfig is not None:
+            from .embedding_service import create_shared_embedding_function
+            return CustomEmbeddingFunctionConfig(function=create_shared_embedding_function, params={})
+        return SentenceTransformerEmbeddingFunctionConfig(model_name=self.embedding_model_name)
+    
     def get_agent_state_path(self, agent_name: str) -> Path:
         """获取Agent状态文件路径"""
         return self.agent_states_path / f"{agent_name}_state.json"
@@ -5,15 +5,21 @@ Memory管理工具
 """
 
 import json
+import base64
+import time
+import sqlite3
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
 from autogen_core.memory import MemoryContent, MemoryMimeType
 
-from .base_memory_manager import execution_log_manager, agent_state_manager
+from .base_memory_manager import ExecutionLogManager, execution_log_manager, agent_state_manager
+from .agent_communication_memory import agent_communication_memory
 from .memory_config import memory_config
+from .write_queue import memory_write_queue
+from .executor import memory_executor
 
 
 class MemoryManager:
@@ -32,16 +38,17 @@ class MemoryManager:
     # 查看和搜索功能
     # ================================
     
-    async def list_all_memories(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """列出所有记忆"""
+    async def list_all_memories(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """分页列出记忆（最新的在前）"""
         try:
-            # 使用通用查询获取所有记录
-            all_records = await self.execution_log_manager.get_similar_executions("Agent", top_k=1000)  # 获取所有记录
+            records = await self.execution_log_manager.scan_executions(
+                offset=offset, limit=limit, newest_first=True
+            )
             
             memories = []
-            for i, record in enumerate(all_records[:limit]):
+            for i, record in enumerate(records):
                 memory_info = {
-                    "index": i + 1,
+                    "index": offset + i + 1,
                     "id": record.metadata.get("id", "unknown"),
                     "agent_name": record.metadata.get("agent_name", "Unknown"),
                     "success": record.metadata.get("success", False),
@@ -57,50 +64,93 @@ class MemoryManager:
             print(f"❌ 获取记忆列表失败: {e}")
             return []
     
+    async def list_memories_page(self, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        按游标分页列出记忆（最新的在前）
+
+        游标是上一页最后一条记录的 (timestamp_unix, id) 键，下一页从严格早于该键的记录开始，
+        翻页期间新写入或删除记录都不会导致重复或遗漏。
+
+        Returns:
+            {"items": 本页记忆, "next_cursor": 下一页游标（没有更多时为None）, "total": 记录总数}
+        """
+        before, shown = self.decode_cursor(cursor) if cursor else (None, 0)
+        # 不带过滤条件时是 collection.count()，不扫描记录
+        total = await self.execution_log_manager.count_executions()
+        # 多取一条用于判断是否还有下一页
+        records = await self.execution_log_manager.scan_executions_before(limit=limit + 1, before=before)
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        items = [
+            {
+                "index": shown + i + 1,
+                "id": record.metadata.get("id", "unknown"),
+                "agent_name": record.metadata.get("agent_name", "Unknown"),
+                "success": record.metadata.get("success", False),
+                "timestamp": record.metadata.get("timestamp", "Unknown"),
+                "duration": record.metadata.get("duration", 0),
+                "task_type": record.metadata.get("task_type", "general"),
+                "content_preview": record.content[:100] + "..." if len(record.content) > 100 else record.content
+            }
+            for i, record in enumerate(records)
+        ]
+        next_cursor = None
+        if has_more and records:
+            last = records[-1].metadata
+            next_cursor = self.encode_cursor((float(last.get("timestamp_unix") or 0), last["id"]), shown + len(records))
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "total": total
+        }
+
+    @staticmethod
+    def encode_cursor(key: Tuple[float, str], shown: int) -> str:
+        """把上一页最后一条记录的 (timestamp_unix, id) 和已显示条数编码为不透明的游标字符串"""
+        payload = {"t": key[0], "i": key[1], "n": shown}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[Tuple[float, str], int]:
+        """解析游标，返回 ((timestamp_unix, id), 已显示条数)，格式错误时抛出 ValueError"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            key, shown = (float(payload["t"]), payload["i"]), payload["n"]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+        if not isinstance(key[1], str) or not isinstance(shown, int) or shown < 0:
+            raise ValueError(f"无效的分页游标: {cursor}")
+        return key, shown
+    
     async def search_memories(self, 
                             query: str = "",
                             agent_name: Optional[str] = None,
                             success_only: Optional[bool] = None,
                             date_from: Optional[str] = None,
-                            date_to: Optional[str] = None) -> List[Dict[str, Any]]:
-        """搜索记忆"""
+                            date_to: Optional[str] = None,
+                            task_type: Optional[str] = None,
+                            limit: int = 10,
+                            offset: int = 0) -> List[Dict[str, Any]]:
+        """搜索记忆（Agent、成功状态、任务类型和日期过滤均在向量库中完成）"""
         try:
-            # 基础搜索
             records = await self.execution_log_manager.get_similar_executions(
                 query=query,
                 agent_name=agent_name,
-                success_only=success_only if success_only is not None else False
+                success_only=success_only if success_only is not None else False,
+                top_k=limit,
+                task_type=task_type,
+                since=date_from,
+                until=date_to,
+                offset=offset
             )
             
-            # 日期过滤
-            if date_from or date_to:
-                filtered_records = []
-                for record in records:
-                    timestamp_str = record.metadata.get("timestamp", "")
-                    if timestamp_str:
-                        try:
-                            record_date = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                            
-                            if date_from:
-                                from_date = datetime.fromisoformat(date_from)
-                                if record_date < from_date:
-                                    continue
-                            
-                            if date_to:
-                                to_date = datetime.fromisoformat(date_to)
-                                if record_date > to_date:
-                                    continue
-                            
-                            filtered_records.append(record)
-                        except:
-                            continue
-                records = filtered_records
-            
             # 格式化结果
             results = []
             for i, record in enumerate(records):
                 result = {
-                    "index": i + 1,
+                    "index": offset + i + 1,
                     "id": record.metadata.get("id", "unknown"),
                     "agent_name": record.metadata.get("agent_name", "Unknown"),
                     "success": record.metadata.get("success", False),
@@ -120,21 +170,19 @@ class MemoryManager:
     async def get_memory_by_id(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取特定记忆"""
         try:
-            all_records = await self.execution_log_manager.get_similar_executions("Agent", top_k=1000)  # 获取所有记录
-            
-            for record in all_records:
-                if record.metadata.get("id") == memory_id:
-                    return {
-                        "id": memory_id,
-                        "content": record.content,
-                        "metadata": record.metadata,
-                        "agent_name": record.metadata.get("agent_name", "Unknown"),
-                        "success": record.metadata.get("success", False),
-                        "timestamp": record.metadata.get("timestamp", "Unknown"),
-                        "duration": record.metadata.get("duration", 0)
-                    }
+            record = await self.execution_log_manager.get_execution_by_id(memory_id)
+            if record is None:
+                return None
             
-            return None
+            return {
+                "id": memory_id,
+                "content": record.content,
+                "metadata": record.metadata,
+                "agent_name": record.metadata.get("agent_name", "Unknown"),
+                "success": record.metadata.get("success", False),
+                "timestamp": record.metadata.get("timestamp", "Unknown"),
+                "duration": record.metadata.get("duration", 0)
+            }
         except Exception as e:
             print(f"❌ 获取记忆失败: {e}")
             return None
@@ -144,64 +192,36 @@ class MemoryManager:
     # ================================
     
     async def get_memory_statistics(self) -> Dict[str, Any]:
-        """获取记忆统计信息"""
+        """获取记忆统计信息（读取写入时增量维护的统计聚合）"""
         try:
-            all_records = await self.execution_log_manager.get_similar_executions("Agent", top_k=1000)  # 获取所有记录
+            aggregates = await self.execution_log_manager.get_statistics()
             
-            # 基础统计
-            total_count = len(all_records)
-            success_count = len([r for r in all_records if r.metadata.get("success", False)])
-            failure_count = total_count - success_count
+            total_count = aggregates["total"]
+            success_count = aggregates["success"]
             
-            # Agent统计
-            agent_stats = {}
-            task_type_stats = {}
-            
-            for record in all_records:
-                agent_name = record.metadata.get("agent_name", "Unknown")
-                task_type = record.metadata.get("task_type", "general")
-                success = record.metadata.get("success", False)
-                
-                # Agent统计
-                if agent_name not in agent_stats:
-                    agent_stats[agent_name] = {"total": 0, "success": 0, "failure": 0}
-                agent_stats[agent_name]["total"] += 1
-                if success:
-                    agent_stats[agent_name]["success"] += 1
-                else:
-                    agent_stats[agent_name]["failure"] += 1
-                
-                # 任务类型统计
-                if task_type not in task_type_stats:
-                    task_type_stats[task_type] = {"total": 0, "success": 0, "failure": 0}
-                task_type_stats[task_type]["total"] += 1
-                if success:
-                    task_type_stats[task_type]["success"] += 1
-                else:
-                    task_type_stats[task_type]["failure"] += 1
-            
-            # 时间统计
-            if all_records:
-                timestamps = [r.metadata.get("timestamp", "") for r in all_records if r.metadata.get("timestamp")]
-                if timestamps:
-                    timestamps.sort()
-                    earliest = timestamps[0]
-                    latest = timestamps[-1]
-                else:
-                    earliest = latest = "Unknown"
-            else:
-                earliest = latest = "Unknown"
+            def summarize(counters: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+                return {
+                    name: {
+                        "total": counter["total"],
+                        "success": counter["success"],
+                        "failure": counter["failure"],
+                        "avg_duration": counter["duration_sum"] / counter["total"] if counter["total"] else 0,
+                        "duration_histogram": counter["duration_histogram"]
+                    }
+                    for name, counter in counters.items()
+                }
             
             return {
                 "total_memories": total_count,
                 "success_count": success_count,
-                "failure_count": failure_count,
+                "failure_count": aggregates["failure"],
                 "success_rate": (success_count / total_count * 100) if total_count > 0 else 0,
-                "agent_statistics": agent_stats,
-                "task_type_statistics": task_type_stats,
+                "agent_statistics": summarize(aggregates["agents"]),
+                "task_type_statistics": summarize(aggregates["task_types"]),
+                "duration_histogram": aggregates["duration_histogram"],
                 "time_range": {
-                    "earliest": earliest,
-                    "latest": latest
+                    "earliest": aggregates["earliest"] or "Unknown",
+                    "latest": aggregates["latest"] or "Unknown"
                 },
                 "agent_states_count": len(self.agent_state_manager.list_saved_states())
             }
@@ -217,75 +237,90 @@ class MemoryManager:
                             output_file: str,
                             format: str = "json",
                             filter_agent: Optional[str] = None,
-                            filter_success: Optional[bool] = None) -> bool:
-        """导出记忆到文件"""
+                            filter_success: Optional[bool] = None,
+                            compression: Optional[str] = None) -> bool:
+        """
+        流式导出记忆到文件（按页读取、逐条写入，内存占用与记录数无关）
+        
+        Args:
+            output_file: 输出文件路径
+            format: json / ndjson / csv
+            filter_agent: 只导出该Agent的记忆
+            filter_success: 为True时只导出成功的记忆
+            compression: None / gzip / zstd，为None时按文件后缀（.gz / .zst）判断
+        """
         try:
-            # 获取要导出的记忆
-            if filter_agent or filter_success is not None:
-                records = await self.search_memories(
-                    agent_name=filter_agent,
-                    success_only=filter_success
-                )
-            else:
-                records = await self.list_all_memories(limit=10000)  # 导出所有
-            
-            output_path = Path(output_file)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            if format.lower() == "json":
-                export_data = {
-                    "export_time": datetime.now().isoformat(),
-                    "total_count": len(records),
-                    "filter_agent": filter_agent,
-                    "filter_success": filter_success,
-                    "memories": records
-                }
-                
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, indent=2, ensure_ascii=False)
-            
-            elif format.lower() == "csv":
-                import csv
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    if records:
-                        fieldnames = records[0].keys()
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        for record in records:
-                            # 处理复杂字段
-                            row = record.copy()
-                            for key, value in row.items():
-                                if isinstance(value, (dict, list)):
-                                    row[key] = json.dumps(value, ensure_ascii=False)
-                            writer.writerow(row)
-            
-            print(f"✅ 成功导出 {len(records)} 条记忆到 {output_file}")
+            count, _ = await self._stream_export(
+                Path(output_file),
+                format=format,
+                compression=compression,
+                agent_name=filter_agent,
+                success=True if filter_success else None
+            )
+            print(f"✅ 成功导出 {count} 条记忆到 {output_file}")
             return True
             
         except Exception as e:
             print(f"❌ 导出记忆失败: {e}")
             return False
     
-    async def backup_all_data(self, backup_dir: str) -> bool:
-        """备份所有Memory数据"""
+    async def backup_all_data(self,
+                            backup_dir: str,
+                            incremental: bool = True,
+                            compression: Optional[str] = "gzip",
+                            overlap_seconds: float = 300.0) -> bool:
+        """
+        备份Memory数据
+        
+        执行记录按实际入库时间（stored_unix）增量备份：只导出上次备份开始之后入库的记录（首次为全量）。
+        重放的溢出记录、其他进程稍后写入的记录虽然事件时间较早，入库时间仍在高水位之后，不会漏备份。
+        每次从高水位往前多扫描 overlap_seconds（覆盖各进程时钟偏差和写入中的批次），
+        重叠窗口内已备份过的记录按ID去重。
+        备份目录下的 backup_state.json 记录高水位、重叠窗口内已备份的记录ID和历次备份文件。
+        
+        Args:
+            backup_dir: 备份目录
+            incremental: 为False时忽略高水位做全量备份
+            compression: None / gzip / zstd
+            overlap_seconds: 增量备份时往前重叠扫描的秒数
+        """
         try:
             backup_path = Path(backup_dir)
             backup_path.mkdir(parents=True, exist_ok=True)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            state_file = backup_path / "backup_state.json"
+            state = {"stored_mark": None, "boundary_ids": [], "backups": []}
+            if state_file.exists():
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    state = {**state, **json.load(f)}
+            
+            # 旧版本按事件时间记录的高水位（high_water_mark）可能漏掉晚入库的记录，不再沿用，先做一次全量备份
+            stored_mark = state.get("stored_mark") if incremental else None
+            kind = "incremental" if stored_mark is not None else "full"
+            backed_up_ids = set(state.get("boundary_ids", [])) if kind == "incremental" else set()
+            
+            # 本次备份开始前入库的记录都会被扫描到，下次从这里（再往前重叠一段）继续
+            started = time.time()
             
-            # 备份执行记忆
-            await self.export_memories(
-                output_file=str(backup_path / f"execution_memories_{timestamp}.json"),
-                format="json"
+            # 备份执行记忆（NDJSON，高水位之后入库的记录）
+            suffix = {"gzip": ".gz", "zstd": ".zst"}.get(compression, "")
+            records_file = backup_path / f"execution_memories_{timestamp}_{kind}.ndjson{suffix}"
+            count, boundary_ids = await self._stream_export(
+                records_file,
+                format="ndjson",
+                compression=compression,
+                skip_ids=backed_up_ids,
+                track_stored_since=started - overlap_seconds,
+                stored_since=stored_mark - overlap_seconds if stored_mark is not None else None
             )
             
             # 备份Agent状态
             states_backup = {}
             for agent_name in self.agent_state_manager.list_saved_states():
-                state = await self.agent_state_manager.load_agent_state(agent_name)
-                if state:
-                    states_backup[agent_name] = state
+                agent_state = await self.agent_state_manager.load_agent_state(agent_name)
+                if agent_state:
+                    states_backup[agent_name] = agent_state
             
             with open(backup_path / f"agent_states_{timestamp}.json", 'w', encoding='utf-8') as f:
                 json.dump({
@@ -298,12 +333,327 @@ class MemoryManager:
             with open(backup_path / f"memory_statistics_{timestamp}.json", 'w', encoding='utf-8') as f:
                 json.dump(stats, f, indent=2, ensure_ascii=False)
             
-            print(f"✅ 完整备份完成: {backup_path}")
+            # 更新高水位和下次重叠窗口内需要去重的记录ID
+            state.pop("high_water_mark", None)
+            state["stored_mark"] = started
+            state["boundary_ids"] = sorted(boundary_ids)
+            state["backups"].append({
+                "time": datetime.now().isoformat(),
+                "type": kind,
+                "file": records_file.name,
+                "records": count
+            })
+            temp_file = state_file.with_suffix(".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2, ensure_ascii=False)
+            temp_file.replace(state_file)
+            
+            print(f"✅ {'增量' if kind == 'incremental' else '完整'}备份完成: {backup_path}（{count} 条执行记录）")
             return True
             
         except Exception as e:
             print(f"❌ 备份失败: {e}")
             return False
+    
+    async def _stream_export(self,
+                           output_path: Path,
+                           format: str = "ndjson",
+                           compression: Optional[str] = None,
+                           skip_ids: Optional[set] = None,
+                           track_stored_since: Optional[float] = None,
+                           **filters):
+        """
+        按页遍历执行记录并逐条写入文件
+        
+        Args:
+            skip_ids: 跳过这些ID的记录（已备份过）
+            track_stored_since: 收集 stored_unix 不早于该时间的记录ID（含跳过的记录）
+        
+        Returns:
+            (导出条数, 收集到的记录ID集合)
+        """
+        format = format.lower()
+        if format not in ("json", "ndjson", "csv"):
+            raise ValueError(f"不支持的导出格式: {format}")
+        
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        stream = self._open_export_stream(output_path, compression)
+        
+        count = 0
+        tracked_ids = set()
+        fieldnames = ["id", "agent_name", "success", "timestamp", "duration", "task_type", "content", "metadata"]
+        try:
+            if format == "csv":
+                import csv
+                writer = csv.DictWriter(stream, fieldnames=fieldnames)
+                writer.writeheader()
+            elif format == "json":
+                stream.write('{\n  "export_time": %s,\n  "filters": %s,\n  "memories": [' % (
+                    json.dumps(datetime.now().isoformat()),
+                    json.dumps(filters, ensure_ascii=False, default=str)
+                ))
+            
+            async for page in self.execution_log_manager.iter_executions(**filters):
+                rows = []
+                for record in page:
+                    row = self._export_row(record)
+                    stored_unix = record.metadata.get("stored_unix")
+                    if (track_stored_since is not None and isinstance(stored_unix, (int, float))
+                            and stored_unix >= track_stored_since):
+                        tracked_ids.add(row["id"])
+                    if skip_ids and row["id"] in skip_ids:
+                        continue
+                    rows.append(row)
+                
+                # 按页写入（写文件和压缩放到执行器中，不阻塞事件循环）
+                if format == "csv":
+                    for row in rows:
+                        row["metadata"] = json.dumps(row["metadata"], ensure_ascii=False, default=str)
+                    await memory_executor.run(writer.writerows, rows)
+                elif format == "ndjson":
+                    text = "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+                    await memory_executor.run(stream.write, text)
+                else:
+                    text = "".join(
+                        ("," if count + i else "") + "\n    " + json.dumps(row, ensure_ascii=False, default=str)
+                        for i, row in enumerate(rows)
+                    )
+                    await memory_executor.run(stream.write, text)
+                count += len(rows)
+            
+            if format == "json":
+                stream.write('\n  ],\n  "total_count": %d\n}\n' % count)
+        finally:
+            stream.close()
+        
+        return count, tracked_ids
+    
+    @staticmethod
+    def _export_row(record: MemoryContent) -> Dict[str, Any]:
+        """导出的单条记忆"""
+        metadata = record.metadata or {}
+        return {
+            "id": metadata.get("id", "unknown"),
+            "agent_name": metadata.get("agent_name", "Unknown"),
+            "success": metadata.get("success", False),
+            "timestamp": metadata.get("timestamp", "Unknown"),
+            "duration": metadata.get("duration", 0),
+            "task_type": metadata.get("task_type", "general"),
+            "content": record.content,
+            "metadata": metadata
+        }
+    
+    @staticmethod
+    def _open_export_stream(output_path: Path, compression: Optional[str]):
+        """打开文本输出流，支持 gzip / zstd（zstandard 为可选依赖）"""
+        if compression is None:
+            compression = {".gz": "gzip", ".zst": "zstd"}.get(output_path.suffix)
+        
+        if compression == "gzip":
+            import gzip
+            return gzip.open(output_path, "wt", encoding="utf-8", newline="")
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("zstd 压缩需要安装 zstandard: pip install zstandard")
+            import io
+            raw = open(output_path, "wb")
+            return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), encoding="utf-8", newline="")
+        if compression not in (None, "none"):
+            raise ValueError(f"不支持的压缩格式: {compression}")
+        return open(output_path, "w", encoding="utf-8", newline="")
+    
+    # ================================
+    # 保留策略和存储压缩
+    # ================================
+    
+    async def apply_retention(self,
+                            older_than_days: Optional[float] = None,
+                            agent_name: Optional[str] = None,
+                            success: Optional[bool] = None,
+                            include_workflow: bool = True,
+                            compact: bool = True,
+                            dry_run: bool = False) -> Dict[str, Any]:
+        """
+        按保留策略删除记忆并压缩持久化存储
+        
+        Args:
+            older_than_days: 删除早于该天数的记忆
+            agent_name: 只删除该Agent的记忆
+            success: True/False 时只删除成功/失败的执行记录
+            include_workflow: 同时清理工作流模式集合（Agent上下文、消息和单元测试记录，
+                              这些记录没有成功状态，指定 success 时跳过）
+            compact: 删除后对 Chroma 和嵌入缓存的SQLite文件执行 VACUUM
+            dry_run: 只统计将要删除的条数，不做任何修改
+        
+        Returns:
+            清理报告（删除条数、压缩前后字节数、回收字节数）
+        """
+        if older_than_days is None and agent_name is None and success is None:
+            raise ValueError("保留策略至少需要一个条件（天数、Agent或成功状态）")
+        
+        await self.initialize()
+        started = time.time()
+        cutoff = datetime.now() - timedelta(days=older_than_days) if older_than_days is not None else None
+        clean_workflow = include_workflow and success is None
+        store_paths = [memory_config.execution_logs_path, memory_config.workflow_patterns_path,
+                       memory_config.embedding_cache_path.parent]
+        
+        bytes_before = sum(self._directory_size(path) for path in store_paths)
+        report = {
+            "dry_run": dry_run,
+            "cutoff": cutoff.isoformat() if cutoff else None,
+            "agent_name": agent_name,
+            "success": success,
+            "deleted_executions": 0,
+            "deleted_workflow_records": 0,
+            "pruned_embeddings": 0,
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_before,
+            "bytes_reclaimed": 0
+        }
+        
+        if dry_run:
+            report["deleted_executions"] = await self.execution_log_manager.count_executions(
+                agent_name=agent_name, success=success, until=cutoff
+            )
+            if clean_workflow:
+                report["deleted_workflow_records"] = len(await self._find_workflow_records(cutoff, agent_name))
+            return report
+        
+        report["deleted_executions"] = await self.execution_log_manager.delete_executions(
+            agent_name=agent_name, success=success, until=cutoff
+        )
+        if clean_workflow:
+            report["deleted_workflow_records"] = await self._delete_workflow_records(cutoff, agent_name)
+        if older_than_days is not None and agent_name is None and success is None:
+            # 嵌入缓存按文本哈希共享，只在按天数清理全部记忆时淘汰长期未访问的向量
+            report["pruned_embeddings"] = await self._prune_embedding_cache(max_age_days=older_than_days)
+        
+        if compact:
+            await self.compact_storage()
+        
+        report["bytes_after"] = sum(self._directory_size(path) for path in store_paths)
+        report["bytes_reclaimed"] = max(0, bytes_before - report["bytes_after"])
+        report["duration"] = time.time() - started
+        
+        print(f"🧹 保留策略执行完成: 删除执行记录 {report['deleted_executions']} 条，"
+              f"工作流记录 {report['deleted_workflow_records']} 条，"
+              f"嵌入缓存 {report['pruned_embeddings']} 条，"
+              f"回收 {report['bytes_reclaimed'] / 1024 / 1024:.2f} MB")
+        return report
+    
+    async def compact_storage(self) -> int:
+        """对执行日志和工作流模式的 Chroma SQLite 文件执行 VACUUM，并淘汰、压缩嵌入缓存，返回回收的字节数"""
+        reclaimed = 0
+        cache_path = memory_config.embedding_cache_path
+        if cache_path.exists():
+            size_before = cache_path.stat().st_size
+            await self._prune_embedding_cache(vacuum=True)
+            reclaimed += max(0, size_before - cache_path.stat().st_size)
+        for store_path in [memory_config.execution_logs_path, memory_config.workflow_patterns_path]:
+            database = store_path / "chroma.sqlite3"
+            if not database.exists():
+                continue
+            size_before = database.stat().st_size
+            try:
+                await memory_executor.run(self._vacuum_sqlite, database)
+            except Exception as e:
+                print(f"⚠️ 压缩存储失败 {database}: {e}")
+                continue
+            reclaimed += max(0, size_before - database.stat().st_size)
+        return reclaimed
+    
+    async def _prune_embedding_cache(self, max_age_days: Optional[float] = None, vacuum: bool = False) -> int:
+        """淘汰嵌入磁盘缓存中超出条数上限或长期未访问的向量，返回删除条数"""
+        if not memory_config.embedding_disk_cache:
+            return 0
+        try:
+            from .embedding_service import get_embedding_service
+            return await memory_executor.run(get_embedding_service().prune_disk_cache, max_age_days, vacuum)
+        except Exception as e:
+            print(f"⚠️ 清理嵌入缓存失败: {e}")
+            return 0
+    
+    async def run_scheduled_retention(self) -> Optional[Dict[str, Any]]:
+        """
+        按配置的保留天数定期清理（距上次执行不足 retention_interval_hours 时跳过）
+        
+        Returns:
+            本次执行的清理报告，未执行时返回None
+        """
+        if memory_config.retention_days is None:
+            return None
+        
+        marker = memory_config.base_path / ".last_retention"
+        if marker.exists():
+            elapsed_hours = (time.time() - marker.stat().st_mtime) / 3600
+            if elapsed_hours < memory_config.retention_interval_hours:
+                return None
+        
+        report = await self.apply_retention(older_than_days=memory_config.retention_days)
+        marker.touch()
+        return report
+    
+    async def _find_workflow_records(self, cutoff: Optional[datetime], agent_name: Optional[str]) -> List[str]:
+        """在工作流模式集合中查找满足条件的记录ID（该集合没有数值时间戳，按页读取metadata过滤）"""
+        await agent_communication_memory.initialize()
+        memory = agent_communication_memory.communication_memory
+        await memory_write_queue.flush(memory)
+        
+        await memory_executor.run(memory._ensure_initialized)
+        collection = memory._collection
+        if collection is None:
+            return []
+        
+        cutoff_unix = cutoff.timestamp() if cutoff else None
+        matched = []
+        page_size = 500
+        offset = 0
+        while True:
+            page = await memory_executor.run(
+                collection.get, include=["metadatas"], limit=page_size, offset=offset
+            )
+            for doc_id, meta in zip(page['ids'], page['metadatas']):
+                meta = meta or {}
+                if agent_name and agent_name not in (meta.get("agent_name"), meta.get("from_agent")):
+                    continue
+                if cutoff_unix is not None:
+                    try:
+                        if ExecutionLogManager._to_unix_time(meta.get("timestamp", "")) > cutoff_unix:
+                            continue
+                    except (TypeError, ValueError):
+                        continue
+                matched.append(doc_id)
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+        return matched
+    
+    async def _delete_workflow_records(self, cutoff: Optional[datetime], agent_name: Optional[str]) -> int:
+        """删除工作流模式集合中满足条件的记录"""
+        doc_ids = await self._find_workflow_records(cutoff, agent_name)
+        collection = agent_communication_memory.communication_memory._collection
+        for start in range(0, len(doc_ids), 500):
+            await memory_executor.run(collection.delete, ids=doc_ids[start:start + 500])
+        return len(doc_ids)
+    
+    @staticmethod
+    def _vacuum_sqlite(database: Path):
+        """VACUUM 重写数据库文件，释放删除记录占用的页"""
+        connection = sqlite3.connect(str(database), timeout=30)
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def _directory_size(path: Path) -> int:
+        """目录下所有文件的总字节数"""
+        if not path.exists():
+            return 0
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
 
 
 # 全局实例
@@ -0,0 +1,281 @@
+"""
+单元测试运行历史索引
+
+保存最近若干次测试运行的摘要（环形缓冲区），以及 测试套件 → 测试名 → 最近运行结果（通过/失败、耗时、错误签名）的索引，
+持久化到JSON文件，重启后仍可用。每个测试维护窗口内的通过/失败计数和开始连续失败的运行号，
+"不稳定测试"、"从第X次运行开始失败的测试"等查询对每个测试都是O(1)。
+
+测试套件按项目输出目录区分，同一个历史文件被多个项目/任务共用时各自的测试互不影响。
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PASSED = "pass"
+FAILED = "fail"
+ERROR = "error"
+SKIPPED = "skip"
+
+DEFAULT_SUITE = "default"
+
+
+def normalize_test_name(name: str) -> str:
+    """统一测试名：去掉 unittest 详细输出中的 " ... ok" 等结果后缀"""
+    return name.split(" ... ", 1)[0].strip()
+
+
+def suite_key(location: Optional[str] = None, test_files: Optional[List[str]] = None) -> str:
+    """测试套件标识：优先使用项目目录，否则取测试文件的公共目录"""
+    if location:
+        return os.path.normpath(os.path.abspath(str(location)))
+    if test_files:
+        try:
+            common = os.path.commonpath([os.path.abspath(os.path.dirname(f) or ".") for f in test_files])
+        except ValueError:
+            common = None
+        if common:
+            return os.path.normpath(common)
+    return DEFAULT_SUITE
+
+
+def error_signature(failure: Dict[str, Any], max_length: int = 160) -> str:
+    """错误签名：优先使用报告中的失败消息，否则取详情中最后一行异常信息"""
+    message = failure.get("message") or ""
+    if not message:
+        details = failure.get("details") or []
+        for line in reversed(details):
+            if "Error" in line or "Exception" in line or "assert" in line:
+                message = line
+                break
+        else:
+            message = details[-1] if details else failure.get("type", "")
+    return " ".join(message.split())[:max_length]
+
+
+class TestHistoryIndex:
+    """单元测试运行历史索引（JSON文件持久化）"""
+
+    def __init__(self, path: Path, recent_runs: int = 50, per_test_runs: int = 20):
+        """
+        初始化索引
+
+        Args:
+            path: 持久化文件路径
+            recent_runs: 保留的最近运行摘要数
+            per_test_runs: 每个测试保留的最近运行结果数（不稳定测试按该窗口判断）
+        """
+        self.path = Path(path)
+        self.recent_runs = max(1, recent_runs)
+        self.per_test_runs = max(1, per_test_runs)
+        self._lock = threading.Lock()
+        self.runs: deque = deque(maxlen=self.recent_runs)
+        # 测试套件 → 测试名 → 运行记录
+        self.suites: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.next_run_id = 1
+        self._load()
+
+    def record_run(self,
+                   parsed_output: Dict[str, Any],
+                   agent_name: str,
+                   success: bool,
+                   duration: float,
+                   timestamp: Optional[str] = None,
+                   suite: str = DEFAULT_SUITE) -> int:
+        """
+        记录一次测试运行，返回运行号
+
+        结构化报告只给出通过数量、没有通过的测试名时，只有该套件中本次未失败的已知测试数量恰好等于通过数量，
+        才把它们视为通过；数量对不上（测试增删过）时无法判断哪些通过，不记录推断结果。
+        """
+        with self._lock:
+            tests = self.suites.setdefault(suite, {})
+            run_id = self.next_run_id
+            self.next_run_id += 1
+
+            outcomes: Dict[str, Dict[str, Any]] = {}
+            durations = parsed_output.get("test_durations", {})
+            for name in parsed_output.get("passed_tests", []):
+                name = normalize_test_name(name)
+                outcomes[name] = {"status": PASSED, "duration": durations.get(name)}
+            for name in parsed_output.get("skipped_tests", []):
+                name = normalize_test_name(name)
+                outcomes[name] = {"status": SKIPPED, "duration": durations.get(name)}
+            for status, failures in ((FAILED, parsed_output.get("failures", [])),
+                                     (ERROR, parsed_output.get("errors", []))):
+                for failure in failures:
+                    name = normalize_test_name(failure.get("test_name", ""))
+                    if name:
+                        outcomes[name] = {
+                            "status": status,
+                            "duration": durations.get(name),
+                            "signature": error_signature(failure)
+                        }
+
+            summary = parsed_output.get("test_summary", {})
+            passed_count = summary.get("passed_count")
+            if not parsed_output.get("passed_tests") and passed_count:
+                inferred = [name for name in tests if name not in outcomes]
+                if len(inferred) == passed_count:
+                    for name in inferred:
+                        outcomes[name] = {"status": PASSED, "duration": None, "inferred": True}
+
+            for name, outcome in outcomes.items():
+                self._record_test(tests, name, run_id, outcome)
+
+            self.runs.append({
+                "run_id": run_id,
+                "suite": suite,
+                "timestamp": timestamp or datetime.now().isoformat(),
+                "agent_name": agent_name,
+                "success": success,
+                "duration": duration,
+                "total": summary.get("total_tests", len(outcomes)),
+                "failed": [name for name, o in outcomes.items() if o["status"] in (FAILED, ERROR)],
+                "source": parsed_output.get("source", "text")
+            })
+            return run_id
+
+    def _record_test(self, tests: Dict[str, Dict[str, Any]], name: str, run_id: int, outcome: Dict[str, Any]):
+        entry = tests.get(name)
+        if entry is None:
+            entry = tests[name] = {
+                "runs": deque(maxlen=self.per_test_runs),
+                "recent_pass": 0,
+                "recent_fail": 0,
+                "failing_since": None,
+                "consecutive_failures": 0,
+                "last_status": None,
+                "last_signature": None,
+                "flips": 0
+            }
+
+        status = outcome["status"]
+        if status == SKIPPED:
+            return
+
+        runs = entry["runs"]
+        if len(runs) == runs.maxlen:
+            evicted = runs[0]
+            entry["recent_pass" if evicted["status"] == PASSED else "recent_fail"] -= 1
+        runs.append({"run_id": run_id, **outcome})
+        entry["recent_pass" if status == PASSED else "recent_fail"] += 1
+
+        failed = status in (FAILED, ERROR)
+        if entry["last_status"] is not None and (entry["last_status"] == PASSED) == failed:
+            entry["flips"] += 1
+        if failed:
+            if entry["failing_since"] is None:
+                entry["failing_since"] = run_id
+            entry["consecutive_failures"] += 1
+            entry["last_signature"] = outcome.get("signature")
+        else:
+            entry["failing_since"] = None
+            entry["consecutive_failures"] = 0
+        entry["last_status"] = status
+
+    # ================================
+    # 查询
+    # ================================
+
+    def flaky_tests(self, suite: str = DEFAULT_SUITE, min_flips: int = 1) -> List[Dict[str, Any]]:
+        """套件中最近窗口内既有通过又有失败的测试（按失败占比排序）"""
+        flaky = []
+        for name, entry in self.suites.get(suite, {}).items():
+            if entry["recent_pass"] and entry["recent_fail"] and entry["flips"] >= min_flips:
+                window = entry["recent_pass"] + entry["recent_fail"]
+                flaky.append({
+                    "test": name,
+                    "recent_pass": entry["recent_pass"],
+                    "recent_fail": entry["recent_fail"],
+                    "fail_rate": entry["recent_fail"] / window,
+                    "last_status": entry["last_status"],
+                    "last_signature": entry["last_signature"]
+                })
+        flaky.sort(key=lambda item: item["fail_rate"], reverse=True)
+        return flaky
+
+    def failing_since(self, suite: str = DEFAULT_SUITE, run_id: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        套件中当前仍在连续失败的测试
+
+        Args:
+            suite: 测试套件标识
+            run_id: 只返回从该运行号（含）之后开始失败的测试，为None时返回全部
+        """
+        failing = {}
+        for name, entry in self.suites.get(suite, {}).items():
+            since = entry["failing_since"]
+            if since is not None and (run_id is None or since >= run_id):
+                failing[name] = {
+                    "failing_since_run": since,
+                    "consecutive_failures": entry["consecutive_failures"],
+                    "last_signature": entry["last_signature"]
+                }
+        return failing
+
+    def test_runs(self, name: str, suite: str = DEFAULT_SUITE) -> List[Dict[str, Any]]:
+        """单个测试最近的运行记录"""
+        entry = self.suites.get(suite, {}).get(normalize_test_name(name))
+        return list(entry["runs"]) if entry else []
+
+    def recent(self, limit: int = 10, suite: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的运行摘要（suite为None时包含所有套件）"""
+        if limit <= 0:
+            return []
+        runs = [run for run in self.runs if suite is None or run.get("suite") == suite]
+        return runs[-limit:]
+
+    # ================================
+    # 持久化
+    # ================================
+
+    def save(self):
+        """写入持久化文件（先写临时文件再替换）"""
+        with self._lock:
+            content = json.dumps({
+                "version": 2,
+                "next_run_id": self.next_run_id,
+                "runs": list(self.runs),
+                "suites": {
+                    suite: {name: {**entry, "runs": list(entry["runs"])} for name, entry in tests.items()}
+                    for suite, tests in self.suites.items()
+                }
+            }, ensure_ascii=False, default=str)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, self.path)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取单元测试历史失败，将重新记录: {e}")
+            return
+
+        self.next_run_id = data.get("next_run_id", 1)
+        self.runs.extend(data.get("runs", []))
+        if "tests" in data:
+            # 旧格式的测试索引不区分项目，无法归属到具体套件，只保留运行摘要
+            print("⚠️ 单元测试历史为旧格式（未按测试套件区分），测试索引将重新记录")
+        for suite, tests in data.get("suites", {}).items():
+            loaded = self.suites[suite] = {}
+            for name, entry in tests.items():
+                runs = deque(entry.get("runs", []), maxlen=self.per_test_runs)
+                loaded[name] = {
+                    **entry,
+                    "runs": runs,
+                    # 保留窗口可能变化，按实际保留的记录重新计数
+                    "recent_pass": sum(1 for run in runs if run["status"] == PASSED),
+                    "recent_fail": sum(1 for run in runs if run["status"] != PASSED)
+                }
@@ -0,0 +1,221 @@
+"""
+结构化测试结果解析
+
+直接读取机器可读的测试结果，不再逐行猜测测试输出文本：
+- JUnit XML（pytest --junitxml、xmlrunner 等）：iterparse 流式解析，逐个 testcase 处理后释放节点
+- pytest JSON（pytest-json-report 插件的 --json-report）
+- UnitTestAgent 自己保存的 test_report.json（summary / test_files / details）
+
+解析结果与 UnitTestMemoryManager._parse_test_output 的结构一致，文本解析只作为没有结构化报告时的回退。
+无法识别为测试报告的文件（如 coverage.xml、pom.xml、没有 testcase 的XML）解析结果为None，仍走文本解析。
+"""
+
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# 用于从Agent输出中定位报告：UnitTestAgent 写出的 test_report.json（按完整文件名匹配），
+# 以及 pytest --junitxml 生成的XML（文件名不固定，按根元素确认是JUnit报告）
+REPORT_FILE_NAMES = ("test_report.json",)
+JUNIT_ROOT_TAGS = ("testsuite", "testsuites")
+
+
+def _empty_result(source: str) -> Dict[str, Any]:
+    return {
+        "source": source,
+        "test_summary": {},
+        "failures": [],
+        "errors": [],
+        "passed_tests": [],
+        "skipped_tests": [],
+        "test_durations": {},
+        "test_files_executed": [],
+        "execution_details": []
+    }
+
+
+def _finish(parsed: Dict[str, Any], total: Optional[int] = None, passed: Optional[int] = None) -> Dict[str, Any]:
+    """补全测试摘要（与文本解析的字段保持一致）"""
+    parsed["test_summary"].update({
+        "total_tests": total if total is not None else (
+            len(parsed["passed_tests"]) + len(parsed["failures"]) + len(parsed["errors"]) + len(parsed["skipped_tests"])
+        ),
+        "failures_count": len(parsed["failures"]),
+        "errors_count": len(parsed["errors"]),
+        "passed_count": passed if passed is not None else len(parsed["passed_tests"]),
+        "skipped_count": len(parsed["skipped_tests"]),
+        "files_executed": len(parsed["test_files_executed"])
+    })
+    return parsed
+
+
+def is_junit_xml(source: Union[str, Path]) -> bool:
+    """只读取根元素，判断XML文件是否为JUnit报告"""
+    try:
+        for _, element in ET.iterparse(str(source), events=("start",)):
+            return element.tag in JUNIT_ROOT_TAGS
+    except (OSError, ET.ParseError):
+        return False
+    return False
+
+
+def parse_junit_xml(source: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """流式解析 JUnit XML 报告，根元素不是 testsuite/testsuites 或没有任何 testcase 时返回None"""
+    parsed = _empty_result("junit")
+    files = []
+    testcase_count = 0
+
+    root_checked = False
+    for event, element in ET.iterparse(str(source), events=("start", "end")):
+        if event == "start":
+            # 只检查根元素，coverage.xml、pom.xml 等其他XML直接放弃
+            if not root_checked:
+                if element.tag not in JUNIT_ROOT_TAGS:
+                    return None
+                root_checked = True
+            continue
+        if element.tag != "testcase":
+            continue
+        testcase_count += 1
+
+        classname = element.get("classname", "")
+        test_name = f"{classname}.{element.get('name', '')}" if classname else element.get("name", "")
+        file_name = element.get("file")
+        if file_name and file_name not in files:
+            files.append(file_name)
+        if element.get("time"):
+            try:
+                parsed["test_durations"][test_name] = float(element.get("time"))
+            except ValueError:
+                pass
+
+        outcome = None
+        for child in element:
+            if child.tag in ("failure", "error", "skipped"):
+                outcome = child
+                break
+
+        if outcome is None:
+            parsed["passed_tests"].append(test_name)
+        elif outcome.tag == "skipped":
+            parsed["skipped_tests"].append(test_name)
+        else:
+            message = outcome.get("message") or ""
+            text = outcome.text or ""
+            parsed["failures" if outcome.tag == "failure" else "errors"].append({
+                "test_name": test_name,
+                "type": "FAIL" if outcome.tag == "failure" else "ERROR",
+                "message": message,
+                "details": [line for line in text.splitlines() if line.strip()] or [message]
+            })
+
+        # 处理完即释放，内存占用与测试数量无关
+        element.clear()
+
+    if testcase_count == 0:
+        return None
+    parsed["test_files_executed"] = files
+    return _finish(parsed)
+
+
+def parse_json_report(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """解析 pytest-json-report 或 UnitTestAgent 的 test_report.json，两种结构都不是时返回None"""
+    if not isinstance(data, dict):
+        return None
+    if isinstance(data.get("tests"), list):
+        return _parse_pytest_json(data)
+    if "summary" in data and ("details" in data or "test_files" in data):
+        return _parse_agent_json(data)
+    return None
+
+
+def _parse_pytest_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    parsed = _empty_result("pytest-json")
+    files = []
+
+    for test in data.get("tests", []):
+        node_id = test.get("nodeid", "")
+        file_name = node_id.split("::", 1)[0]
+        if file_name and file_name not in files:
+            files.append(file_name)
+        if isinstance(test.get("call"), dict) and "duration" in test["call"]:
+            parsed["test_durations"][node_id] = test["call"]["duration"]
+
+        outcome = test.get("outcome")
+        if outcome == "passed":
+            parsed["passed_tests"].append(node_id)
+        elif outcome in ("skipped", "xfailed", "xpassed"):
+            parsed["skipped_tests"].append(node_id)
+        else:
+            # 失败信息在失败的阶段（setup / call / teardown）中
+            stage = next(
+                (test.get(name) for name in ("call", "setup", "teardown")
+                 if isinstance(test.get(name), dict) and test[name].get("outcome") != "passed"),
+                {}
+            )
+            crash = stage.get("crash") or {}
+            longrepr = stage.get("longrepr") or ""
+            parsed["failures" if outcome == "failed" else "errors"].append({
+                "test_name": node_id,
+                "type": "FAIL" if outcome == "failed" else "ERROR",
+                "message": crash.get("message", ""),
+                "details": [line for line in str(longrepr).splitlines() if line.strip()] or [crash.get("message", "")]
+            })
+
+    parsed["test_files_executed"] = files
+    summary = data.get("summary", {})
+    return _finish(parsed, total=summary.get("total"), passed=summary.get("passed"))
+
+
+def _parse_agent_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    parsed = _empty_result("agent-json")
+    summary = data.get("summary", {})
+
+    for file_info in data.get("test_files", []):
+        if isinstance(file_info, dict) and file_info.get("file"):
+            parsed["test_files_executed"].append(file_info["file"])
+
+    for detail in data.get("details", []):
+        detail_type = detail.get("type", "failure")
+        message = str(detail.get("message", ""))
+        parsed["failures" if detail_type == "failure" else "errors"].append({
+            "test_name": detail.get("test", ""),
+            "type": "FAIL" if detail_type == "failure" else "ERROR",
+            "message": message.strip().splitlines()[-1] if message.strip() else "",
+            "details": [line for line in message.splitlines() if line.strip()]
+        })
+
+    # 该格式只记录通过数量，不记录通过的测试名
+    return _finish(parsed, total=summary.get("total_tests"), passed=summary.get("passed"))
+
+
+def load_structured_report(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """按文件类型加载结构化测试报告，无法识别或读取失败时返回None"""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    try:
+        if path.suffix == ".xml":
+            return parse_junit_xml(path)
+        if path.suffix == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                return parse_json_report(json.load(f))
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"⚠️ 解析结构化测试报告失败 {path}: {e}")
+    return None
+
+
+def find_report_paths(text: str) -> List[str]:
+    """在Agent输出中查找存在的测试报告文件路径（JUnit XML 优先）"""
+    found = []
+    for line in text.splitlines():
+        for token in line.split():
+            token = token.strip("'\"`()[]{}<>,;：:")
+            if token in found or not (token.endswith(".xml") or Path(token).name in REPORT_FILE_NAMES):
+                continue
+            if not Path(token).is_file() or (token.endswith(".xml") and not is_junit_xml(token)):
+                continue
+            found.append(token)
+    found.sort(key=lambda item: not item.endswith(".xml"))
+    return found
@@ -8,13 +8,18 @@ UnitTestAgent专用Memory管理器
 import asyncio
 import json
 import re
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
 from autogen_core.memory import MemoryContent, MemoryMimeType
 from .memory_config import memory_config
+from .write_queue import memory_write_queue
 from .base_memory_manager import execution_log_manager
+from .executor import memory_executor
+from .test_report_parser import load_structured_report
+from .test_history import TestHistoryIndex, suite_key
 
 
 class UnitTestMemoryManager:
@@ -25,9 +30,18 @@ class UnitTestMemoryManager:
         self.test_memory = None
         self._initialized = False
         
-        # 测试结果缓存
+        # 测试结果缓存（完整记录只在内存中保留最近几次）
         self.latest_test_results = {}
-        self.test_history = []
+        self.test_history = deque(maxlen=memory_config.unit_test_recent_records)
+        # 最近一次记录的测试套件（项目目录），历史查询默认针对该套件
+        self.current_suite = None
+        
+        # 持久化的测试运行历史索引（按测试套件、测试名）
+        self.history_index = TestHistoryIndex(
+            memory_config.unit_test_history_path,
+            recent_runs=memory_config.unit_test_recent_runs,
+            per_test_runs=memory_config.unit_test_per_test_runs
+        )
     
     async def initialize(self):
         """初始化UnitTest Memory系统"""
@@ -36,6 +50,19 @@ class UnitTestMemoryManager:
             self._initialized = True
             print("🧪 UnitTest专用Memory系统初始化完成")
     
+    def fork(self) -> "UnitTestMemoryManager":
+        """
+        创建共享底层向量存储、但拥有独立测试结果缓存的实例
+
+        用于同一进程内并发运行多个工作流时隔离各自的测试结果。
+        """
+        forked = UnitTestMemoryManager()
+        forked.test_memory = self.test_memory
+        forked._initialized = self._initialized
+        # 运行历史索引写同一个文件，各实例共用
+        forked.history_index = self.history_index
+        return forked
+    
     # ================================
     # 完整测试输出保存
     # ================================
@@ -48,18 +75,34 @@ class UnitTestMemoryManager:
                                            success: bool,
                                            duration: float,
                                            test_files: List[str] = None,
-                                           test_reports: Dict[str, Any] = None):
-        """记录完整的测试执行信息"""
+                                           test_reports: Dict[str, Any] = None,
+                                           report_path: Optional[str] = None,
+                                           project_dir: Optional[str] = None):
+        """
+        记录完整的测试执行信息
+        
+        Args:
+            project_dir: 项目输出目录，用作运行历史的测试套件标识；未提供时取测试文件的公共目录
+            report_path: 结构化测试报告（JUnit XML / pytest JSON / test_report.json）路径，
+                         提供且可解析时直接使用报告内容，否则回退为解析测试输出文本
+        """
         if not self._initialized:
             await self.initialize()
         
         timestamp = datetime.now().isoformat()
         
-        # 解析测试输出
-        parsed_output = self._parse_test_output(raw_output)
+        # 优先读取结构化测试报告
+        parsed_output = None
+        if report_path:
+            parsed_output = await memory_executor.run(load_structured_report, report_path)
+        if parsed_output is None:
+            parsed_output = self._parse_test_output(raw_output)
+        
+        suite = suite_key(project_dir, test_files)
         
         # 构建完整的测试记录
         complete_test_record = {
+            "suite": suite,
             "agent_name": agent_name,
             "task_description": task_description,
             "timestamp": timestamp,
@@ -73,6 +116,13 @@ class UnitTestMemoryManager:
             "analysis": self._analyze_test_results(parsed_output, success)
         }
         
+        # 更新运行历史索引并持久化
+        complete_test_record["run_id"] = self.history_index.record_run(
+            parsed_output, agent_name, success, duration, timestamp, suite=suite
+        )
+        self.current_suite = suite
+        await memory_executor.run(self.history_index.save)
+        
         # 更新缓存
         self.latest_test_results[agent_name] = complete_test_record
         self.test_history.append(complete_test_record)
@@ -85,8 +135,9 @@ class UnitTestMemoryManager:
         return complete_test_record
     
     def _parse_test_output(self, raw_output: str) -> Dict[str, Any]:
-        """解析测试输出，提取关键信息"""
+        """解析测试输出文本，提取关键信息（没有结构化测试报告时的回退）"""
         parsed = {
+            "source": "text",
             "test_summary": {},
             "failures": [],
             "errors": [],
@@ -237,7 +288,13 @@ class UnitTestMemoryManager:
                 "analysis": test_record["analysis"],
                 "fix_suggestions": test_record["analysis"].get("fix_suggestions", []),
                 "error_patterns": test_record["analysis"].get("error_patterns", []),
-                "detailed_recommendations": self._generate_detailed_recommendations(test_record)
+                "detailed_recommendations": self._generate_detailed_recommendations(test_record),
+                # 历史信息：区分新引入的失败、持续失败和不稳定测试
+                "test_history_insights": {
+                    "run_id": test_record.get("run_id"),
+                    "failing_tests": self.history_index.failing_since(test_record["suite"]),
+                    "flaky_tests": self.history_index.flaky_tests(test_record["suite"])[:10]
+                }
             }
             
             return refactoring_info
@@ -278,8 +335,29 @@ class UnitTestMemoryManager:
         return recommendations
     
     async def get_test_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取测试历史记录"""
-        return self.test_history[-limit:] if self.test_history else []
+        """获取测试历史记录（本进程内的完整记录）"""
+        return list(self.test_history)[-limit:] if self.test_history else []
+    
+    def _suite(self, suite: Optional[str]) -> str:
+        """历史查询使用的测试套件：未指定时为本实例最近一次记录的套件"""
+        return suite or self.current_suite or suite_key()
+    
+    def get_recent_test_runs(self, limit: int = 10, suite: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取最近的测试运行摘要（持久化，跨进程可用）"""
+        return self.history_index.recent(limit, self._suite(suite))
+    
+    def get_flaky_tests(self, min_flips: int = 1, suite: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取最近窗口内时而通过时而失败的测试"""
+        return self.history_index.flaky_tests(self._suite(suite), min_flips)
+    
+    def get_tests_failing_since(self, run_id: Optional[int] = None,
+                                suite: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """获取从指定运行号之后开始持续失败的测试"""
+        return self.history_index.failing_since(self._suite(suite), run_id)
+    
+    def get_test_run_history(self, test_name: str, suite: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取单个测试最近的运行记录"""
+        return self.history_index.test_runs(test_name, self._suite(suite))
     
     # ================================
     # 内部存储方法
@@ -316,7 +394,8 @@ Errors: {len(test_record['parsed_output']['errors'])}
 {json.dumps(test_record['analysis'], indent=2, ensure_ascii=False)}
         """.strip()
         
-        await self.test_memory.add(
+        await memory_write_queue.put(
+            self.test_memory,
             MemoryContent(
                 content=content,
                 mime_type=MemoryMimeType.TEXT,
@@ -335,6 +414,7 @@ Errors: {len(test_record['parsed_output']['errors'])}
     
     async def close(self):
         """关闭UnitTest Memory连接"""
+        self.history_index.save()
         if self.test_memory:
             await self.test_memory.close()
 
@@ -0,0 +1,286 @@
+"""
+Memory写入队列
+
+执行日志、Agent通信和单元测试记录不再在编排器主循环中逐条调用 ChromaDBVectorMemory.add
+（每条都要同步计算一次SentenceTransformer向量），而是先进入写后队列：
+按目标集合分组，达到批量大小或时间间隔后一次性 collection.add，由嵌入函数做一次批量前向计算（在Memory执行器线程池中执行）。
+清理Memory系统时强制刷新；刷新失败的记录落盘到溢出文件，下次初始化时重放。
+每批记录写入时在metadata中记下实际入库时间 stored_unix（重放的记录为重放时间），增量备份按它判断哪些记录是新写入的。
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from autogen_core.memory import MemoryContent
+
+from .memory_config import memory_config
+from .executor import memory_executor
+
+
+class MemoryWriteQueue:
+    """写后批量入库队列"""
+
+    def __init__(self,
+                 batch_size: int = 32,
+                 flush_interval: float = 2.0,
+                 max_pending: int = 1000,
+                 spill_path: Optional[Path] = None):
+        """
+        初始化写入队列
+
+        Args:
+            batch_size: 待写入条数达到该值时立即触发刷新
+            flush_interval: 后台定时刷新间隔（秒）
+            max_pending: 待写入条数上限，超过时写入方等待刷新完成（背压）
+            spill_path: 刷新失败记录的溢出文件路径
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spill_path = Path(spill_path) if spill_path else memory_config.base_path / "pending_writes.jsonl"
+
+        self._pending: List[Tuple[Any, str, str, Dict[str, Any]]] = []
+        # 记录ID → 写入完成后的回调
+        self._callbacks: Dict[str, Callable[[str], None]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._closed = False
+
+        self.stats = {"enqueued": 0, "flushed": 0, "batches": 0, "spilled": 0}
+
+    async def put(self, memory, content: MemoryContent, on_written: Optional[Callable[[str], None]] = None) -> str:
+        """
+        把一条记录放入队列，返回预分配的记录ID
+
+        Args:
+            memory: 目标 ChromaDBVectorMemory
+            content: 要写入的内容
+            on_written: 记录实际写入集合后以记录ID调用（写入失败转存溢出文件时不调用）
+        """
+        doc_id = str(uuid.uuid4())
+        metadata = dict(content.metadata or {})
+        metadata["mime_type"] = str(content.mime_type)
+        if on_written is not None:
+            self._callbacks[doc_id] = on_written
+
+        if not memory_config.write_behind or self._closed:
+            await self._write_batch(memory, [(doc_id, str(content.content), metadata)])
+            return doc_id
+
+        self._ensure_worker()
+        self._pending.append((memory, doc_id, str(content.content), metadata))
+        self.stats["enqueued"] += 1
+
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return doc_id
+
+    def pending_count(self, memory=None) -> int:
+        """待写入条数（可按目标集合统计）"""
+        if memory is None:
+            return len(self._pending)
+        return len([item for item in self._pending if item[0] is memory])
+
+    async def flush(self, memory=None):
+        """
+        立即写入待写入记录
+
+        即使当前没有待写入记录也会获取刷新锁：后台任务可能已经取走一批记录、正在 collection.add，
+        等它写完再返回，调用方随后的读取才能读到自己的写入。
+
+        Args:
+            memory: 只刷新该目标集合的记录（读之前保证读到自己的写入），为None时刷新全部
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if memory is None:
+                batch, self._pending = self._pending, []
+            else:
+                batch = [item for item in self._pending if item[0] is memory]
+                self._pending = [item for item in self._pending if item[0] is not memory]
+            if not batch:
+                return
+
+            # 按目标集合分组，每组一次 collection.add
+            groups: Dict[int, Tuple[Any, List[Tuple[str, str, Dict[str, Any]]]]] = {}
+            for target, doc_id, document, metadata in batch:
+                groups.setdefault(id(target), (target, []))[1].append((doc_id, document, metadata))
+
+            chunks = [
+                (target, items[start:start + self.batch_size])
+                for target, items in groups.values()
+                for start in range(0, len(items), self.batch_size)
+            ]
+            for position, (target, chunk) in enumerate(chunks):
+                try:
+                    await self._write_batch(target, chunk)
+                except asyncio.CancelledError:
+                    # 被取消时已取出的记录既未写入也不在队列中，全部转存后再继续取消
+                    for rest_target, rest_chunk in chunks[position:]:
+                        self._spill(rest_target, rest_chunk)
+                    raise
+                except Exception as e:
+                    print(f"⚠️ 批量写入Memory失败，{len(chunk)} 条记录转存到溢出文件: {e}")
+                    self._spill(target, chunk)
+
+    async def close(self):
+        """
+        停止后台刷新任务并把剩余记录全部写入
+
+        不取消后台任务（取消可能落在它已取出一批记录之后），而是通知它退出循环，
+        等它写完手上的一批再做最后一次刷新。
+        """
+        self._closed = True
+        if self._worker is not None:
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await self._worker
+            except Exception as e:
+                print(f"⚠️ 停止Memory写入队列后台任务失败: {e}")
+            self._worker = None
+
+        await self.flush()
+        if self.stats["enqueued"]:
+            print(f"💾 Memory写入队列已刷新: {self.stats['flushed']} 条 / {self.stats['batches']} 批"
+                  + (f"，溢出 {self.stats['spilled']} 条" if self.stats["spilled"] else ""))
+
+        # 允许同一进程内再次初始化后继续使用
+        self._closed = False
+        self._stopping = False
+        self._wakeup = None
+        self._flush_lock = None
+
+    async def replay_spilled(self, targets: Iterable[Any]):
+        """
+        重放上次未能写入的记录
+
+        溢出记录按 集合名称@持久化目录 定位目标集合；旧格式只有集合名称，按名称匹配。
+
+        Args:
+            targets: 所有可能经过写入队列的 ChromaDBVectorMemory
+        """
+        if not self.spill_path.exists():
+            return
+
+        by_key: Dict[str, Any] = {}
+        by_collection: Dict[str, Any] = {}
+        for memory in targets:
+            if memory is not None:
+                by_key.setdefault(self._target_key(memory), memory)
+                by_collection.setdefault(self._collection_name(memory), memory)
+
+        remaining = []
+        replayed = 0
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        for entry in entries:
+            target = by_key.get(entry.get("target")) or by_collection.get(entry["collection"])
+            if target is None:
+                remaining.append(entry)
+                continue
+            try:
+                await self._write_batch(target, [(entry["id"], entry["document"], entry["metadata"])])
+                replayed += 1
+            except Exception:
+                remaining.append(entry)
+
+        if remaining:
+            with open(self.spill_path, "w", encoding="utf-8") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        else:
+            self.spill_path.unlink()
+
+        if replayed:
+            print(f"♻️ 已重放 {replayed} 条上次未写入的Memory记录")
+
+    def _ensure_worker(self):
+        """在当前事件循环中启动后台刷新任务"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """后台刷新：达到批量大小或超过时间间隔时写入，close() 通知后退出"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ 后台刷新Memory写入队列失败: {e}")
+
+    async def _write_batch(self, memory, items: List[Tuple[str, str, Dict[str, Any]]]):
+        """一次 collection.add 写入一批记录（嵌入函数对整批文档做一次前向计算）"""
+        await memory_executor.run(memory._ensure_initialized)
+        collection = memory._collection
+        if collection is None:
+            raise RuntimeError("Chroma collection is not initialized")
+
+        stored_unix = time.time()
+        await memory_executor.run(
+            collection.add,
+            ids=[item[0] for item in items],
+            documents=[item[1] for item in items],
+            metadatas=[{**item[2], "stored_unix": stored_unix} for item in items]
+        )
+        self.stats["flushed"] += len(items)
+        self.stats["batches"] += 1
+
+        for doc_id, _, _ in items:
+            callback = self._callbacks.pop(doc_id, None)
+            if callback is not None:
+                try:
+                    callback(doc_id)
+                except Exception as e:
+                    print(f"⚠️ Memory写入回调失败: {e}")
+
+    @staticmethod
+    def _collection_name(memory) -> str:
+        return getattr(getattr(memory, "_config", None), "collection_name", "unknown")
+
+    @classmethod
+    def _target_key(cls, memory) -> str:
+        """目标集合的可解析标识：集合名称@持久化目录"""
+        persistence_path = getattr(getattr(memory, "_config", None), "persistence_path", "")
+        return f"{cls._collection_name(memory)}@{persistence_path}"
+
+    def _spill(self, memory, items: List[Tuple[str, str, Dict[str, Any]]]):
+        """把写入失败的记录追加到溢出文件"""
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for doc_id, document, metadata in items:
+                self._callbacks.pop(doc_id, None)
+                f.write(json.dumps({
+                    "collection": self._collection_name(memory),
+                    "target": self._target_key(memory),
+                    "id": doc_id,
+                    "document": document,
+                    "metadata": metadata
+                }, ensure_ascii=False, default=str) + "\n")
+        self.stats["spilled"] += len(items)
+
+
+# 全局实例
+memory_write_queue = MemoryWriteQueue(
+    batch_size=memory_config.write_batch_size,
+    flush_interval=memory_config.write_flush_interval
+)
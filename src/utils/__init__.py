@@ -4,9 +4,27 @@
 
 from .file_naming import parse_task_and_generate_config, get_default_project_config
 from .workflow_logger import WorkflowLogger
+from .llm_cache import LLMCache, InMemoryLLMCache, SQLiteLLMCache, CachedModelClient
+from .model_timeout import TimeoutModelClient
+from .prompt_budget import PromptBudgetAssembler, PromptSection, estimate_tokens
+from .event_bus import EventBus, event_bus
+from .dashboard import parse_web_option, start_dashboard, stop_dashboard
 
 __all__ = [
     "parse_task_and_generate_config",
     "get_default_project_config",
-    "WorkflowLogger"
+    "WorkflowLogger",
+    "LLMCache",
+    "InMemoryLLMCache",
+    "SQLiteLLMCache",
+    "CachedModelClient",
+    "TimeoutModelClient",
+    "PromptBudgetAssembler",
+    "PromptSection",
+    "estimate_tokens",
+    "EventBus",
+    "event_bus",
+    "parse_web_option",
+    "start_dashboard",
+    "stop_dashboard"
 ]
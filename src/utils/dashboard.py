@@ -0,0 +1,52 @@
+"""
+嵌入式Memory Web管理界面
+
+工作流入口使用 --web[=端口] 参数时，在工作流进程中启动Web管理界面，
+实时事件面板可以收到执行记录、Agent消息和工作流事件（事件总线是进程内的）。
+Web界面依赖 aiohttp / aiohttp-cors，未安装时只给出提示，不影响工作流运行。
+"""
+
+from typing import List, Optional, Tuple
+
+DEFAULT_WEB_PORT = 8080
+
+
+def parse_web_option(argv: List[str]) -> Tuple[Optional[int], List[str]]:
+    """
+    从命令行参数中取出 --web / --web=端口
+
+    Returns:
+        (端口，未指定时为None, 去掉该参数后的其余参数)
+    """
+    port = None
+    remaining = []
+    for arg in argv:
+        if arg == "--web":
+            port = DEFAULT_WEB_PORT
+        elif arg.startswith("--web="):
+            port = int(arg.split("=", 1)[1])
+        else:
+            remaining.append(arg)
+    return port, remaining
+
+
+async def start_dashboard(port: Optional[int], host: str = "localhost"):
+    """启动嵌入式Web管理界面，返回 AppRunner（未启用或无法启动时返回None）"""
+    if not port:
+        return None
+    try:
+        from memory_web import start_embedded_server
+    except ImportError as e:
+        print(f"⚠️ 无法启动Memory Web管理界面（需要 pip install aiohttp aiohttp-cors）: {e}")
+        return None
+    try:
+        return await start_embedded_server(host=host, port=port)
+    except OSError as e:
+        print(f"⚠️ Memory Web管理界面启动失败: {e}")
+        return None
+
+
+async def stop_dashboard(runner):
+    """关闭嵌入式Web管理界面"""
+    if runner is not None:
+        await runner.cleanup()
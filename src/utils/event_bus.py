@@ -0,0 +1,138 @@
+"""
+进程内事件总线
+
+执行日志写入、Agent间消息、工作流事件发布到总线，Web管理界面通过SSE把增量事件推送给浏览器，
+客户端不再反复轮询完整列表。总线保留最近的事件，断线重连时按 Last-Event-ID 补发。
+发布是非阻塞的：订阅者队列写满时丢弃积压并通知订阅者重新全量加载（resync），不会拖慢发布方。
+"""
+
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+# 订阅者积压过多时发送的事件，客户端收到后应重新全量加载
+RESYNC_TOPIC = "resync"
+
+
+class Subscription:
+    """单个订阅者（绑定到创建时所在的事件循环）"""
+
+    def __init__(self, bus: "EventBus", topics: Optional[Iterable[str]], queue_size: int):
+        self.bus = bus
+        self.topics = set(topics) if topics else None
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def matches(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def deliver(self, event: Dict[str, Any]):
+        """投递事件（可从任意线程调用）"""
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._put(event)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: Dict[str, Any]):
+        if self.queue.full():
+            # 客户端消费太慢：丢弃积压，只保留一个resync事件
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "topic": RESYNC_TOPIC, "timestamp": event["timestamp"], "data": {}})
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待下一个事件，超时返回None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """进程内发布/订阅总线"""
+
+    def __init__(self, history_size: int = 500, queue_size: int = 1000):
+        """
+        初始化事件总线
+
+        Args:
+            history_size: 保留的最近事件数（用于断线重连补发）
+            queue_size: 每个订阅者的最大积压事件数
+        """
+        self.queue_size = queue_size
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """发布事件，返回带递增ID的事件"""
+        with self._lock:
+            event = {
+                "id": self._next_id,
+                "topic": topic,
+                "timestamp": datetime.now().isoformat(),
+                "data": data
+            }
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = [sub for sub in self._subscribers if sub.matches(topic)]
+
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self,
+                  topics: Optional[Iterable[str]] = None,
+                  last_event_id: Optional[int] = None) -> Subscription:
+        """
+        订阅事件（需要在事件循环中调用）
+
+        Args:
+            topics: 只接收这些主题，为None时接收全部
+            last_event_id: 断线重连时客户端收到的最后一个事件ID，补发之后的事件
+        """
+        subscription = Subscription(self, topics, self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+            if last_event_id is not None:
+                missed = [event for event in self._history
+                          if event["id"] > last_event_id and subscription.matches(event["topic"])]
+                if self._history and self._history[0]["id"] > last_event_id + 1:
+                    # 需要的事件已超出保留范围，无法完整补发
+                    missed = [{"id": self._history[-1]["id"], "topic": RESYNC_TOPIC,
+                               "timestamp": datetime.now().isoformat(), "data": {}}]
+                for event in missed:
+                    subscription._put(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """最近的事件"""
+        with self._lock:
+            return list(self._history)[-limit:] if limit > 0 else []
+
+
+# 全局事件总线实例
+event_bus = EventBus()
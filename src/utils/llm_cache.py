@@ -0,0 +1,280 @@
+"""
+LLM响应缓存
+
+在 model_client.create 前增加一层基于内容寻址的缓存：
+以模型参数、调用参数和消息内容的哈希作为键，重复运行相同任务时
+直接复用编排器规划、指令生成等提示的LLM响应。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from autogen_core.models import CreateResult
+
+
+class LLMCache(ABC):
+    """LLM响应缓存基类 - 负责TTL判断和命中统计，存储由子类实现"""
+
+    def __init__(self, ttl_seconds: Optional[float] = 7 * 24 * 3600, max_entries: int = 1000):
+        """
+        初始化缓存
+
+        Args:
+            ttl_seconds: 缓存条目的存活时间（秒），为None时永不过期
+            max_entries: 最大缓存条目数，超出后按LRU淘汰
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存值，未命中或已过期时返回None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]):
+        """写入缓存值"""
+
+    @abstractmethod
+    def clear(self):
+        """清空缓存"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """当前缓存条目数"""
+
+    def close(self):
+        """释放缓存占用的资源（默认无需处理）"""
+
+    def _is_expired(self, created_at: float) -> bool:
+        """判断条目是否已过期"""
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _record_lookup(self, hit: bool):
+        """记录一次查询的命中情况"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total * 100) if total > 0 else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class InMemoryLLMCache(LLMCache):
+    """进程内LRU缓存"""
+
+    def __init__(self, ttl_seconds: Optional[float] = 3600, max_entries: int = 256):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0]):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self._record_lookup(False)
+                return None
+
+            self._entries.move_to_end(key)
+            self._record_lookup(True)
+            return entry[1]
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteLLMCache(LLMCache):
+    """基于SQLite的磁盘缓存，跨进程、跨运行复用LLM响应"""
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 max_entries: int = 1000):
+        """
+        初始化磁盘缓存
+
+        Args:
+            db_path: SQLite文件路径，默认保存在项目 memory/llm_cache 目录下
+            ttl_seconds: 缓存条目的存活时间（秒），为None时永不过期
+            max_entries: 最大缓存条目数，超出后按最近访问时间淘汰
+        """
+        super().__init__(ttl_seconds, max_entries)
+        if db_path is None:
+            project_root = Path(__file__).parent.parent.parent
+            db_path = project_root / "memory" / "llm_cache" / "llm_cache.sqlite3"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1]):
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                row = None
+
+            if row is None:
+                self._record_lookup(False)
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._record_lookup(True)
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedModelClient:
+    """
+    带缓存的模型客户端包装器
+
+    只拦截不带工具的 create 调用（编排器的规划、指令和进度分析提示），
+    其余属性和方法直接转发给原始客户端。
+    """
+
+    def __init__(self, model_client, cache: LLMCache):
+        self._client = model_client
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    @property
+    def wrapped_client(self):
+        """原始模型客户端"""
+        return self._client
+
+    async def create(self, messages: Sequence[Any], **kwargs) -> CreateResult:
+        """带缓存的 create 调用"""
+        # 带工具的调用可能产生副作用，不做缓存
+        if kwargs.get("tools"):
+            return await self._client.create(messages, **kwargs)
+
+        key = self.build_cache_key(messages, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            try:
+                result = CreateResult.model_validate(cached)
+                result.cached = True
+                return result
+            except Exception as e:
+                print(f"⚠️ LLM缓存条目无法解析，重新请求: {e}")
+
+        result = await self._client.create(messages, **kwargs)
+        try:
+            self.cache.set(key, result.model_dump(mode="json"))
+        except Exception as e:
+            print(f"⚠️ 写入LLM缓存失败: {e}")
+        return result
+
+    def build_cache_key(self, messages: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+        """根据模型、调用参数和消息内容计算缓存键"""
+        payload = {
+            "model": self._client_fingerprint(),
+            "params": {
+                name: value for name, value in kwargs.items()
+                if name not in ("cancellation_token", "tools")
+            },
+            "messages": [self._serialize_message(message) for message in messages]
+        }
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _client_fingerprint(self) -> Any:
+        """获取能区分模型和采样参数的客户端指纹"""
+        create_args = getattr(self._client, "_create_args", None)
+        if create_args:
+            return create_args
+        return {
+            "class": type(self._client).__name__,
+            "model_info": getattr(self._client, "model_info", None)
+        }
+
+    @staticmethod
+    def _serialize_message(message: Any) -> Any:
+        """序列化单条消息"""
+        if hasattr(message, "model_dump"):
+            return message.model_dump(mode="json")
+        return str(message)
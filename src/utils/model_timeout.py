@@ -0,0 +1,54 @@
+"""
+LLM调用超时
+
+为 model_client.create 增加单次调用超时：超时后通过 CancellationToken 通知底层请求取消，
+并抛出 TimeoutError，由调用方按普通调用失败处理（例如回退到默认指令）。
+"""
+
+import asyncio
+from typing import Any, Optional, Sequence
+
+from autogen_core import CancellationToken
+from autogen_core.models import CreateResult
+
+
+class TimeoutModelClient:
+    """
+    带超时的模型客户端包装器
+
+    只包装 create 调用，其余属性和方法直接转发给原始客户端。
+    """
+
+    def __init__(self, model_client, timeout_seconds: Optional[float]):
+        """
+        初始化包装器
+
+        Args:
+            model_client: 原始模型客户端
+            timeout_seconds: 单次调用超时（秒），为None或0时不限制
+        """
+        self._client = model_client
+        self.timeout_seconds = timeout_seconds
+        self.timeouts = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    @property
+    def wrapped_client(self):
+        """原始模型客户端"""
+        return self._client
+
+    async def create(self, messages: Sequence[Any], **kwargs) -> CreateResult:
+        """带超时的 create 调用"""
+        if not self.timeout_seconds:
+            return await self._client.create(messages, **kwargs)
+
+        cancellation_token = kwargs.get("cancellation_token") or CancellationToken()
+        kwargs["cancellation_token"] = cancellation_token
+        try:
+            return await asyncio.wait_for(self._client.create(messages, **kwargs), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            cancellation_token.cancel()
+            self.timeouts += 1
+            raise TimeoutError(f"LLM调用超过 {self.timeout_seconds} 秒未返回")
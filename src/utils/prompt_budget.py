@@ -0,0 +1,170 @@
+"""
+提示词Token预算
+
+按段落优先级组装提示词：高优先级段落先分配预算，超出预算的段落按各自的策略截断或丢弃，
+并记录每个段落实际使用的token数，控制 RefactoringAgent / UnitTestAgent 等提示的体积。
+段落之间的分隔符计入预算；分组标题只在组内至少保留一个段落时输出。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken 是可选依赖，未安装时使用字符数估算
+    _ENCODING = None
+
+
+# 截断时插入的省略标记
+TRUNCATION_MARKER = "\n...[已省略 {omitted} 字符]...\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的token数（安装 tiktoken 时精确计算，否则中文按1字1token、其他按4字符1token估算）"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+
+    cjk_count = sum(1 for char in text if "一" <= char <= "鿿")
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+@dataclass
+class PromptSection:
+    """提示词段落"""
+    name: str
+    content: str
+    priority: int = 50  # 数值越小越优先分配预算
+    strategy: str = "head"  # head: 保留开头, tail: 保留结尾, head_tail: 保留首尾, drop: 超出预算直接丢弃
+    min_tokens: int = 50  # 剩余预算低于该值时不再截断保留，直接丢弃
+    group: Optional[str] = None  # 所属分组，组内首个保留的段落连同分组标题一起计入预算
+    is_header: bool = False  # 分组标题：不单独分配预算，随组内段落一起保留或丢弃
+
+
+class PromptBudgetAssembler:
+    """按token预算组装提示词"""
+
+    def __init__(self, budget_tokens: int):
+        """
+        初始化组装器
+
+        Args:
+            budget_tokens: 整个提示词的token预算
+        """
+        self.budget_tokens = budget_tokens
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, content: str, priority: int = 50,
+            strategy: str = "head", min_tokens: int = 50,
+            group: Optional[str] = None) -> "PromptBudgetAssembler":
+        """添加段落（空内容忽略），段落按添加顺序输出"""
+        if content and content.strip():
+            self.sections.append(PromptSection(name, content, priority, strategy, min_tokens, group))
+        return self
+
+    def add_header(self, name: str, content: str, group: str) -> "PromptBudgetAssembler":
+        """添加分组标题，在添加位置输出，组内段落全部被丢弃时标题也一并丢弃"""
+        if content and content.strip():
+            self.sections.append(PromptSection(name, content, group=group, is_header=True))
+        return self
+
+    def assemble(self, separator: str = "\n\n") -> Tuple[str, Dict[str, Any]]:
+        """
+        组装提示词
+
+        Returns:
+            (提示词, token使用记录)
+        """
+        remaining = self.budget_tokens
+        separator_tokens = estimate_tokens(separator)
+        rendered: Dict[int, str] = {}
+        usage_sections: Dict[str, Dict[str, Any]] = {}
+        headers = {section.group: index for index, section in enumerate(self.sections) if section.is_header}
+
+        ordered = sorted(
+            (i for i in range(len(self.sections)) if not self.sections[i].is_header),
+            key=lambda i: self.sections[i].priority
+        )
+        for index in ordered:
+            section = self.sections[index]
+            original_tokens = estimate_tokens(section.content)
+
+            # 本段落连同尚未输出的分组标题一起保留，额外占用标题和新增分隔符的token
+            header_index = headers.get(section.group) if section.group is not None else None
+            if header_index in rendered:
+                header_index = None
+            new_parts = 1 if header_index is None else 2
+            overhead = separator_tokens * (new_parts if rendered else new_parts - 1)
+            if header_index is not None:
+                overhead += estimate_tokens(self.sections[header_index].content)
+            available = remaining - overhead
+
+            if original_tokens <= available:
+                content = section.content
+                used_tokens = original_tokens
+            elif section.strategy != "drop" and available >= section.min_tokens:
+                content = self.truncate(section.content, available, section.strategy)
+                used_tokens = estimate_tokens(content)
+            else:
+                content = ""
+                used_tokens = 0
+
+            if content:
+                remaining -= used_tokens + overhead
+                rendered[index] = content
+                if header_index is not None:
+                    rendered[header_index] = self.sections[header_index].content
+            usage_sections[section.name] = {
+                "original_tokens": original_tokens,
+                "used_tokens": used_tokens,
+                "truncated": 0 < used_tokens < original_tokens,
+                "dropped": used_tokens == 0
+            }
+
+        for index in headers.values():
+            header = self.sections[index]
+            header_tokens = estimate_tokens(header.content)
+            usage_sections[header.name] = {
+                "original_tokens": header_tokens,
+                "used_tokens": header_tokens if index in rendered else 0,
+                "truncated": False,
+                "dropped": index not in rendered
+            }
+
+        prompt = separator.join(rendered[i] for i in range(len(self.sections)) if i in rendered)
+        usage = {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.budget_tokens - remaining,
+            "separator_tokens": separator_tokens * max(0, len(rendered) - 1),
+            "sections": usage_sections
+        }
+        return prompt, usage
+
+    @staticmethod
+    def truncate(text: str, max_tokens: int, strategy: str = "head") -> str:
+        """按策略把文本截断到不超过 max_tokens（二分查找保留的字符数）"""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        def build(keep_chars: int) -> str:
+            omitted = len(text) - keep_chars
+            marker = TRUNCATION_MARKER.format(omitted=omitted)
+            if strategy == "tail":
+                return marker.lstrip("\n") + text[len(text) - keep_chars:]
+            if strategy == "head_tail":
+                # 测试输出的失败摘要通常在末尾，尾部多保留一些
+                head_chars = keep_chars // 3
+                tail_chars = keep_chars - head_chars
+                return text[:head_chars] + marker + text[len(text) - tail_chars:]
+            return text[:keep_chars] + marker.rstrip("\n")
+
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(build(middle)) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return build(low) if low > 0 else ""
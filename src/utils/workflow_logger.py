@@ -10,17 +10,21 @@ from datetime import datetime
 from typing import Dict, List, Any
 from pathlib import Path
 
+from .event_bus import event_bus
+
 
 class WorkflowLogger:
     """工作流日志管理器 - 记录易于理解的执行过程"""
     
-    def __init__(self, log_dir: str = "/Users/jabez/output/logs"):
+    def __init__(self, log_dir: str = "/Users/jabez/output/logs", output_dir: str = "/Users/jabez/output"):
         """
         初始化日志管理器
         
         Args:
             log_dir: 日志保存目录
+            output_dir: 生成文件所在目录，用于执行总结中列出生成的文件
         """
+        self.output_dir = Path(output_dir)
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
@@ -140,6 +144,7 @@ class WorkflowLogger:
             "message": message
         }
         self.workflow_data["events"].append(event_info)
+        event_bus.publish("workflow", event_info)
         
         # 根据事件类型选择图标
         icons = {
@@ -194,7 +199,7 @@ class WorkflowLogger:
 """
         
         # 添加生成的文件列表
-        output_dir = Path("/Users/jabez/output")
+        output_dir = self.output_dir
         if output_dir.exists():
             for file_path in output_dir.glob("*.py"):
                 content += f"- {file_path.name}\n"
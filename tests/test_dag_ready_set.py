@@ -0,0 +1,119 @@
+"""
+编排器DAG就绪集合计算测试
+"""
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_agentchat")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.config.chain_config import ChainConfig, get_chain_config
+from src.core.data_structures import NodeState, ProgressLedger
+from src.core.orchestrator import GraphFlowOrchestrator
+
+
+def make_orchestrator(chain_name: str = "standard") -> GraphFlowOrchestrator:
+    """只设置就绪集合计算用到的状态，不创建Agent和Memory"""
+    orchestrator = object.__new__(GraphFlowOrchestrator)
+    orchestrator.chain_config = get_chain_config(chain_name)
+    orchestrator.participants = {name: object() for name in orchestrator.chain_config.agents}
+    orchestrator.progress_ledger = ProgressLedger()
+    for name in orchestrator.participants:
+        orchestrator.progress_ledger.node_states[name] = NodeState.NOT_STARTED
+    return orchestrator
+
+
+def complete(orchestrator: GraphFlowOrchestrator, *nodes: str):
+    for node in nodes:
+        orchestrator.progress_ledger.update_node_state(node, NodeState.COMPLETED)
+
+
+async def test_source_node_is_planning_agent():
+    orchestrator = make_orchestrator()
+    assert orchestrator._get_source_nodes() == ["CodePlanningAgent"]
+    assert orchestrator._compute_ready_nodes() == ["CodePlanningAgent"]
+
+
+async def test_linear_prefix_readies_one_node_at_a_time():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent")
+    assert orchestrator._compute_ready_nodes("CodePlanningAgent") == ["FunctionWritingAgent"]
+
+
+async def test_scanning_follows_unit_tests():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent", "UnitTestAgent")
+    # RefactoringAgent 是条件节点，未触发时视为满足
+    assert orchestrator._compute_ready_nodes("UnitTestAgent") == ["CodeScanningAgent"]
+
+
+async def test_failed_successor_reenters_after_predecessor_reruns():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent")
+    orchestrator.progress_ledger.update_node_state("UnitTestAgent", NodeState.FAILED)
+    assert orchestrator._compute_ready_nodes("TestGenerationAgent") == ["UnitTestAgent"]
+    # 与失败节点无直接依赖的节点执行完后不会重新进入
+    assert "UnitTestAgent" not in orchestrator._compute_ready_nodes("FunctionWritingAgent")
+
+
+async def test_dependencies_outside_the_chain_are_ignored():
+    orchestrator = make_orchestrator("minimal")
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent")
+    assert orchestrator._compute_ready_nodes("TestGenerationAgent") == ["UnitTestAgent"]
+    complete(orchestrator, "UnitTestAgent")
+    assert orchestrator._compute_ready_nodes("UnitTestAgent") == []
+
+
+async def test_parallel_nodes_keep_separate_active_state():
+    ledger = ProgressLedger()
+    ledger.activate_node("CodeScanningAgent", "扫描")
+    ledger.activate_node("ProjectStructureAgent", "整理结构")
+    assert ledger.current_active_nodes == {"CodeScanningAgent", "ProjectStructureAgent"}
+
+    ledger.deactivate_node("CodeScanningAgent")
+    assert ledger.current_active_nodes == {"ProjectStructureAgent"}
+    assert ledger.node_instructions == {"CodeScanningAgent": "扫描", "ProjectStructureAgent": "整理结构"}
+
+
+async def test_scanning_waits_for_refactoring_when_triggered():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent", "UnitTestAgent")
+    orchestrator.progress_ledger.update_node_state("RefactoringAgent", NodeState.IN_PROGRESS)
+    assert orchestrator._compute_ready_nodes("UnitTestAgent") == []
+    complete(orchestrator, "RefactoringAgent")
+    assert orchestrator._compute_ready_nodes("RefactoringAgent") == ["CodeScanningAgent"]
+
+
+async def test_unit_test_success_hands_off_to_ready_nodes():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent", "UnitTestAgent")
+    next_nodes = await orchestrator._get_next_executable_nodes("UnitTestAgent", {"success": True})
+    assert next_nodes == ["CodeScanningAgent"]
+
+    minimal = make_orchestrator("minimal")
+    complete(minimal, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent", "UnitTestAgent")
+    minimal.chain_name = "minimal"
+    assert await minimal._get_next_executable_nodes("UnitTestAgent", {"success": True}) == []
+
+
+async def test_structure_runs_after_scanning():
+    orchestrator = make_orchestrator()
+    complete(orchestrator, "CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent",
+             "UnitTestAgent", "CodeScanningAgent")
+    assert orchestrator._compute_ready_nodes("CodeScanningAgent") == ["ProjectStructureAgent"]
+
+
+async def test_independent_nodes_are_ready_together():
+    orchestrator = make_orchestrator()
+    orchestrator.chain_config = ChainConfig(
+        name="fan_out",
+        description="",
+        agents=["CodePlanningAgent", "FunctionWritingAgent", "TestGenerationAgent"],
+        dependencies={
+            "FunctionWritingAgent": ["CodePlanningAgent"],
+            "TestGenerationAgent": ["CodePlanningAgent"]
+        }
+    )
+    complete(orchestrator, "CodePlanningAgent")
+    assert orchestrator._compute_ready_nodes("CodePlanningAgent") == ["FunctionWritingAgent", "TestGenerationAgent"]
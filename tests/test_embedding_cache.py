@@ -0,0 +1,115 @@
+"""
+嵌入服务磁盘缓存测试：条数上限LRU淘汰、按访问时间清理和缓存精度
+"""
+
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_agentchat")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory import embedding_service as embedding_module
+from src.memory.embedding_service import EmbeddingService
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return [np.linspace(-1, 1, 4, dtype=np.float32) * len(text) for text in texts]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(embedding_module.time, "time", fake)
+    return fake
+
+
+def make_service(tmp_path, max_entries=None, cache_precision="float32") -> EmbeddingService:
+    service = EmbeddingService("fake-model", cache_size=1, cache_path=tmp_path / "embeddings.sqlite3",
+                               disk_cache_max_entries=max_entries, cache_precision=cache_precision)
+    service._model = FakeModel()
+    return service
+
+
+def disk_keys(service: EmbeddingService):
+    return {row[0] for row in service._get_disk().execute("SELECT key FROM embeddings")}
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, clock):
+    service = make_service(tmp_path, max_entries=2)
+    service.embed(["a"])
+    clock.now += 1
+    service.embed(["bb"])
+    clock.now += 1
+    # 内存缓存只有1条，a 从磁盘命中并刷新访问时间
+    service.embed(["a"])
+    assert service.stats["disk_hits"] == 1
+    clock.now += 1
+    service.embed(["ccc"])
+
+    assert disk_keys(service) == {service._cache_key("a"), service._cache_key("ccc")}
+    assert service.stats["disk_evictions"] == 1
+    service.close()
+
+
+def test_prune_removes_entries_not_accessed_within_max_age(tmp_path, clock):
+    service = make_service(tmp_path)
+    service.embed(["old"])
+    clock.now += 10 * 24 * 3600
+    service.embed(["new"])
+
+    assert service.prune_disk_cache(max_age_days=5, vacuum=True) == 1
+    assert disk_keys(service) == {service._cache_key("new")}
+    service.close()
+
+
+def test_legacy_cache_without_access_time_is_migrated(tmp_path, clock):
+    path = tmp_path / "embeddings.sqlite3"
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    connection.execute("INSERT INTO embeddings VALUES (?, ?)", ("legacy", np.zeros(4, dtype=np.float32).tobytes()))
+    connection.commit()
+    connection.close()
+
+    service = make_service(tmp_path, max_entries=1)
+    service.embed(["fresh"])
+    # 旧条目没有访问时间，最先被淘汰
+    assert disk_keys(service) == {service._cache_key("fresh")}
+    service.close()
+
+
+def test_cache_precision_shrinks_disk_entries_and_matches_fresh_vectors(tmp_path, clock):
+    service = make_service(tmp_path, cache_precision="int8")
+    fresh, = service.embed(["abc"])
+    service.embed(["other"])
+    cached, = service.embed(["abc"])
+    assert service.stats["disk_hits"] == 1
+    # 4字节缩放系数 + 每维1字节
+    blob, = service._get_disk().execute(
+        "SELECT vector FROM embeddings WHERE key = ?", (service._cache_key("abc"),)
+    ).fetchone()
+    assert len(blob) == 4 + 4
+    assert fresh.dtype == np.float32 and np.array_equal(fresh, cached)
+    service.close()
+
+
+def test_without_disk_cache_vectors_are_not_quantized():
+    service = EmbeddingService("fake-model", cache_size=1, cache_precision="int8")
+    service._model = FakeModel()
+    vector, = service.embed(["abcdefg"])
+    assert np.array_equal(vector, np.linspace(-1, 1, 4, dtype=np.float32) * 7)
@@ -0,0 +1,79 @@
+"""
+进程内事件总线测试：主题过滤、跨线程投递、积压时的resync以及按 Last-Event-ID 补发
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("autogen_core")
+
+from src.utils.event_bus import RESYNC_TOPIC, EventBus
+
+
+async def test_publish_filters_by_topic():
+    bus = EventBus()
+    everything = bus.subscribe()
+    messages = bus.subscribe(topics=["message"])
+
+    bus.publish("execution", {"id": "a"})
+    bus.publish("message", {"from_agent": "A"})
+
+    assert [(await everything.get(1))["topic"] for _ in range(2)] == ["execution", "message"]
+    assert (await messages.get(1))["data"] == {"from_agent": "A"}
+    assert await messages.get(0.05) is None
+
+
+async def test_publish_from_another_thread():
+    bus = EventBus()
+    subscription = bus.subscribe()
+
+    thread = threading.Thread(target=bus.publish, args=("workflow", {"message": "done"}))
+    thread.start()
+    thread.join()
+
+    event = await subscription.get(1)
+    assert event["topic"] == "workflow"
+    assert event["data"] == {"message": "done"}
+
+
+async def test_slow_subscriber_receives_resync():
+    bus = EventBus(queue_size=2)
+    subscription = bus.subscribe()
+
+    for i in range(5):
+        bus.publish("execution", {"i": i})
+
+    event = await subscription.get(1)
+    assert event["topic"] == RESYNC_TOPIC
+    assert subscription.dropped > 0
+
+
+async def test_replay_since_last_event_id():
+    bus = EventBus(history_size=10)
+    for i in range(5):
+        bus.publish("execution", {"i": i})
+
+    subscription = bus.subscribe(last_event_id=3)
+    assert [(await subscription.get(1))["id"] for _ in range(2)] == [4, 5]
+    assert await subscription.get(0.05) is None
+
+
+async def test_replay_beyond_history_requests_resync():
+    bus = EventBus(history_size=2)
+    for i in range(5):
+        bus.publish("execution", {"i": i})
+
+    subscription = bus.subscribe(last_event_id=1)
+    assert (await subscription.get(1))["topic"] == RESYNC_TOPIC
+
+
+async def test_unsubscribe_stops_delivery():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    subscription.close()
+
+    bus.publish("execution", {})
+    assert bus.subscriber_count == 0
+    assert await subscription.get(0.05) is None
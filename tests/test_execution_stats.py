@@ -0,0 +1,38 @@
+"""
+执行统计边车文件测试：多线程并发落盘不冲突，文件内容是最新统计
+"""
+
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.execution_stats import ExecutionStatsStore
+
+
+def test_concurrent_saves_keep_latest_snapshot(tmp_path):
+    path = tmp_path / "execution_stats.json"
+    store = ExecutionStatsStore(path, save_interval=0)
+    errors = []
+
+    def worker(agent_name):
+        try:
+            for _ in range(50):
+                store.record(agent_name, "general", True, 1.0, None)
+                store.save(force=True)
+        except Exception as e:  # 共用临时文件时这里会出现 FileNotFoundError
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(f"Agent{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.save(force=True)
+
+    assert errors == []
+    assert json.loads(path.read_text(encoding="utf-8"))["total"] == 400
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,100 @@
+"""
+LLM响应缓存测试：TTL过期和LRU淘汰
+"""
+
+import pytest
+
+pytest.importorskip("autogen_core")
+
+from src.utils import llm_cache as llm_cache_module
+from src.utils.llm_cache import InMemoryLLMCache, LLMCache, SQLiteLLMCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_cache_module.time, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    caches = []
+
+    def factory(ttl_seconds=None, max_entries=10) -> LLMCache:
+        if request.param == "memory":
+            cache = InMemoryLLMCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        else:
+            cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite3", ttl_seconds=ttl_seconds, max_entries=max_entries)
+        caches.append(cache)
+        return cache
+
+    yield factory
+    for cache in caches:
+        cache.close()
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        LLMCache()
+
+
+def test_entry_expires_after_ttl(make_cache, clock):
+    cache = make_cache(ttl_seconds=60)
+    cache.set("a", {"content": "A"})
+
+    clock.now += 59
+    assert cache.get("a") == {"content": "A"}
+
+    clock.now += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+    stats = cache.get_statistics()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_no_ttl_never_expires(make_cache, clock):
+    cache = make_cache(ttl_seconds=None)
+    cache.set("a", {"content": "A"})
+    clock.now += 365 * 24 * 3600
+    assert cache.get("a") == {"content": "A"}
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set("a", {"content": "A"})
+    clock.now += 1
+    cache.set("b", {"content": "B"})
+    clock.now += 1
+    # 访问 a 之后 b 成为最久未使用的条目
+    assert cache.get("a") is not None
+    clock.now += 1
+    cache.set("c", {"content": "C"})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"content": "A"}
+    assert cache.get("c") == {"content": "C"}
+    assert cache.get_statistics()["evictions"] == 1
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "llm_cache.sqlite3"
+    first = SQLiteLLMCache(path)
+    first.set("a", {"content": "A"})
+    first.close()
+
+    second = SQLiteLLMCache(path)
+    try:
+        assert second.get("a") == {"content": "A"}
+    finally:
+        second.close()
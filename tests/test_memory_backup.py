@@ -0,0 +1,119 @@
+"""
+增量备份测试：按入库时间判断新记录，晚入库的旧事件不漏备份，重叠窗口内不重复备份
+"""
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.base_memory_manager import ExecutionLogManager
+from src.memory.memory_manager import MemoryManager
+
+
+def matches(metadata, where):
+    """支持 $and 和 $gte/$lte 的 Chroma where 子集"""
+    if where is None:
+        return True
+    if "$and" in where:
+        return all(matches(metadata, condition) for condition in where["$and"])
+    (key, condition), = where.items()
+    value = metadata.get(key)
+    if not isinstance(condition, dict):
+        return value == condition
+    if value is None:
+        return False
+    return all({"$gte": value >= bound, "$lte": value <= bound}[op] for op, bound in condition.items())
+
+
+class FakeCollection:
+    def __init__(self):
+        self.records = {}
+
+    def add(self, doc_id, timestamp_unix, stored_unix):
+        self.records[doc_id] = {"agent_name": "UnitTestAgent", "timestamp_unix": timestamp_unix,
+                                "stored_unix": stored_unix, "success": True}
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=()):
+        selected = [doc_id for doc_id, meta in self.records.items()
+                    if (ids is None or doc_id in ids) and matches(meta, where)]
+        selected = selected[offset:None if limit is None else offset + limit]
+        return {
+            "ids": selected,
+            "metadatas": [dict(self.records[doc_id]) for doc_id in selected],
+            "documents": [f"content {doc_id}" for doc_id in selected] if "documents" in include else None
+        }
+
+
+class FakeStateManager:
+    def list_saved_states(self):
+        return []
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    collection = FakeCollection()
+    log_manager = object.__new__(ExecutionLogManager)
+    log_manager._initialized = True
+    log_manager._get_collection = lambda: collection
+
+    async def no_pending_writes():
+        return None
+
+    async def no_statistics():
+        return {}
+
+    log_manager._flush_pending_writes = no_pending_writes
+    memory_manager = MemoryManager()
+    memory_manager.execution_log_manager = log_manager
+    memory_manager.agent_state_manager = FakeStateManager()
+    memory_manager.get_memory_statistics = no_statistics
+    memory_manager.collection = collection
+    return memory_manager
+
+
+def backed_up_ids(backup_dir, state):
+    return [
+        json.loads(line)["id"]
+        for line in (backup_dir / state["backups"][-1]["file"]).read_text(encoding="utf-8").splitlines()
+    ]
+
+
+async def run_backup(manager, backup_dir, monkeypatch, now):
+    monkeypatch.setattr(time, "time", lambda: now)
+    assert await manager.backup_all_data(str(backup_dir), compression=None, overlap_seconds=60)
+    return json.loads((backup_dir / "backup_state.json").read_text(encoding="utf-8"))
+
+
+async def test_late_stored_records_are_backed_up_once(manager, tmp_path, monkeypatch):
+    manager.collection.add("r1", timestamp_unix=1000.0, stored_unix=1000.0)
+    manager.collection.add("r2", timestamp_unix=1950.0, stored_unix=1990.0)
+    state = await run_backup(manager, tmp_path, monkeypatch, now=2000.0)
+    assert state["backups"][-1]["type"] == "full"
+    assert backed_up_ids(tmp_path, state) == ["r1", "r2"]
+    assert state["stored_mark"] == 2000.0
+    assert state["boundary_ids"] == ["r2"]
+
+    # 重放的溢出记录：事件时间早于上次备份，入库时间在上次备份之后
+    manager.collection.add("replayed", timestamp_unix=500.0, stored_unix=2100.0)
+    # 其他进程在上次备份开始前不久入库、但当时还没写完的批次
+    manager.collection.add("slow_batch", timestamp_unix=1960.0, stored_unix=1995.0)
+    state = await run_backup(manager, tmp_path, monkeypatch, now=3000.0)
+    assert state["backups"][-1]["type"] == "incremental"
+    assert backed_up_ids(tmp_path, state) == ["replayed", "slow_batch"]
+
+    # 没有新记录时不再重复备份
+    state = await run_backup(manager, tmp_path, monkeypatch, now=4000.0)
+    assert backed_up_ids(tmp_path, state) == []
+
+
+async def test_legacy_event_time_state_triggers_full_backup(manager, tmp_path, monkeypatch):
+    (tmp_path / "backup_state.json").write_text(json.dumps({"high_water_mark": 5000.0, "backups": []}))
+    manager.collection.add("r1", timestamp_unix=1000.0, stored_unix=1000.0)
+    state = await run_backup(manager, tmp_path, monkeypatch, now=2000.0)
+    assert state["backups"][-1]["type"] == "full"
+    assert "high_water_mark" not in state
+    assert backed_up_ids(tmp_path, state) == ["r1"]
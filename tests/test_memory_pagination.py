@@ -0,0 +1,165 @@
+"""
+记忆列表键集分页测试：翻页期间新增或删除记录时不重复、不遗漏，每页读取量与记录总数无关
+"""
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.base_memory_manager import ExecutionLogManager
+from src.memory.memory_manager import MemoryManager
+
+
+def matches(metadata, where):
+    """支持 $and 和 $gte/$lte/$lt 的 Chroma where 子集"""
+    if "$and" in where:
+        return all(matches(metadata, condition) for condition in where["$and"])
+    (key, condition), = where.items()
+    value = metadata.get(key)
+    if value is None:
+        return False
+    checks = {"$gte": lambda bound: value >= bound, "$lte": lambda bound: value <= bound,
+              "$lt": lambda bound: value < bound}
+    return all(checks[op](bound) for op, bound in condition.items())
+
+
+class FakeCollection:
+    """按插入顺序保存记录，支持 timestamp_unix 范围过滤，并统计读取的metadata条数"""
+
+    def __init__(self):
+        self.records = {}
+        self.metadata_reads = 0
+        self.calls = 0
+
+    def add(self, doc_id: str, timestamp_unix: float):
+        self.records[doc_id] = {"agent_name": "UnitTestAgent", "timestamp_unix": timestamp_unix,
+                                "timestamp": str(timestamp_unix), "success": True}
+
+    def count(self):
+        return len(self.records)
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=()):
+        self.calls += 1
+        selected = [doc_id for doc_id in self.records if ids is None or doc_id in ids]
+        if where is not None:
+            selected = [doc_id for doc_id in selected if matches(self.records[doc_id], where)]
+        selected = selected[offset:None if limit is None else offset + limit]
+        if "metadatas" in include:
+            self.metadata_reads += len(selected)
+        return {
+            "ids": selected,
+            "metadatas": [dict(self.records[doc_id]) for doc_id in selected],
+            "documents": [f"content {doc_id}" for doc_id in selected] if "documents" in include else None
+        }
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    collection = FakeCollection()
+    log_manager = object.__new__(ExecutionLogManager)
+    log_manager._initialized = True
+    log_manager._get_collection = lambda: collection
+
+    async def no_pending_writes():
+        return None
+
+    log_manager._flush_pending_writes = no_pending_writes
+    memory_manager = MemoryManager()
+    memory_manager.execution_log_manager = log_manager
+    memory_manager.collection = collection
+    return memory_manager
+
+
+async def list_ids(manager, cursor=None, limit=2):
+    page = await manager.list_memories_page(limit=limit, cursor=cursor)
+    return [item["id"] for item in page["items"]], page["next_cursor"], page
+
+
+async def test_pages_are_newest_first_with_running_index(manager):
+    for i in range(5):
+        manager.collection.add(f"r{i}", 100.0 + i)
+
+    ids, cursor, page = await list_ids(manager)
+    assert ids == ["r4", "r3"]
+    assert [item["index"] for item in page["items"]] == [1, 2]
+    assert page["total"] == 5
+
+    ids, cursor, page = await list_ids(manager, cursor)
+    assert ids == ["r2", "r1"]
+    assert [item["index"] for item in page["items"]] == [3, 4]
+
+    ids, cursor, _ = await list_ids(manager, cursor)
+    assert ids == ["r0"]
+    assert cursor is None
+
+
+async def test_deleting_shown_records_does_not_skip_older_ones(manager):
+    for i in range(5):
+        manager.collection.add(f"r{i}", 100.0 + i)
+
+    ids, cursor, _ = await list_ids(manager)
+    assert ids == ["r4", "r3"]
+    del manager.collection.records["r4"]
+    del manager.collection.records["r3"]
+
+    ids, _, _ = await list_ids(manager, cursor)
+    assert ids == ["r2", "r1"]
+
+
+async def test_new_records_do_not_repeat_shown_ones(manager):
+    for i in range(4):
+        manager.collection.add(f"r{i}", 100.0 + i)
+
+    ids, cursor, _ = await list_ids(manager)
+    assert ids == ["r3", "r2"]
+    manager.collection.add("r4", 200.0)
+
+    ids, _, _ = await list_ids(manager, cursor)
+    assert ids == ["r1", "r0"]
+
+
+async def test_same_timestamp_is_ordered_by_id(manager):
+    for doc_id in ("a", "b", "c"):
+        manager.collection.add(doc_id, 100.0)
+
+    ids, cursor, _ = await list_ids(manager)
+    assert ids == ["c", "b"]
+    ids, cursor, _ = await list_ids(manager, cursor)
+    assert ids == ["a"]
+    assert cursor is None
+
+
+async def test_page_reads_are_bounded_by_page_size(manager):
+    for i in range(2000):
+        manager.collection.add(f"r{i:04d}", 100.0 + i)
+
+    ids, cursor, _ = await list_ids(manager, limit=5)
+    assert ids == ["r1999", "r1998", "r1997", "r1996", "r1995"]
+    first_page_reads = manager.collection.metadata_reads
+
+    manager.collection.metadata_reads = 0
+    for _ in range(3):
+        ids, cursor, _ = await list_ids(manager, cursor, limit=5)
+    assert ids == ["r1984", "r1983", "r1982", "r1981", "r1980"]
+    assert first_page_reads < 200
+    assert manager.collection.metadata_reads < 200
+
+
+async def test_sparse_history_is_fully_paged(manager):
+    # 时间相距很远的记录：窗口需要多次扩大才能找到下一条
+    for i, timestamp in enumerate((1.0, 1e5, 1e8, 1.6e9)):
+        manager.collection.add(f"r{i}", timestamp)
+
+    seen, cursor = [], None
+    while True:
+        ids, cursor, _ = await list_ids(manager, cursor, limit=1)
+        seen += ids
+        if cursor is None:
+            break
+    assert seen == ["r3", "r2", "r1", "r0"]
+
+
+async def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        MemoryManager.decode_cursor("not-a-cursor")
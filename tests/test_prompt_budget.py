@@ -0,0 +1,104 @@
+"""
+提示词Token预算测试：优先级分配、截断策略、分隔符计费和分组标题
+"""
+
+import pytest
+
+# 导入 src 包会加载编排器及其依赖
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_agentchat")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.utils.prompt_budget import PromptBudgetAssembler, estimate_tokens
+
+
+def words(count: int, word: str = "word") -> str:
+    return " ".join([word] * count)
+
+
+def test_everything_fits_in_added_order():
+    assembler = PromptBudgetAssembler(1000)
+    assembler.add("low", "second", priority=90)
+    assembler.add("high", "first", priority=0)
+    prompt, usage = assembler.assemble()
+
+    assert prompt == "second\n\nfirst"
+    assert not any(section["dropped"] for section in usage["sections"].values())
+
+
+def test_separators_are_charged_against_the_budget():
+    separator = "\n\n"
+    parts = [words(10, f"p{i}") for i in range(3)]
+    content_tokens = sum(estimate_tokens(part) for part in parts)
+    separator_tokens = estimate_tokens(separator)
+
+    # 预算恰好够内容但不够分隔符时，最低优先级的段落不能完整保留
+    assembler = PromptBudgetAssembler(content_tokens)
+    for i, part in enumerate(parts):
+        assembler.add(f"part{i}", part, priority=i, strategy="drop")
+    prompt, usage = assembler.assemble(separator)
+    assert usage["sections"]["part2"]["dropped"]
+    assert estimate_tokens(prompt) <= content_tokens
+    assert usage["used_tokens"] <= usage["budget_tokens"]
+
+    # 预算包含分隔符时全部保留，用量与实际提示词一致
+    assembler = PromptBudgetAssembler(content_tokens + 2 * separator_tokens)
+    for i, part in enumerate(parts):
+        assembler.add(f"part{i}", part, priority=i, strategy="drop")
+    prompt, usage = assembler.assemble(separator)
+    assert prompt == separator.join(parts)
+    assert usage["separator_tokens"] == 2 * separator_tokens
+    assert usage["used_tokens"] == content_tokens + 2 * separator_tokens
+
+
+def test_header_is_dropped_with_all_of_its_sections():
+    assembler = PromptBudgetAssembler(estimate_tokens("instruction") + 5)
+    assembler.add("instruction", "instruction", priority=0)
+    assembler.add_header("collaboration_header", "[collaboration]", group="collaboration")
+    assembler.add("dependency_outputs", words(200), priority=30, strategy="drop", group="collaboration")
+    prompt, usage = assembler.assemble()
+
+    assert prompt == "instruction"
+    assert usage["sections"]["collaboration_header"]["dropped"]
+
+
+def test_header_without_sections_is_never_emitted():
+    assembler = PromptBudgetAssembler(1000)
+    assembler.add("instruction", "instruction", priority=0)
+    assembler.add_header("collaboration_header", "[collaboration]", group="collaboration")
+    prompt, _ = assembler.assemble()
+    assert prompt == "instruction"
+
+
+def test_header_is_kept_in_place_with_its_first_surviving_section():
+    assembler = PromptBudgetAssembler(1000)
+    assembler.add("instruction", "instruction", priority=0)
+    assembler.add_header("collaboration_header", "[collaboration]", group="collaboration")
+    assembler.add("dependency_outputs", words(2000), priority=30, strategy="drop", group="collaboration")
+    assembler.add("suggestions", "suggestions", priority=60, group="collaboration")
+    assembler.add("reminder", "reminder", priority=5)
+    prompt, usage = assembler.assemble()
+
+    assert prompt == "instruction\n\n[collaboration]\n\nsuggestions\n\nreminder"
+    assert usage["sections"]["dependency_outputs"]["dropped"]
+    assert not usage["sections"]["collaboration_header"]["dropped"]
+
+
+def test_head_tail_truncation_keeps_both_ends_within_budget():
+    text = "HEAD " + words(500, "middle") + " TAIL"
+    truncated = PromptBudgetAssembler.truncate(text, 60, "head_tail")
+    assert truncated.startswith("HEAD")
+    assert truncated.endswith("TAIL")
+    assert "已省略" in truncated
+    assert estimate_tokens(truncated) <= 60
+
+
+def test_lower_priority_section_is_truncated_to_remaining_budget():
+    assembler = PromptBudgetAssembler(200)
+    assembler.add("instruction", words(50), priority=0)
+    assembler.add("test_output", words(1000), priority=40, strategy="tail", min_tokens=10)
+    prompt, usage = assembler.assemble()
+
+    assert usage["sections"]["test_output"]["truncated"]
+    assert usage["used_tokens"] <= 200
+    assert estimate_tokens(prompt) <= 200
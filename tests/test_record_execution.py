@@ -0,0 +1,61 @@
+"""
+执行记录写入路径测试：记录入队后即返回，全文索引和统计落盘在后台完成，读取前等待完成
+"""
+
+import importlib
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.base_memory_manager import ExecutionLogManager
+from src.memory.execution_stats import ExecutionStatsStore
+
+base_module = importlib.import_module("src.memory.base_memory_manager")
+
+
+class SlowLexicalIndex:
+    def __init__(self):
+        self.release = threading.Event()
+        self.added = []
+
+    def add(self, entries):
+        self.release.wait(5)
+        self.added.extend(doc_id for doc_id, _, _ in entries)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    async def put(memory, content, on_written=None):
+        return "doc-1"
+
+    async def flush(memory=None):
+        return None
+
+    monkeypatch.setattr(base_module.memory_write_queue, "put", put)
+    monkeypatch.setattr(base_module.memory_write_queue, "flush", flush)
+
+    log_manager = object.__new__(ExecutionLogManager)
+    log_manager._initialized = True
+    log_manager.execution_memory = object()
+    log_manager.version = 0
+    log_manager._index_tasks = set()
+    log_manager.lexical_index = SlowLexicalIndex()
+    log_manager.stats_store = ExecutionStatsStore(tmp_path / "execution_stats.json", save_interval=0)
+    return log_manager
+
+
+async def test_record_returns_before_index_and_stats_are_written(manager, tmp_path):
+    await manager.record_execution("UnitTestAgent", "运行单元测试", {}, True, 1.0)
+    # 内存统计已更新，全文索引仍在后台等待
+    assert manager.stats_store.total == 1
+    assert manager.lexical_index.added == []
+
+    manager.lexical_index.release.set()
+    await manager._flush_pending_writes()
+    assert manager.lexical_index.added == ["doc-1"]
+    assert json.loads((tmp_path / "execution_stats.json").read_text(encoding="utf-8"))["total"] == 1
+    assert manager._index_tasks == set()
@@ -0,0 +1,127 @@
+"""
+结构化测试结果解析测试：JUnit XML、pytest-json-report 和 UnitTestAgent 的 test_report.json
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.test_report_parser import (
+    find_report_paths,
+    load_structured_report,
+    parse_json_report,
+    parse_junit_xml
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_junit_xml_outcomes_and_summary():
+    parsed = parse_junit_xml(FIXTURES / "junit_report.xml")
+
+    assert parsed["source"] == "junit"
+    assert parsed["passed_tests"] == ["test_math_utils.test_add", "test_math_utils.test_sqrt"]
+    assert parsed["skipped_tests"] == ["test_string_utils.test_unicode"]
+    assert parsed["test_files_executed"] == ["test_math_utils.py", "test_string_utils.py"]
+    assert parsed["test_durations"]["test_math_utils.test_divide"] == 0.03
+
+    failure, = parsed["failures"]
+    assert failure["test_name"] == "test_math_utils.test_divide"
+    assert failure["type"] == "FAIL"
+    assert failure["message"] == "AssertionError: assert 0.5 == 2"
+    assert failure["details"][-1] == "E       AssertionError: assert 0.5 == 2"
+
+    error, = parsed["errors"]
+    assert error["test_name"] == "test_string_utils.test_reverse"
+    assert error["type"] == "ERROR"
+
+    assert parsed["test_summary"] == {
+        "total_tests": 5,
+        "failures_count": 1,
+        "errors_count": 1,
+        "passed_count": 2,
+        "skipped_count": 1,
+        "files_executed": 2
+    }
+
+
+def test_pytest_json_outcomes_and_summary():
+    with open(FIXTURES / "pytest_report.json", encoding="utf-8") as f:
+        parsed = parse_json_report(json.load(f))
+
+    assert parsed["source"] == "pytest-json"
+    assert parsed["passed_tests"] == ["test_math_utils.py::test_add", "test_math_utils.py::test_sqrt"]
+    assert parsed["skipped_tests"] == ["test_string_utils.py::test_unicode"]
+    assert parsed["test_files_executed"] == ["test_math_utils.py", "test_string_utils.py"]
+    assert parsed["test_durations"]["test_math_utils.py::test_divide"] == 0.03
+
+    failure, = parsed["failures"]
+    assert failure["test_name"] == "test_math_utils.py::test_divide"
+    assert failure["message"] == "AssertionError: assert 0.5 == 2"
+    assert failure["details"][0] == "def test_divide():"
+
+    # setup 阶段失败的错误信息取自 setup
+    error, = parsed["errors"]
+    assert error["test_name"] == "test_string_utils.py::test_reverse"
+    assert error["message"] == "fixture 'sample' not found"
+
+    summary = parsed["test_summary"]
+    assert (summary["total_tests"], summary["passed_count"]) == (5, 2)
+    assert (summary["failures_count"], summary["errors_count"], summary["skipped_count"]) == (1, 1, 1)
+
+
+def test_agent_report_keeps_counts_without_passed_names():
+    parsed = parse_json_report({
+        "summary": {"total_tests": 3, "passed": 2, "failures": 1, "errors": 0},
+        "test_files": [{"file": "test_math_utils.py"}],
+        "details": [{"test": "test_divide (test_math_utils.TestMath)", "type": "failure",
+                     "message": "Traceback (most recent call last):\n  ...\nAssertionError: 0.5 != 2"}]
+    })
+
+    assert parsed["source"] == "agent-json"
+    assert parsed["passed_tests"] == []
+    assert parsed["failures"][0]["message"] == "AssertionError: 0.5 != 2"
+    assert parsed["test_summary"]["passed_count"] == 2
+    assert parsed["test_summary"]["total_tests"] == 3
+
+
+def test_load_structured_report_dispatches_by_suffix(tmp_path):
+    assert load_structured_report(FIXTURES / "junit_report.xml")["source"] == "junit"
+    assert load_structured_report(FIXTURES / "pytest_report.json")["source"] == "pytest-json"
+    assert load_structured_report(tmp_path / "missing.xml") is None
+
+    broken = tmp_path / "broken.xml"
+    broken.write_text("<testsuite><testcase", encoding="utf-8")
+    assert load_structured_report(broken) is None
+
+
+def test_non_junit_xml_and_empty_reports_fall_back_to_text(tmp_path):
+    coverage = tmp_path / "coverage.xml"
+    coverage.write_text('<?xml version="1.0"?><coverage line-rate="0.9"><packages/></coverage>', encoding="utf-8")
+    empty_suite = tmp_path / "junit.xml"
+    empty_suite.write_text('<testsuites><testsuite name="pytest" tests="0"/></testsuites>', encoding="utf-8")
+    other_json = tmp_path / "test_report.json"
+    other_json.write_text('{"version": 1}', encoding="utf-8")
+
+    assert parse_junit_xml(coverage) is None
+    assert load_structured_report(coverage) is None
+    assert load_structured_report(empty_suite) is None
+    assert load_structured_report(other_json) is None
+
+
+def test_find_report_paths_accepts_only_test_reports(tmp_path):
+    xml_path = FIXTURES / "junit_report.xml"
+    agent_report = tmp_path / "test_report.json"
+    agent_report.write_text('{"summary": {"total_tests": 0}, "details": []}', encoding="utf-8")
+    coverage = tmp_path / "coverage.xml"
+    coverage.write_text("<coverage/>", encoding="utf-8")
+    other_json = tmp_path / "report.json"
+    other_json.write_text("{}", encoding="utf-8")
+
+    text = (f"报告已保存: `{agent_report}`\nJUnit: ({xml_path})\n覆盖率: {coverage}\n"
+            f"其他: {other_json} {FIXTURES / 'pytest_report.json'}\n不存在: /tmp/definitely_missing_report.xml")
+    assert find_report_paths(text) == [str(xml_path), str(agent_report)]
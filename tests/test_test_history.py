@@ -0,0 +1,138 @@
+"""
+单元测试运行历史索引测试：窗口计数、连续失败起点、套件隔离和持久化
+"""
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from src.memory.test_history import DEFAULT_SUITE, TestHistoryIndex as HistoryIndex, suite_key
+
+
+def run_output(passed=(), failed=(), errors=(), skipped=(), passed_count=None):
+    """构造 _parse_test_output 结构的解析结果"""
+    return {
+        "passed_tests": list(passed),
+        "skipped_tests": list(skipped),
+        "failures": [{"test_name": name, "message": f"AssertionError in {name}"} for name in failed],
+        "errors": [{"test_name": name, "details": ["Traceback", f"ValueError: {name}"]} for name in errors],
+        "test_summary": {"passed_count": len(passed) if passed_count is None else passed_count}
+    }
+
+
+def record(index: HistoryIndex, suite: str = DEFAULT_SUITE, **outcomes) -> int:
+    return index.record_run(run_output(**outcomes), "UnitTestAgent", not outcomes.get("failed"), 1.0, suite=suite)
+
+
+def test_window_counts_drop_evicted_runs(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json", per_test_runs=3)
+    record(index, failed=["test_a"])
+    record(index, passed=["test_a"])
+    record(index, passed=["test_a"])
+    assert (index.suites[DEFAULT_SUITE]["test_a"]["recent_pass"], index.suites[DEFAULT_SUITE]["test_a"]["recent_fail"]) == (2, 1)
+
+    # 第4次运行把最早的失败挤出窗口
+    record(index, passed=["test_a"])
+    assert (index.suites[DEFAULT_SUITE]["test_a"]["recent_pass"], index.suites[DEFAULT_SUITE]["test_a"]["recent_fail"]) == (3, 0)
+    assert [run["run_id"] for run in index.test_runs("test_a")] == [2, 3, 4]
+    assert index.flaky_tests() == []
+
+
+def test_flaky_tests_report_fail_rate_within_window(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json", per_test_runs=4)
+    record(index, passed=["test_a", "test_b"])
+    record(index, passed=["test_b"], failed=["test_a"])
+    record(index, passed=["test_a", "test_b"])
+    record(index, passed=["test_b"], failed=["test_a"])
+
+    flaky, = index.flaky_tests()
+    assert flaky["test"] == "test_a"
+    assert flaky["fail_rate"] == 0.5
+    assert flaky["last_status"] == "fail"
+    assert flaky["last_signature"] == "AssertionError in test_a"
+
+
+def test_failing_since_tracks_start_of_current_streak(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json")
+    record(index, passed=["test_a", "test_b"])
+    record(index, passed=["test_b"], failed=["test_a"])
+    record(index, failed=["test_a"], errors=["test_b"])
+    record(index, failed=["test_a"], errors=["test_b"])
+
+    failing = index.failing_since()
+    assert failing["test_a"]["failing_since_run"] == 2
+    assert failing["test_a"]["consecutive_failures"] == 3
+    assert failing["test_b"]["failing_since_run"] == 3
+    assert failing["test_b"]["last_signature"] == "ValueError: test_b"
+
+    assert set(index.failing_since(run_id=3)) == {"test_b"}
+
+    # 通过一次后连续失败结束
+    record(index, passed=["test_a"], errors=["test_b"])
+    assert set(index.failing_since()) == {"test_b"}
+
+
+def test_skipped_runs_do_not_change_history(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json")
+    record(index, failed=["test_a"])
+    record(index, skipped=["test_a"])
+    assert index.failing_since()["test_a"]["consecutive_failures"] == 1
+    assert len(index.test_runs("test_a")) == 1
+
+
+def test_count_only_report_infers_passes_for_known_tests(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json")
+    record(index, failed=["test_a"], passed=["test_b"])
+    # 只有通过数量、没有测试名：数量与套件中未失败的已知测试一致时视为通过
+    record(index, passed_count=2)
+    assert index.failing_since() == {}
+    assert index.test_runs("test_a")[-1]["inferred"] is True
+
+
+def test_count_only_report_records_nothing_when_counts_disagree(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json")
+    record(index, failed=["test_a"], passed=["test_b"])
+    # 通过数量与已知测试对不上（测试增删过），无法判断哪些通过
+    record(index, passed_count=5)
+    assert set(index.failing_since()) == {"test_a"}
+    assert len(index.test_runs("test_b")) == 1
+
+
+def test_suites_do_not_share_test_history(tmp_path):
+    index = HistoryIndex(tmp_path / "history.json")
+    project_a, project_b = suite_key(tmp_path / "a"), suite_key(tmp_path / "b")
+    record(index, suite=project_a, failed=["test_x"], passed=["test_y"])
+    record(index, suite=project_b, passed=["test_x", "test_z"])
+    # 另一个项目只给出通过数量时，不会把项目A的测试标记为通过
+    record(index, suite=project_b, passed_count=2)
+
+    assert set(index.failing_since(project_a)) == {"test_x"}
+    assert index.failing_since(project_b) == {}
+    assert len(index.test_runs("test_y", project_a)) == 1
+    assert index.test_runs("test_y", project_b) == []
+    assert [run["run_id"] for run in index.recent(suite=project_b)] == [2, 3]
+
+
+def test_history_survives_reload_with_smaller_window(tmp_path):
+    path = tmp_path / "history.json"
+    index = HistoryIndex(path, recent_runs=10, per_test_runs=5)
+    for _ in range(3):
+        record(index, failed=["test_a"])
+    record(index, passed=["test_a"])
+    index.save()
+
+    reloaded = HistoryIndex(path, recent_runs=10, per_test_runs=2)
+    assert reloaded.next_run_id == 5
+    assert [run["run_id"] for run in reloaded.recent()] == [1, 2, 3, 4]
+    # 窗口缩小后按实际保留的记录重新计数
+    assert (reloaded.suites[DEFAULT_SUITE]["test_a"]["recent_pass"], reloaded.suites[DEFAULT_SUITE]["test_a"]["recent_fail"]) == (1, 1)
+    assert record(reloaded, failed=["test_a"]) == 5
+    assert reloaded.failing_since()["test_a"]["failing_since_run"] == 5
+
+
+def test_suite_key_falls_back_to_test_file_directory(tmp_path):
+    assert suite_key(tmp_path / "project") == str(tmp_path / "project")
+    files = [str(tmp_path / "project" / "tests" / "test_a.py"), str(tmp_path / "project" / "test_b.py")]
+    assert suite_key(test_files=files) == str(tmp_path / "project")
+    assert suite_key() == DEFAULT_SUITE
@@ -0,0 +1,145 @@
+"""
+Memory写入队列测试：刷新/关闭的顺序保证和溢出重放
+"""
+
+import asyncio
+import json
+import threading
+import types
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("autogen_ext.memory.chromadb")
+
+from autogen_core.memory import MemoryContent, MemoryMimeType
+
+from src.memory.memory_config import memory_config
+from src.memory.write_queue import MemoryWriteQueue
+
+
+class FakeCollection:
+    """记录写入的集合，可阻塞或让写入失败"""
+
+    def __init__(self, fail: bool = False, gate: threading.Event = None):
+        self.fail = fail
+        self.gate = gate
+        self.started = threading.Event()
+        self.ids = []
+
+    def add(self, ids, documents, metadatas):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("write failed")
+        self.ids.extend(ids)
+
+
+class FakeMemory:
+    def __init__(self, name: str, path: str, collection: FakeCollection):
+        self._config = types.SimpleNamespace(collection_name=name, persistence_path=path)
+        self._collection = collection
+
+    def _ensure_initialized(self):
+        pass
+
+
+def make_content(text: str) -> MemoryContent:
+    return MemoryContent(content=text, mime_type=MemoryMimeType.TEXT, metadata={"agent_name": "A"})
+
+
+@pytest.fixture(autouse=True)
+def write_behind(monkeypatch):
+    monkeypatch.setattr(memory_config, "write_behind", True)
+
+
+async def wait_started(collection: FakeCollection):
+    while not collection.started.is_set():
+        await asyncio.sleep(0.01)
+
+
+async def test_flush_waits_for_in_flight_batch(tmp_path):
+    gate = threading.Event()
+    collection = FakeCollection(gate=gate)
+    memory = FakeMemory("logs", str(tmp_path), collection)
+    queue = MemoryWriteQueue(batch_size=10, flush_interval=60, spill_path=tmp_path / "spill.jsonl")
+
+    doc_id = await queue.put(memory, make_content("record"))
+    first = asyncio.ensure_future(queue.flush())
+    await wait_started(collection)
+
+    # 队列已经为空，但上一批仍在写入，第二次刷新必须等待
+    second = asyncio.ensure_future(queue.flush(memory))
+    await asyncio.sleep(0.05)
+    assert not second.done()
+
+    gate.set()
+    await asyncio.gather(first, second)
+    assert collection.ids == [doc_id]
+    await queue.close()
+
+
+async def test_close_lets_worker_finish_current_batch(tmp_path):
+    gate = threading.Event()
+    collection = FakeCollection(gate=gate)
+    memory = FakeMemory("logs", str(tmp_path), collection)
+    queue = MemoryWriteQueue(batch_size=2, flush_interval=60, spill_path=tmp_path / "spill.jsonl")
+
+    ids = [await queue.put(memory, make_content(f"record {i}")) for i in range(2)]
+    await wait_started(collection)
+
+    closing = asyncio.ensure_future(queue.close())
+    await asyncio.sleep(0.05)
+    assert not closing.done()
+
+    gate.set()
+    await closing
+    assert collection.ids == ids
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+async def test_failed_writes_are_spilled_and_replayed_by_target(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    queue = MemoryWriteQueue(batch_size=10, flush_interval=60, spill_path=spill_path)
+    # 两个集合同名但持久化目录不同，按目标标识区分
+    failing = FakeMemory("workflow_patterns", str(tmp_path / "a"), FakeCollection(fail=True))
+    doc_id = await queue.put(failing, make_content("unit test record"))
+    await queue.close()
+
+    entry = json.loads(spill_path.read_text(encoding="utf-8"))
+    assert entry["id"] == doc_id
+    assert entry["target"] == f"workflow_patterns@{tmp_path / 'a'}"
+
+    other = FakeMemory("workflow_patterns", str(tmp_path / "b"), FakeCollection())
+    target = FakeMemory("workflow_patterns", str(tmp_path / "a"), FakeCollection())
+    await queue.replay_spilled([other, target])
+
+    assert target._collection.ids == [doc_id]
+    assert other._collection.ids == []
+    assert not spill_path.exists()
+
+
+async def test_on_written_runs_after_the_batch_lands(tmp_path):
+    collection = FakeCollection()
+    memory = FakeMemory("logs", str(tmp_path), collection)
+    queue = MemoryWriteQueue(batch_size=10, flush_interval=60, spill_path=tmp_path / "spill.jsonl")
+    written = []
+
+    doc_id = await queue.put(memory, make_content("record"),
+                             on_written=lambda written_id: written.append((written_id, list(collection.ids))))
+    assert written == []
+
+    await queue.flush(memory)
+    assert written == [(doc_id, [doc_id])]
+    await queue.close()
+
+
+async def test_on_written_is_skipped_for_spilled_records(tmp_path):
+    memory = FakeMemory("logs", str(tmp_path), FakeCollection(fail=True))
+    queue = MemoryWriteQueue(batch_size=10, flush_interval=60, spill_path=tmp_path / "spill.jsonl")
+    written = []
+
+    await queue.put(memory, make_content("record"), on_written=written.append)
+    await queue.close()
+    assert written == []